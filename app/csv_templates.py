@@ -0,0 +1,83 @@
+import csv
+import hashlib
+import io
+from typing import Dict, Iterable, List
+
+from data_objects import CpG, Factor, Microbe, Disease, Article
+from gremlin_queries import ARTICLE_COLUMNS, CPG_COLUMNS, DISEASE_COLUMNS, FACTOR_COLUMNS, MICROBE_COLUMNS
+
+# One example row per template, keyed by property key (or by column for
+# columns that are not vertex properties)
+EXAMPLE_ROWS = {
+    CpG.LABEL: {
+        CpG.PropertyKey.NAME: "cg01261464",
+        CpG.PropertyKey.INTERNAL_ID: 1,
+        CpG.PropertyKey.OCCURENCES: 1,
+        CpG.PropertyKey.DIRECTION: "decrease",
+        CpG.PropertyKey.M_VALUE: "",
+        CpG.PropertyKey.BETA: 4.28,
+    },
+    Article.LABEL: {
+        Article.PropertyKey.DOI: "10.1089/omi.2016.0041",
+        Article.PropertyKey.ABSTRACT: "Full abstract of the article.",
+        Article.PropertyKey.SUMMARY: "One or two sentences on the findings.",
+    },
+    Factor.LABEL: {
+        Factor.PropertyKey.NAME: "Sleep",
+        Factor.PropertyKey.TYPE: "lifestyle",
+    },
+    Microbe.LABEL: {
+        Microbe.PropertyKey.TAXON: "Akkermansia muciniphila",
+        Microbe.PropertyKey.RANK: "species",
+        Microbe.PropertyKey.OCCURENCES: 2,
+        Microbe.PropertyKey.DIRECTION: "positive",
+        Microbe.PropertyKey.MEAN_ABUNDANCE: "3.30E-03",
+        Microbe.PropertyKey.CORRELATION_COEFFICIENT: "",
+        Microbe.PropertyKey.P_VALUE: "7.09E-28",
+        Microbe.PropertyKey.Q_VALUE: 0.0047,
+        # Read by /connect-microbes-to-diseases/ rather than the vertex import
+        "DOID": "DOID:5419",
+    },
+    Disease.LABEL: {
+        Disease.PropertyKey.NAME: "obesity",
+        Disease.PropertyKey.DOID: "DOID:9970",
+    },
+}
+
+
+class CsvTemplate:
+    def __init__(self, filename: str, body: bytes) -> None:
+        self.filename = filename
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    def matches(self, if_none_match: str) -> bool:
+        # If-None-Match may list several tags, weak ones prefixed with W/
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+
+def render_template(column_map: Dict[str, str], example_row: Dict, extra_columns: Iterable[str] = ()) -> bytes:
+    columns: List[str] = list(column_map.values()) + list(extra_columns)
+    row = [example_row.get(key, "") for key in column_map] + [example_row.get(column, "") for column in extra_columns]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerow(row)
+    return buffer.getvalue().encode("utf-8")
+
+
+def build_csv_templates() -> Dict[str, CsvTemplate]:
+    """Import templates keyed by upload kind, built from the ingest column maps."""
+    sources = {
+        "cpgs": (CPG_COLUMNS, CpG.LABEL, ()),
+        "articles": (ARTICLE_COLUMNS, Article.LABEL, ()),
+        "factors": (FACTOR_COLUMNS, Factor.LABEL, ()),
+        "microbes": (MICROBE_COLUMNS, Microbe.LABEL, ("DOID",)),
+        "diseases": (DISEASE_COLUMNS, Disease.LABEL, ()),
+    }
+    return {
+        kind: CsvTemplate(f"{kind}-template.csv", render_template(column_map, EXAMPLE_ROWS[label], extra_columns))
+        for kind, (column_map, label, extra_columns) in sources.items()
+    }
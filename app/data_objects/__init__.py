@@ -2,3 +2,5 @@ from .cpg import CpG  # noqa
 from .factor import Factor
 from .microbe import Microbe
 from .disease import Disease
+from .article import Article
+from .cpg_group import CpGGroup
@@ -0,0 +1,8 @@
+class Article:
+    ID_PREFIX = "ARTICLE:"
+    LABEL = "article"
+
+    class PropertyKey:
+        DOI = "doi"
+        ABSTRACT = "abstract"
+        SUMMARY = "summary"
@@ -0,0 +1,20 @@
+class CpGGroup:
+    ID_PREFIX = "CPG_GROUP:"
+    LABEL = "cpg_group"
+
+    class PropertyKey:
+        NAME = "name"
+        MODE = "mode"
+        K = "k"
+        STALE = "stale"
+        # One value per requested factor name (set cardinality)
+        FACTORS = "factors"
+
+    class EdgeLabel:
+        MEMBER = "has member"
+
+    # How the member CpGs relate to the defining factors
+    class Mode:
+        ALL = "AND"
+        ANY = "OR"
+        AT_LEAST_K = "AT_LEAST_K"
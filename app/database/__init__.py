@@ -1,4 +1,5 @@
-from .bulk_query_executor import BulkQueryExecutor  # noqa
-from .connection import Connection  # noqa
+from .bulk_query_executor import EDGE_CREATED, EDGE_EXISTING, BulkExecutionError, BulkQueryExecutor  # noqa
+from .connection import MESSAGE_SERIALIZERS, Connection, create_message_serializer  # noqa
+from .property_encoder import encode_properties  # noqa
 
 __version__ = "0.1"
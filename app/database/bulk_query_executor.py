@@ -1,7 +1,10 @@
 # put this whole folder in /deps
-from typing import Dict, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
 
-import pandas as pd
 from gremlin_python.process.graph_traversal import GraphTraversalSource, __  # noqa
 from gremlin_python.process.traversal import (  # noqa
     Barrier,
@@ -21,30 +24,270 @@ from gremlin_python.process.traversal import (  # noqa
 )
 
 
+# Values captured for add_edge_if_not_exist
+EDGE_CREATED = "created"
+EDGE_EXISTING = "existing"
+
+# Called after every flush with its mutation count, estimated bytes, duration
+# and the error, if any
+BatchObserver = Callable[[int, int, float, Optional[BaseException]], None]
+
+# Rough per-step overhead of a serialized addV/addE/property instruction
+_STEP_OVERHEAD_BYTES = 24
+
+
+def _notna(value) -> bool:
+    # Deferred so importing the package doesn't pull in pandas
+    import pandas as pd
+
+    return pd.notna(value)
+
+
+def _estimate_value_bytes(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (set, list, tuple)):
+        return sum(_estimate_value_bytes(item) for item in value)
+    return 8
+
+
+def _estimate_properties_bytes(properties: Optional[Dict]) -> int:
+    if not properties:
+        return 0
+    return sum(
+        _STEP_OVERHEAD_BYTES + len(key) + _estimate_value_bytes(value)
+        for key, value in properties.items()
+    )
+
+
+class BulkExecutionError(Exception):
+    """Raised when more than one pipelined batch failed."""
+
+    def __init__(self, errors: List[Exception]) -> None:
+        super().__init__(f"{len(errors)} batches failed; first error: {errors[0]}")
+        self.errors = errors
+
+
 class BulkQueryExecutor:
-    def __init__(self, traversal_source: GraphTraversalSource, max_query_count: int = 100) -> None:
+    """Accumulates mutations into batch traversals and submits them.
+
+    With ``max_in_flight`` above zero, full batches are submitted on a small
+    thread pool so the next batch is built while up to ``max_in_flight``
+    earlier ones are still on the wire; building blocks once that many are
+    outstanding. ``force_execute`` waits for every outstanding batch and
+    raises their errors.
+
+    With ``adaptive`` set, the batch size starts at ``max_query_count`` and is
+    steered after every batch toward ``target_batch_bytes`` of estimated
+    payload and ``target_batch_latency`` seconds of round trip, within
+    ``min_batch_size`` and ``max_batch_size``. A batch is also cut early once
+    its estimated payload reaches ``target_batch_bytes``.
+
+    Mutations added with a ``capture_key`` are labelled in the batch traversal
+    and selected at its end, so the graph IDs they produce come back with the
+    batch itself and accumulate in ``captured_results()``.
+
+    ``on_batch``, if given, is called after every flush, including failed ones.
+    """
+
+    def __init__(
+        self,
+        traversal_source: GraphTraversalSource,
+        max_query_count: int = 100,
+        max_in_flight: int = 0,
+        adaptive: bool = False,
+        target_batch_bytes: int = 256 * 1024,
+        target_batch_latency: float = 0.5,
+        min_batch_size: int = 10,
+        max_batch_size: int = 1000,
+        on_batch: Optional[BatchObserver] = None,
+    ) -> None:
+        self._on_batch = on_batch
         self._max_query_count = max_query_count
+        self._max_in_flight = max_in_flight
+        self._adaptive = adaptive
+        self._target_batch_bytes = target_batch_bytes
+        self._target_batch_latency = target_batch_latency
+        self._min_batch_size = min_batch_size
+        self._max_batch_size = max(max_batch_size, min_batch_size)
         self._traversal_source = traversal_source
         self._traversal = self._traversal_source.get_graph_traversal()
         self._query_counter = 0
+        self._batch_bytes = 0
+        self._flush_pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Deque[Future] = deque()
+        self._stats_lock = threading.Lock()
+        self._batch_count = 0
+        self._mutation_count = 0
+        self._max_pending = 0
+        self._total_bytes = 0
+        self._total_latency = 0.0
+        self._completed_batches = 0
+        self._chosen_sizes: Dict[int, int] = {}
+        self._batch_captures: List[Tuple[str, Hashable, Any]] = []
+        self._captured: Dict[Hashable, Any] = {}
+
+    def _capture(self, capture_key: Hashable, by_traversal=None):
+        alias = f"_capture_{len(self._batch_captures)}"
+        self._traversal = self._traversal.as_(alias)
+        self._batch_captures.append(
+            (alias, capture_key, __.id_() if by_traversal is None else by_traversal)
+        )
+
+    def _record_captures(self, captures: List[Tuple[str, Hashable, Any]], results: List):
+        if not results:
+            return
+        selected = results[0]
+        with self._stats_lock:
+            if len(captures) == 1:
+                self._captured[captures[0][1]] = selected
+            else:
+                for alias, capture_key, _ in captures:
+                    self._captured[capture_key] = selected[alias]
+
+    def _record_batch(self, mutation_count: int, batch_bytes: int, latency: float):
+        with self._stats_lock:
+            self._completed_batches += 1
+            self._total_bytes += batch_bytes
+            self._total_latency += latency
+            if not self._adaptive or mutation_count == 0:
+                return
+
+            # Size needed to hit the payload target at this batch's density
+            bytes_per_mutation = max(batch_bytes / mutation_count, 1)
+            proposed_size = self._target_batch_bytes / bytes_per_mutation
+            # Size needed to hit the latency target at this batch's speed
+            if latency > 0:
+                proposed_size = min(
+                    proposed_size, mutation_count * self._target_batch_latency / latency
+                )
+            # Move halfway toward the proposal to damp noisy round trips
+            new_size = int((self._max_query_count + proposed_size) / 2)
+            self._max_query_count = min(max(new_size, self._min_batch_size), self._max_batch_size)
+
+    def _run_batch(self, traversal, mutation_count: int, batch_bytes: int, captures: List):
+        start_time = time.perf_counter()
+        try:
+            if captures:
+                results = traversal.toList()
+            else:
+                traversal.iterate()
+        except Exception as error:
+            if self._on_batch is not None:
+                self._on_batch(mutation_count, batch_bytes, time.perf_counter() - start_time, error)
+            raise
+        latency = time.perf_counter() - start_time
+        self._record_batch(mutation_count, batch_bytes, latency)
+        if self._on_batch is not None:
+            self._on_batch(mutation_count, batch_bytes, latency, None)
+        if captures:
+            self._record_captures(captures, results)
+
+    def _submit_batch(self):
+        traversal = self._traversal
+        mutation_count = self._query_counter
+        batch_bytes = self._batch_bytes
+        captures = self._batch_captures
+        if captures:
+            # Project every captured mutation at the end of the batch; by()
+            # modulators apply to the selected labels in order
+            traversal = traversal.select(*[alias for alias, _, _ in captures])
+            for _, _, by_traversal in captures:
+                traversal = traversal.by(by_traversal)
+        self._traversal = self._traversal_source.get_graph_traversal()
+        self._query_counter = 0
+        self._batch_bytes = 0
+        self._batch_captures = []
+        with self._stats_lock:
+            self._batch_count += 1
+            self._mutation_count += mutation_count
+            self._chosen_sizes[mutation_count] = self._chosen_sizes.get(mutation_count, 0) + 1
+
+        if self._max_in_flight <= 0:
+            self._run_batch(traversal, mutation_count, batch_bytes, captures)
+            return
+
+        try:
+            # Surface failures of batches that already finished
+            while self._pending and self._pending[0].done():
+                self._pending.popleft().result()
+            # Backpressure: wait for the oldest batch before exceeding the limit
+            while len(self._pending) >= self._max_in_flight:
+                self._pending.popleft().result()
+        except Exception as error:
+            # Settle every other outstanding batch before reporting, as
+            # force_execute would; this always raises
+            self._wait_for_pending([error])
+
+        if self._flush_pool is None:
+            self._flush_pool = ThreadPoolExecutor(
+                max_workers=self._max_in_flight, thread_name_prefix="bulk-flush"
+            )
+        self._pending.append(
+            self._flush_pool.submit(self._run_batch, traversal, mutation_count, batch_bytes, captures)
+        )
+        self._max_pending = max(self._max_pending, len(self._pending))
+
+    def _wait_for_pending(self, errors: Optional[List[Exception]] = None):
+        errors = list(errors or [])
+        while self._pending:
+            try:
+                self._pending.popleft().result()
+            except Exception as error:
+                errors.append(error)
+
+        if self._flush_pool is not None:
+            self._flush_pool.shutdown()
+            self._flush_pool = None
+
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            raise BulkExecutionError(errors) from errors[0]
 
     def _auto_execute(self):
-        if self._query_counter >= self._max_query_count and self._query_counter > 0:
-            self._traversal.iterate()
-            self._traversal = self._traversal_source.get_graph_traversal()
-            self._query_counter = 0
+        if self._query_counter <= 0:
+            return
+        if self._query_counter >= self._max_query_count or (
+            self._adaptive and self._batch_bytes >= self._target_batch_bytes
+        ):
+            self._submit_batch()
 
     def force_execute(self):
         if self._query_counter > 0:
-            self._traversal.iterate()
-            self._traversal = self._traversal_source.get_graph_traversal()
-            self._query_counter = 0
+            self._submit_batch()
+        self._wait_for_pending()
+
+    def captured_results(self) -> Dict[Hashable, Any]:
+        """Return the values captured so far, keyed by their ``capture_key``.
+
+        Call after ``force_execute`` to include every outstanding batch.
+        """
+        with self._stats_lock:
+            return dict(self._captured)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            completed = self._completed_batches
+            return {
+                "batches": self._batch_count,
+                "mutations": self._mutation_count,
+                "in_flight": sum(1 for future in self._pending if not future.done()),
+                "max_in_flight": self._max_in_flight,
+                "peak_in_flight": self._max_pending,
+                "adaptive": self._adaptive,
+                "batch_size": self._max_query_count,
+                "chosen_batch_sizes": dict(sorted(self._chosen_sizes.items())),
+                "avg_batch_bytes": self._total_bytes / completed if completed else 0,
+                "avg_batch_latency": self._total_latency / completed if completed else 0.0,
+            }
 
     def add_vertex(
         self,
         label: str,
         vertex_id: Optional[str] = None,
         properties: Optional[Dict] = None,
+        capture_key: Optional[Hashable] = None,
     ):
         self._traversal = self._traversal.add_v(label)
         if vertex_id is not None:
@@ -56,12 +299,32 @@ class BulkQueryExecutor:
             for key in properties:
                 if isinstance(properties[key], set) or isinstance(properties[key], list):
                     for item in properties[key]:
-                        if pd.notna(item):
+                        if _notna(item):
                             self._traversal = self._traversal.property(Cardinality.set_, key, item)
-                elif pd.notna(properties[key]):
+                elif _notna(properties[key]):
                     self._traversal = self._traversal.property(
                         Cardinality.single, key, properties[key]
                     )
+        if capture_key is not None:
+            self._capture(capture_key)
+        self._batch_bytes += _STEP_OVERHEAD_BYTES + len(label) + _estimate_properties_bytes(properties)
+        self._query_counter += 1
+        self._auto_execute()
+
+    def add_encoded_vertex(
+        self, label: str, properties: Dict, capture_key: Optional[Hashable] = None
+    ):
+        """Add a vertex from a record produced by ``encode_properties``.
+
+        The record is already free of nulls and holds native Python scalars,
+        so the per-property null checks of ``add_vertex`` are skipped.
+        """
+        self._traversal = self._traversal.add_v(label)
+        for key, value in properties.items():
+            self._traversal = self._traversal.property(Cardinality.single, key, value)
+        if capture_key is not None:
+            self._capture(capture_key)
+        self._batch_bytes += _STEP_OVERHEAD_BYTES + len(label) + _estimate_properties_bytes(properties)
         self._query_counter += 1
         self._auto_execute()
 
@@ -84,12 +347,13 @@ class BulkQueryExecutor:
             for key in properties:
                 if isinstance(properties[key], set) or isinstance(properties[key], list):
                     for item in properties[key]:
-                        if pd.notna(item):
+                        if _notna(item):
                             self._traversal = self._traversal.property(Cardinality.set_, key, item)
-                elif pd.notna(properties[key]):
+                elif _notna(properties[key]):
                     self._traversal = self._traversal.property(
                         Cardinality.single, key, properties[key]
                     )
+        self._batch_bytes += 3 * _STEP_OVERHEAD_BYTES + len(label) + _estimate_properties_bytes(properties)
         self._query_counter += 1
         self._auto_execute()
 
@@ -99,18 +363,33 @@ class BulkQueryExecutor:
         dest_id: str,
         label: str,
         properties: Optional[Dict] = None,
+        capture_key: Optional[Hashable] = None,
     ):
-        add_traversal = __.add_e(label).from_("source_node")
+        """Add an edge unless one with ``label`` already joins the two vertices.
+
+        With a ``capture_key``, the batch reports ``"created"`` or
+        ``"existing"`` for this edge through ``captured_results()``.
+        """
+        # Each edge in a batch needs its own label for the source vertex
+        source_alias = f"_source_{self._query_counter}"
+        add_traversal = __.add_e(label).from_(source_alias)
         if properties is not None and isinstance(properties, dict):
             for key in properties:
-                if pd.notna(properties[key]):
+                if _notna(properties[key]):
                     add_traversal = add_traversal.property(key, properties[key])
+        existing_traversal = __.in_e(label).where(__.out_v().as_(source_alias)).limit(1)
+        if capture_key is not None:
+            existing_traversal = existing_traversal.constant(EDGE_EXISTING)
+            add_traversal = add_traversal.constant(EDGE_CREATED)
 
         self._traversal = (
             self._traversal.V(source_id)
-            .as_("source_node")
+            .as_(source_alias)
             .V(dest_id)
-            .coalesce(__.in_e(label).where(__.out_v().as_("source_node")), add_traversal)
+            .coalesce(existing_traversal, add_traversal)
         )
+        if capture_key is not None:
+            self._capture(capture_key, __.identity())
+        self._batch_bytes += 4 * _STEP_OVERHEAD_BYTES + len(label) + _estimate_properties_bytes(properties)
         self._query_counter += 1
         self._auto_execute()
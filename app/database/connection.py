@@ -1,6 +1,14 @@
+import asyncio
+import contextvars
 import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple
 
-from gremlin_python.driver.aiohttp.transport import AiohttpTransport
+from gremlin_python.driver import serializer
 from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection  # noqa
 from gremlin_python.process.anonymous_traversal import traversal  # noqa
 from gremlin_python.process.graph_traversal import GraphTraversal, GraphTraversalSource, __  # noqa
@@ -8,7 +16,115 @@ from gremlin_python.process.graph_traversal import GraphTraversal, GraphTraversa
 from .bulk_query_executor import BulkQueryExecutor
 
 
+# Called after every round trip with its duration and the error, if any
+RoundTripObserver = Callable[[float, Optional[BaseException]], None]
+
+# Wire formats the driver can use with Gremlin Server and Neptune
+MESSAGE_SERIALIZERS = {
+    "graphbinary": serializer.GraphBinarySerializersV1,
+    "graphson3": serializer.GraphSONSerializersV3d0,
+    "graphson2": serializer.GraphSONSerializersV2d0,
+}
+
+# permessage-deflate window bits (aiohttp's ``compress``) when compression is on
+WEBSOCKET_COMPRESSION_WBITS = 15
+
+
+def create_message_serializer(name: str):
+    try:
+        return MESSAGE_SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown Gremlin serializer {name!r}, expected one of {sorted(MESSAGE_SERIALIZERS)}")
+
+
+class TimedRemoteConnection(DriverRemoteConnection):
+    """Reports the duration of every submitted traversal to an observer.
+
+    Each terminal step (``toList``, ``next``, ``iterate``, ...) submits the
+    traversal once, so this sees every round trip to the server.
+    """
+
+    def __init__(self, *args, on_round_trip: Optional[RoundTripObserver] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._on_round_trip = on_round_trip
+
+    def submit(self, bytecode):
+        if self._on_round_trip is None:
+            return super().submit(bytecode)
+
+        started_at = time.perf_counter()
+        error = None
+        try:
+            return super().submit(bytecode)
+        except Exception as submit_error:
+            error = submit_error
+            raise
+        finally:
+            self._on_round_trip(time.perf_counter() - started_at, error)
+
+    def submit_async(self, bytecode):
+        if self._on_round_trip is None:
+            return super().submit_async(bytecode)
+
+        # The result arrives on a driver thread; report it in the caller's context
+        context = contextvars.copy_context()
+        started_at = time.perf_counter()
+        future = super().submit_async(bytecode)
+        future.add_done_callback(
+            lambda done: context.run(
+                self._on_round_trip, time.perf_counter() - started_at, done.exception()
+            )
+        )
+        return future
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class PooledRemoteConnection:
+    """A remote connection owned by the pool plus its usage bookkeeping."""
+
+    def __init__(self, remote_connection: TimedRemoteConnection) -> None:
+        self.remote_connection = remote_connection
+        self.traversal_source = traversal().with_remote(remote_connection)
+        self.in_flight = 0
+        self.requests_served = 0
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Set once the connection is queued for replacement; never handed out again
+        self.retiring = False
+
+    def is_closed(self) -> bool:
+        return self.remote_connection.is_closed()
+
+    def idle_for(self) -> float:
+        return time.monotonic() - self.last_used
+
+
 class Connection:
+    """Owns a bounded pool of remote connections to the Gremlin server.
+
+    Connections are opened up front, handed out per request with a bounded
+    number of in-flight requests each, and recycled when they are found
+    closed or have been idle for longer than ``idle_timeout`` seconds.
+    Recycling runs on a dedicated thread: the driver closes (and lazily
+    opens) websockets by running its own event loop, which cannot happen
+    on a thread that is already running the app's loop.
+
+    Each in-flight request holds one of the driver's ``max_in_flight``
+    websockets and one of its worker threads on that connection until the
+    response is read, so at most ``pool_size * max_in_flight`` requests
+    reach the server at once; async callers beyond that wait on the event
+    loop without a thread. A caller that will have several requests on the
+    wire at once (a pipelined bulk import) reserves that many ``slots``.
+
+    ``serializer_name`` picks the wire format from ``MESSAGE_SERIALIZERS``,
+    ``compression`` negotiates permessage-deflate on every websocket and
+    ``max_message_bytes`` bounds a single response frame.
+    """
+
     _instance = None
 
     @classmethod
@@ -18,32 +134,328 @@ class Connection:
     def __init__(
         self,
         url: str,
+        pool_size: int = 4,
+        max_in_flight: int = 8,
+        idle_timeout: float = 300.0,
+        on_round_trip: Optional[RoundTripObserver] = None,
+        serializer_name: str = "graphbinary",
+        compression: bool = False,
+        max_message_bytes: int = 10 * 1024 * 1024,
+        **connection_kwargs,
     ) -> None:
-        self._connection = DriverRemoteConnection(
-            url=url,
-            traversal_source="g",
-            transport_factory=lambda: AiohttpTransport(call_from_event_loop=True),
-        )
-        self._traversal_source = None
+        if pool_size < 1:
+            raise ValueError("Pool size must be at least 1")
+        if max_in_flight < 1:
+            raise ValueError("Max in-flight requests must be at least 1")
+
+        self._url = url
+        self._pool_size = pool_size
+        self._max_in_flight = max_in_flight
+        self._idle_timeout = idle_timeout
+        self._on_round_trip = on_round_trip
+        self._serializer_name = serializer_name
+        self._compression = compression
+        self._max_message_bytes = max_message_bytes
+        self._connection_kwargs = connection_kwargs
+        self._pool: List[PooledRemoteConnection] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._recycled_count = 0
+        self._wait_count = 0
+        self._health_check_count = 0
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._recycler: Optional[ThreadPoolExecutor] = None
         self._query_executor = None
         self._logger = logging.getLogger(self.__class__.__name__)
 
         Connection._instance = self
 
+    def _connect(self) -> PooledRemoteConnection:
+        remote_connection = TimedRemoteConnection(
+            self._url,
+            "g",
+            pool_size=self._max_in_flight,
+            on_round_trip=self._on_round_trip,
+            message_serializer=create_message_serializer(self._serializer_name),
+            # Passed through the driver to aiohttp's ws_connect
+            compress=WEBSOCKET_COMPRESSION_WBITS if self._compression else 0,
+            max_content_length=self._max_message_bytes,
+            **self._connection_kwargs,
+        )
+        return PooledRemoteConnection(remote_connection)
+
+    def open(self):
+        with self._condition:
+            self._closed = False
+            while len(self._pool) < self._pool_size:
+                self._pool.append(self._connect())
+
+    def _retire(self, stale_connection: PooledRemoteConnection):
+        # Caller holds self._condition
+        stale_connection.retiring = True
+        if self._recycler is None:
+            self._recycler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gremlin-recycle")
+        self._recycler.submit(self._replace, stale_connection)
+
+    def _replace(self, stale_connection: PooledRemoteConnection):
+        """Swap a retiring connection for a fresh one; runs on the recycle thread."""
+        try:
+            fresh_connection = self._connect()
+        except Exception as error:
+            self._logger.warning(f"Failed to reopen Gremlin connection: {error}")
+            with self._condition:
+                # Let the next checkout that finds it stale try again
+                stale_connection.retiring = False
+                self._condition.notify_all()
+                self._notify_async_waiter()
+            return
+
+        with self._condition:
+            if self._closed or stale_connection not in self._pool:
+                discarded_connection = fresh_connection
+            else:
+                self._pool[self._pool.index(stale_connection)] = fresh_connection
+                self._recycled_count += 1
+                discarded_connection = stale_connection
+                self._condition.notify_all()
+                self._notify_async_waiter()
+        try:
+            discarded_connection.remote_connection.close()
+        except Exception as error:
+            self._logger.warning(f"Failed to close stale Gremlin connection: {error}")
+
+    def health_check(self) -> int:
+        """Ping every idle connection and recycle the ones that fail.
+
+        The idle connections are reserved under the lock and pinged after
+        releasing it, so checkouts never wait on a ping. Returns the number
+        of connections that are busy or answered the ping.
+        """
+        with self._condition:
+            idle_connections = [c for c in self._pool if c.in_flight == 0 and not c.retiring]
+            # Counted as in flight so a checkout does not recycle them mid-ping
+            for pooled_connection in idle_connections:
+                pooled_connection.in_flight += 1
+            healthy_count = len(self._pool) - len(idle_connections)
+
+        unhealthy_connections = []
+        for pooled_connection in idle_connections:
+            try:
+                if pooled_connection.is_closed():
+                    raise ConnectionError("connection is closed")
+                pooled_connection.traversal_source.inject(0).next()
+                healthy_count += 1
+            except Exception as error:
+                self._logger.warning(f"Recycling unhealthy Gremlin connection: {error}")
+                unhealthy_connections.append(pooled_connection)
+
+        with self._condition:
+            for pooled_connection in idle_connections:
+                pooled_connection.in_flight -= 1
+            for pooled_connection in unhealthy_connections:
+                if pooled_connection.in_flight == 0 and not pooled_connection.retiring:
+                    self._retire(pooled_connection)
+            self._health_check_count += 1
+            self._condition.notify_all()
+            self._notify_async_waiter()
+        return healthy_count
+
+    def _check_slots(self, slots: int):
+        if not 1 <= slots <= self._max_in_flight:
+            raise ValueError(f"Slots must be between 1 and {self._max_in_flight}, got {slots}")
+
+    def _try_checkout(self, slots: int = 1) -> Optional[PooledRemoteConnection]:
+        # Caller holds self._condition
+        if self._closed:
+            raise RuntimeError("Gremlin connection pool is closed")
+        if not self._pool:
+            raise RuntimeError("Gremlin connection pool has not been opened")
+
+        while True:
+            available = [
+                pooled_connection for pooled_connection in self._pool
+                if not pooled_connection.retiring
+                and pooled_connection.in_flight + slots <= self._max_in_flight
+            ]
+            if not available:
+                return None
+            pooled_connection = min(available, key=lambda c: c.in_flight)
+            if pooled_connection.in_flight == 0 and (
+                pooled_connection.is_closed()
+                or pooled_connection.idle_for() > self._idle_timeout
+            ):
+                # Replaced in the background; try the next connection meanwhile
+                self._retire(pooled_connection)
+                continue
+            pooled_connection.in_flight += slots
+            return pooled_connection
+
+    def _checkout(self, timeout: Optional[float] = None, slots: int = 1) -> PooledRemoteConnection:
+        self._check_slots(slots)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                pooled_connection = self._try_checkout(slots)
+                if pooled_connection is not None:
+                    return pooled_connection
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free Gremlin connection")
+                self._wait_count += 1
+                self._condition.wait(remaining)
+
+    async def _checkout_async(self, timeout: Optional[float] = None) -> PooledRemoteConnection:
+        """Like ``_checkout``, but waits on the event loop instead of a thread.
+
+        Nothing here blocks: stale connections are only marked for the
+        recycle thread, never closed or reopened on the loop.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                pooled_connection = self._try_checkout()
+                if pooled_connection is not None:
+                    return pooled_connection
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free Gremlin connection")
+                self._wait_count += 1
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                self._forget_async_waiter(loop, waiter)
+                raise TimeoutError("Timed out waiting for a free Gremlin connection") from None
+            except BaseException:
+                self._forget_async_waiter(loop, waiter)
+                raise
+
+    def _forget_async_waiter(self, loop: asyncio.AbstractEventLoop, waiter: asyncio.Future):
+        with self._condition:
+            if (loop, waiter) in self._async_waiters:
+                self._async_waiters.remove((loop, waiter))
+            else:
+                # This waiter was already picked to wake; pass that on
+                self._notify_async_waiter()
+
+    def _notify_async_waiter(self):
+        # Caller holds self._condition
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(_wake, waiter)
+                return
+
+    def _checkin(self, pooled_connection: PooledRemoteConnection, slots: int = 1):
+        with self._condition:
+            pooled_connection.in_flight -= slots
+            pooled_connection.requests_served += 1
+            pooled_connection.last_used = time.monotonic()
+            if slots > 1:
+                self._condition.notify_all()
+            else:
+                self._condition.notify()
+            for _ in range(slots):
+                self._notify_async_waiter()
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None, slots: int = 1) -> Iterator[GraphTraversalSource]:
+        """Check out a traversal source, blocking the calling thread until one is free.
+
+        ``slots`` reserves that many of the connection's in-flight requests,
+        for callers that submit several traversals at once from other threads.
+        """
+        pooled_connection = self._checkout(timeout, slots)
+        try:
+            yield pooled_connection.traversal_source
+        finally:
+            self._checkin(pooled_connection, slots)
+
+    @asynccontextmanager
+    async def acquire_async(self, timeout: Optional[float] = None) -> AsyncIterator[GraphTraversalSource]:
+        """Check out a traversal source without blocking the event loop.
+
+        Traversals built on it must still be submitted off the loop (the
+        driver may wait for a websocket or open one there); their futures
+        can then be awaited through ``asyncio.wrap_future``.
+        """
+        pooled_connection = await self._checkout_async(timeout)
+        try:
+            yield pooled_connection.traversal_source
+        finally:
+            self._checkin(pooled_connection)
+
     @property
     def traversal_source(self) -> GraphTraversalSource:
-        if (self._connection.is_closed()) or (self._traversal_source is None):
-            self._traversal_source = traversal().with_remote(self._connection)
-        return self._traversal_source
+        with self._condition:
+            if not self._pool:
+                raise RuntimeError("Gremlin connection pool has not been opened")
+            for pooled_connection in self._pool:
+                if pooled_connection.in_flight == 0 and not pooled_connection.retiring and pooled_connection.is_closed():
+                    self._retire(pooled_connection)
+            candidates = [c for c in self._pool if not c.retiring] or self._pool
+            return min(candidates, key=lambda c: c.in_flight).traversal_source
 
     @property
     def query_executor(self) -> BulkQueryExecutor:
-        if (self._connection.is_closed()) or (self._query_executor is None):
+        if self._query_executor is None:
             self._query_executor = BulkQueryExecutor(self.traversal_source)
         return self._query_executor
 
+    def stats(self) -> Dict:
+        with self._condition:
+            return {
+                "url": self._url,
+                "pool_size": self._pool_size,
+                "max_in_flight_per_connection": self._max_in_flight,
+                "idle_timeout": self._idle_timeout,
+                "serializer": self._serializer_name,
+                "compression": self._compression,
+                "max_message_bytes": self._max_message_bytes,
+                "open_connections": sum(1 for c in self._pool if not c.is_closed()),
+                "in_flight": sum(c.in_flight for c in self._pool),
+                "requests_served": sum(c.requests_served for c in self._pool),
+                "recycled": self._recycled_count,
+                "waits": self._wait_count,
+                "health_checks": self._health_check_count,
+                "connections": [
+                    {
+                        "in_flight": c.in_flight,
+                        "requests_served": c.requests_served,
+                        "age_seconds": round(time.monotonic() - c.created_at, 1),
+                        "idle_seconds": round(c.idle_for(), 1),
+                        "closed": c.is_closed(),
+                    }
+                    for c in self._pool
+                ],
+            }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            for pooled_connection in self._pool:
+                try:
+                    pooled_connection.remote_connection.close()
+                except Exception as error:
+                    self._logger.warning(f"Failed to close Gremlin connection: {error}")
+            self._pool = []
+            self._query_executor = None
+            recycler, self._recycler = self._recycler, None
+            self._condition.notify_all()
+            while self._async_waiters:
+                self._notify_async_waiter()
+        if recycler is not None:
+            recycler.shutdown(wait=True)
+        if Connection._instance is self:
+            Connection._instance = None
+
     def log_graph_status(self):
-        g = self.traversal_source
-        vertex_count = g.V().count().next()
-        edge_count = g.E().count().next()
+        with self.acquire() as g:
+            vertex_count = g.V().count().next()
+            edge_count = g.E().count().next()
         self._logger.warning(f"Graph status: {vertex_count} vertices, {edge_count} edges.")
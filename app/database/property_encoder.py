@@ -0,0 +1,45 @@
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def _column_values(column) -> List:
+    """Return a column as native Python values with None in place of nulls."""
+    import pandas as pd
+
+    values = column.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+    return values.tolist()
+
+
+def encode_properties(
+    df: "pd.DataFrame",
+    column_map: Dict[str, Hashable],
+    required_columns: Iterable[Hashable] = (),
+    index_key: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Yield one property dict per DataFrame row, encoded column by column.
+
+    ``column_map`` maps property keys to DataFrame columns. Columns listed in
+    ``required_columns`` must be present; other mapped columns are optional
+    and skipped when missing, like ``row.get``. Null values are dropped, so
+    the records can go straight to ``BulkQueryExecutor.add_encoded_vertex``.
+    If ``index_key`` is given, the DataFrame index is stored under that key.
+    """
+    missing_columns = [column for column in required_columns if column not in df.columns]
+    if missing_columns:
+        raise KeyError(f"Missing required columns: {missing_columns}")
+
+    keys = []
+    columns = []
+    if index_key is not None:
+        keys.append(index_key)
+        columns.append(_column_values(df.index))
+    for key, column_name in column_map.items():
+        if column_name in df.columns:
+            keys.append(key)
+            columns.append(_column_values(df[column_name]))
+
+    for values in zip(*columns):
+        yield {key: value for key, value in zip(keys, values) if value is not None}
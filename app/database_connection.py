@@ -1,41 +1,80 @@
 # put in services
-# Connect to localhost
-from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
-from gremlin_python.process.anonymous_traversal import traversal
+# The Gremlin URL and pool limits come from settings, so the same code
+# connects to a local Gremlin Server or to Neptune (wss://...:8182/gremlin).
+import threading
+from typing import Optional
 
+from gremlin_python.process.graph_traversal import GraphTraversalSource
 
-def get_gremlin_client():
-    connection = DriverRemoteConnection("ws://localhost:8182/gremlin", "g")
-    g = traversal().withRemote(connection)
-    return g
+import metrics
+import settings
+from database import Connection
 
-# # Connect to Neptune
-# from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
-# from gremlin_python.process.anonymous_traversal import traversal
-# import ssl
-# import certifi
+_init_lock = threading.Lock()
 
-# gremlin_client = None
 
+def init_gremlin_client() -> Connection:
+    with _init_lock:
+        connection = Connection.get_instance()
+        if connection is None:
+            connection = Connection(
+                settings.GREMLIN_URL,
+                pool_size=settings.GREMLIN_POOL_SIZE,
+                max_in_flight=settings.GREMLIN_MAX_IN_FLIGHT,
+                idle_timeout=settings.GREMLIN_IDLE_TIMEOUT,
+                on_round_trip=metrics.record_round_trip,
+                serializer_name=settings.GREMLIN_SERIALIZER,
+                compression=settings.GREMLIN_COMPRESSION,
+                max_message_bytes=settings.GREMLIN_MAX_MESSAGE_BYTES,
+            )
+            connection.open()
+        return connection
 
-# def init_gremlin_client():
-#     global gremlin_client
-#     if gremlin_client is None:
-#         gremlin_url = "wss://db-bio-annotations.cluster-cu9wyuyqqen8.ap-southeast-1.neptune.amazonaws.com:8182/gremlin"
-#         ssl_context = ssl.create_default_context(cafile=certifi.where())
-#         gremlin_client = DriverRemoteConnection(gremlin_url, "g", ssl_context=ssl_context)
-#         g = traversal().withRemote(gremlin_client)
-#         return g
 
+def get_gremlin_client() -> GraphTraversalSource:
+    return init_gremlin_client().traversal_source
 
-# def get_gremlin_client():
-#     if gremlin_client is None:
-#         init_gremlin_client()
-#     return traversal().withRemote(gremlin_client)
 
+def ingest_max_in_flight() -> int:
+    # Pipelined write batches share the checked-out connection, so never
+    # keep more on the wire than one connection can carry
+    return min(settings.INGEST_MAX_IN_FLIGHT, settings.GREMLIN_MAX_IN_FLIGHT)
 
-# def close_gremlin_client():
-#     global gremlin_client
-#     if gremlin_client:
-#         gremlin_client.close()
-#         gremlin_client = None
+
+def acquire_gremlin_client():
+    return init_gremlin_client().acquire(timeout=settings.GREMLIN_ACQUIRE_TIMEOUT)
+
+
+def acquire_ingest_gremlin_client():
+    # Reserve a slot per pipelined batch, so reads checked out on the same
+    # connection still find a free driver websocket
+    return init_gremlin_client().acquire(
+        timeout=settings.GREMLIN_ACQUIRE_TIMEOUT, slots=max(ingest_max_in_flight(), 1)
+    )
+
+
+def acquire_gremlin_client_async():
+    return init_gremlin_client().acquire_async(timeout=settings.GREMLIN_ACQUIRE_TIMEOUT)
+
+
+def health_check_gremlin_client() -> Optional[int]:
+    """Ping the idle pooled connections; None until the pool is open."""
+    connection = Connection.get_instance()
+    if connection is None:
+        return None
+    with metrics.track_query("health_check"):
+        return connection.health_check()
+
+
+def get_pool_stats() -> dict:
+    connection = Connection.get_instance()
+    if connection is None:
+        return {"open_connections": 0}
+    return connection.stats()
+
+
+def close_gremlin_client():
+    with _init_lock:
+        connection = Connection.get_instance()
+        if connection is not None:
+            connection.close()
@@ -0,0 +1,257 @@
+import sys
+import time
+from functools import reduce
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from data_objects import CpG
+from renderers import TABLE_COLUMNS
+
+# Table columns copied from the CpG vertex, in TABLE_COLUMNS order
+_DISPLAY_PROPERTIES = {
+    'Occurrences': CpG.PropertyKey.OCCURENCES,
+    'Direction': CpG.PropertyKey.DIRECTION,
+    'Beta Baseline': CpG.PropertyKey.BETA,
+    'M-Value Baseline': CpG.PropertyKey.M_VALUE,
+}
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _first_value(value_map: dict, key: str):
+    return value_map.get(key, [None])[0]
+
+
+def _csr(group_codes: np.ndarray, member_codes: np.ndarray, group_count: int, member_count: int):
+    # Dedupe (group, member) pairs and lay them out as sorted per-group slices
+    pairs = np.unique(group_codes.astype(np.int64) * member_count + member_codes)
+    indptr = np.searchsorted(pairs // member_count, np.arange(group_count + 1))
+    return indptr, pairs % member_count
+
+
+class FactorIndex:
+    """Immutable in-memory snapshot of factor → CpG membership.
+
+    CpG vertices attached to at least one factor are stored in name order,
+    so a CpG's position (its ordinal) sorts the same way as its name. For
+    each factor the index keeps the sorted ordinals of its CpGs and of their
+    distinct names, which turns AND/OR/at-least-K grouping into NumPy set
+    operations. Display properties are kept column-wise for row building.
+    """
+
+    def __init__(
+        self,
+        factor_names: List[str],
+        name_values: np.ndarray,
+        name_codes: np.ndarray,
+        columns: Dict[str, np.ndarray],
+        association_indptr: np.ndarray,
+        association_codes: np.ndarray,
+    ) -> None:
+        self.factor_names = factor_names
+        self.factor_codes = {name: code for code, name in enumerate(factor_names)}
+        self.name_values = name_values
+        self.name_codes = name_codes
+        self.columns = columns
+        self.association_indptr = association_indptr
+        self.association_codes = association_codes
+
+        cpg_count = len(name_codes)
+        edge_cpgs = np.repeat(np.arange(cpg_count), np.diff(association_indptr))
+        self.factor_cpg_indptr, self.factor_cpgs = _csr(
+            association_codes, edge_cpgs, len(factor_names), cpg_count
+        )
+        self.factor_name_indptr, self.factor_name_codes = _csr(
+            association_codes, name_codes[edge_cpgs], len(factor_names), len(name_values)
+        )
+        self.built_at = time.time()
+        # Count each referenced object once; names are shared between arrays
+        referenced_objects = {
+            id(value): value
+            for values in (factor_names, name_values, *columns.values())
+            for value in values
+        }
+        self._object_bytes = sum(map(sys.getsizeof, referenced_objects.values()))
+
+    @classmethod
+    def from_cpg_rows(cls, cpg_rows: Iterable[dict]) -> "FactorIndex":
+        """Build from ``{'cpg_name', 'cpg', 'associations'}`` projections."""
+        cpg_rows = sorted(cpg_rows, key=lambda cpg_row: cpg_row['cpg_name'])
+
+        factor_codes: Dict[str, int] = {}
+        association_counts = []
+        association_codes = []
+        for cpg_row in cpg_rows:
+            associations = cpg_row['associations']
+            association_counts.append(len(associations))
+            association_codes.extend(
+                factor_codes.setdefault(factor_name, len(factor_codes))
+                for factor_name in associations
+            )
+
+        association_indptr = np.zeros(len(cpg_rows) + 1, dtype=np.int64)
+        np.cumsum(association_counts, out=association_indptr[1:])
+
+        names = np.array([cpg_row['cpg_name'] for cpg_row in cpg_rows], dtype=object)
+        name_values, name_codes = np.unique(names, return_inverse=True)
+
+        columns = {
+            column: np.array(
+                [_first_value(cpg_row['cpg'], property_key) for cpg_row in cpg_rows], dtype=object
+            )
+            for column, property_key in _DISPLAY_PROPERTIES.items()
+        }
+        columns['CpG ID'] = names
+        columns['Internal ID'] = np.array(
+            [_first_value(cpg_row['cpg'], CpG.PropertyKey.INTERNAL_ID) for cpg_row in cpg_rows],
+            dtype=object,
+        )
+
+        return cls(
+            list(factor_codes),
+            name_values,
+            name_codes.astype(np.int64),
+            columns,
+            association_indptr,
+            np.array(association_codes, dtype=np.int64),
+        )
+
+    def _selected_codes(self, factors: Iterable[str]) -> List[int]:
+        return [self.factor_codes[name] for name in dict.fromkeys(factors) if name in self.factor_codes]
+
+    def _factor_cpgs(self, code: int) -> np.ndarray:
+        return self.factor_cpgs[self.factor_cpg_indptr[code]:self.factor_cpg_indptr[code + 1]]
+
+    def _factor_names(self, code: int) -> np.ndarray:
+        return self.factor_name_codes[self.factor_name_indptr[code]:self.factor_name_indptr[code + 1]]
+
+    def _page_names(self, name_codes: np.ndarray, limit: Optional[int], offset: int, after: Optional[str]):
+        if after is not None:
+            first_code = np.searchsorted(self.name_values, after, side='right')
+            name_codes = name_codes[name_codes >= first_code]
+        stop = None if limit is None else offset + limit
+        return name_codes[offset:stop]
+
+    def _rows(self, cpgs: np.ndarray, association_codes: np.ndarray) -> List[dict]:
+        values = [self.columns[column][cpgs].tolist() for column in TABLE_COLUMNS if column != 'Association']
+        values.insert(
+            TABLE_COLUMNS.index('Association'),
+            [self.factor_names[code] for code in association_codes.tolist()],
+        )
+        return [dict(zip(TABLE_COLUMNS, row)) for row in zip(*values)]
+
+    def _first_matching_association(self, cpgs: np.ndarray, selected_codes: List[int]) -> np.ndarray:
+        # Position of each CpG's first edge to a selected factor
+        matching_edges = np.flatnonzero(np.isin(self.association_codes, selected_codes))
+        first_edges = matching_edges[np.searchsorted(matching_edges, self.association_indptr[cpgs])]
+        return self.association_codes[first_edges]
+
+    def _group(
+        self,
+        selected_codes: List[int],
+        name_codes: np.ndarray,
+        limit: Optional[int],
+        offset: int,
+        after: Optional[str],
+    ) -> np.ndarray:
+        if not selected_codes:
+            return _EMPTY
+        name_codes = self._page_names(name_codes, limit, offset, after)
+        candidates = np.unique(np.concatenate([self._factor_cpgs(code) for code in selected_codes]))
+        return candidates[np.isin(self.name_codes[candidates], name_codes)]
+
+    def group_cpgs_by_all_selected_factors(
+        self,
+        factors: List[str],
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+    ) -> List[dict]:
+        """Same rows as the traversal of the same name, in CpG name order."""
+        selected_factors = list(dict.fromkeys(factors))
+        selected_codes = self._selected_codes(selected_factors)
+        if not selected_codes or len(selected_codes) < len(selected_factors):
+            return []
+
+        name_codes = reduce(
+            lambda left, right: np.intersect1d(left, right, assume_unique=True),
+            (self._factor_names(code) for code in selected_codes),
+        )
+        cpgs = self._group(selected_codes, name_codes, limit, offset, after)
+
+        # Keep a single row per (name, internal ID) pair, like the traversal
+        row_keys = zip(self.name_codes[cpgs].tolist(), self.columns['Internal ID'][cpgs].tolist())
+        first_cpgs = {}
+        for cpg, row_key in zip(cpgs.tolist(), row_keys):
+            first_cpgs.setdefault(row_key, cpg)
+        cpgs = np.fromiter(first_cpgs.values(), dtype=np.int64, count=len(first_cpgs))
+
+        return self._rows(cpgs, self.association_codes[self.association_indptr[cpgs]])
+
+    def group_cpgs_by_any_selected_health_factor(
+        self,
+        factors: List[str],
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+    ) -> List[dict]:
+        """Same rows as the traversal of the same name, in CpG name order."""
+        selected_codes = self._selected_codes(factors)
+        if not selected_codes:
+            return []
+
+        name_codes = np.unique(np.concatenate([self._factor_names(code) for code in selected_codes]))
+        cpgs = self._group(selected_codes, name_codes, limit, offset, after)
+        return self._rows(cpgs, self._first_matching_association(cpgs, selected_codes))
+
+    def group_cpgs_by_at_least_k_selected_factors(
+        self,
+        factors: List[str],
+        k: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[str] = None,
+    ) -> List[dict]:
+        """Same rows as the traversal of the same name, in CpG name order."""
+        selected_codes = self._selected_codes(factors)
+        if not selected_codes:
+            return []
+
+        name_codes, factor_counts = np.unique(
+            np.concatenate([self._factor_names(code) for code in selected_codes]), return_counts=True
+        )
+        cpgs = self._group(selected_codes, name_codes[factor_counts >= k], limit, offset, after)
+        return self._rows(cpgs, self._first_matching_association(cpgs, selected_codes))
+
+    def memory_usage(self) -> Dict:
+        arrays = {
+            "name_codes": self.name_codes,
+            "association_indptr": self.association_indptr,
+            "association_codes": self.association_codes,
+            "factor_cpg_indptr": self.factor_cpg_indptr,
+            "factor_cpgs": self.factor_cpgs,
+            "factor_name_indptr": self.factor_name_indptr,
+            "factor_name_codes": self.factor_name_codes,
+            "name_values": self.name_values,
+            **{f"column:{column}": values for column, values in self.columns.items()},
+        }
+        array_bytes = {name: int(array.nbytes) for name, array in arrays.items()}
+        total_array_bytes = sum(array_bytes.values())
+        return {
+            "arrays": array_bytes,
+            "array_bytes": total_array_bytes,
+            # Strings and numbers referenced by the object arrays
+            "object_bytes": self._object_bytes,
+            "total_bytes": total_array_bytes + self._object_bytes,
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "cpgs": len(self.name_codes),
+            "cpg_names": len(self.name_values),
+            "factors": len(self.factor_names),
+            "associations": len(self.association_codes),
+            "built_at": self.built_at,
+            "memory": self.memory_usage(),
+        }
@@ -0,0 +1,72 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from factor_index import FactorIndex
+
+
+class FactorIndexManager:
+    """Builds the factor index in the background and hands out the current one.
+
+    ``ready_index`` returns None while a build is running (or after a failed
+    one), so callers fall back to the graph traversals. Rebuild requests that
+    arrive mid-build are coalesced into one follow-up build.
+    """
+
+    def __init__(self, build_index: Callable[[], "FactorIndex"]) -> None:
+        self._build_index = build_index
+        self._index: Optional["FactorIndex"] = None
+        self._building = False
+        self._rebuild_requested = False
+        self._builds = 0
+        self._last_error: Optional[str] = None
+        self._last_build_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def ready_index(self) -> Optional["FactorIndex"]:
+        with self._lock:
+            return None if self._building else self._index
+
+    def request_rebuild(self) -> bool:
+        """Start a background build; returns False if one was already running."""
+        with self._lock:
+            if self._building:
+                self._rebuild_requested = True
+                return False
+            self._building = True
+        threading.Thread(target=self._run, name="factor-index-build", daemon=True).start()
+        return True
+
+    def _run(self):
+        while True:
+            started_at = time.perf_counter()
+            try:
+                index, error = self._build_index(), None
+            except Exception as build_error:
+                print(f"Building the factor index failed: {build_error}")
+                index, error = None, str(build_error)
+
+            with self._lock:
+                self._index = index
+                self._last_error = error
+                self._last_build_seconds = time.perf_counter() - started_at
+                self._builds += 1
+                if not self._rebuild_requested:
+                    self._building = False
+                    return
+                self._rebuild_requested = False
+
+    def status(self) -> Dict:
+        with self._lock:
+            index = self._index
+            status = {
+                "building": self._building,
+                "ready": index is not None and not self._building,
+                "rebuild_requested": self._rebuild_requested,
+                "builds": self._builds,
+                "last_build_seconds": self._last_build_seconds,
+                "last_error": self._last_error,
+            }
+        status["index"] = None if index is None else index.stats()
+        return status
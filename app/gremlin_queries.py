@@ -1,7 +1,8 @@
 # put in /scripts
 # %%
-from typing import List
-import pandas as pd
+import asyncio
+import sys
+from typing import TYPE_CHECKING, Callable, List, Optional
 import database
 from gremlin_python.process.graph_traversal import GraphTraversalSource, __
 from gremlin_python.process.traversal import (
@@ -18,74 +19,140 @@ from gremlin_python.process.traversal import (
     T,
     WithOptions,
 )
-from tqdm import tqdm
-from database import BulkQueryExecutor
-from data_objects import CpG, Factor, Microbe, Disease
+from database import EDGE_CREATED, EDGE_EXISTING, BulkQueryExecutor, encode_properties
+from data_objects import CpG, Factor, Microbe, Disease, Article, CpGGroup
 import database_connection
+import metrics
+import settings
+from jobs import current_job
+from traversal_templates import (
+    FACTOR_CPGS,
+    FACTOR_CPGS_AFTER,
+    FACTOR_CPGS_BETWEEN,
+    FACTOR_CPGS_UP_TO,
+    LABEL_COUNT,
+    NODE_PROPERTIES,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# %% Map vertex property keys to the ingest CSV columns
+CPG_COLUMNS = {
+    CpG.PropertyKey.NAME: "CpG",
+    CpG.PropertyKey.INTERNAL_ID: "Internal ID",
+    CpG.PropertyKey.OCCURENCES: "Occurrences",
+    CpG.PropertyKey.DIRECTION: "Direction",
+    CpG.PropertyKey.M_VALUE: "M-Value Baseline",
+    CpG.PropertyKey.BETA: "Beta Baseline",
+}
+CPG_REQUIRED_COLUMNS = ["CpG", "Internal ID"]
+
+ARTICLE_COLUMNS = {
+    Article.PropertyKey.DOI: "DOI",
+    Article.PropertyKey.ABSTRACT: "Abstract",
+    Article.PropertyKey.SUMMARY: "Summary",
+}
+ARTICLE_REQUIRED_COLUMNS = ["DOI", "Abstract", "Summary"]
+
+FACTOR_COLUMNS = {
+    Factor.PropertyKey.NAME: "Association",
+    Factor.PropertyKey.TYPE: "Type",
+}
+
+MICROBE_COLUMNS = {
+    Microbe.PropertyKey.TAXON: "Taxon",
+    Microbe.PropertyKey.RANK: "Rank",
+    Microbe.PropertyKey.OCCURENCES: "Occurrences",
+    Microbe.PropertyKey.DIRECTION: "Direction",
+    Microbe.PropertyKey.MEAN_ABUNDANCE: "Mean Abundance",
+    Microbe.PropertyKey.CORRELATION_COEFFICIENT: "Correlation Coefficient",
+    Microbe.PropertyKey.P_VALUE: "p Value",
+    Microbe.PropertyKey.Q_VALUE: "q Value",
+}
+MICROBE_REQUIRED_COLUMNS = ["Taxon", "Rank"]
+
+DISEASE_COLUMNS = {
+    Disease.PropertyKey.NAME: "label",
+    Disease.PropertyKey.DOID: "id",
+}
+DISEASE_REQUIRED_COLUMNS = ["label", "id"]
 
 
 # %%
-def create_table(processed_data: list):
-    # Create a DataFrame with the processed data
-    df = pd.DataFrame(processed_data)
-
-    # Adjust the index to start from 1 instead of 0
-    df.index = df.index + 1
-
-    # Specify the desired column order
-    column_order = ['CpG ID', 'Association', 'Occurrences', 'Direction', 'Beta Baseline', 'M-Value Baseline']
-
-    # Try to reorder the DataFrame columns, catch any KeyError
-    try:
-        df = df[column_order]
-    except KeyError as error:
-        missing_columns = [col for col in column_order if col not in df.columns]
-        print(f"Missing columns: {missing_columns}")
-        raise error
-
-    # Style the DataFrame
-    styled_df = df.style.set_table_styles(
-        [
-            {'selector': 'thead', 'props': [('background-color', 'lightgrey')]},
-            {'selector': 'th', 'props': [('font-size', '12pt'), ('text-align', 'center')]},
-            {'selector': 'td', 'props': [('text-align', 'center')]},
-            {'selector': 'tr:nth-of-type(even)', 'props': [('background-color', '#f2f2f2')]},
-            {'selector': 'tr:hover', 'props': [('background-color', '#5cfcff')]}
-        ]
-    ).set_properties(**{
-        'border': '1px solid white',
-        'border-collapse': 'collapse',
-        'padding': '4px'
-    })
-
-    # Convert the styled DataFrame to HTML
-    html_table = styled_df.to_html()
-
-    # Return the HTML table string
-    return html_table
+def create_ingest_executor(g: GraphTraversalSource, max_query_count: int = 100) -> BulkQueryExecutor:
+    # Inside a background import, every flushed batch reports progress to the
+    # job and stops the import once it has been cancelled
+    job = current_job()
+
+    def on_batch(mutation_count: int, batch_bytes: int, seconds: float, error: Optional[BaseException]):
+        metrics.record_bulk_batch(mutation_count, batch_bytes, seconds, error)
+        if job is not None and error is None:
+            job.record_written(mutation_count)
+            job.raise_if_cancelled()
+
+    return BulkQueryExecutor(
+        g,
+        max_query_count,
+        max_in_flight=database_connection.ingest_max_in_flight(),
+        adaptive=settings.INGEST_ADAPTIVE_BATCHING,
+        target_batch_bytes=settings.INGEST_TARGET_BATCH_BYTES,
+        target_batch_latency=settings.INGEST_TARGET_BATCH_LATENCY,
+        min_batch_size=settings.INGEST_MIN_BATCH_SIZE,
+        max_batch_size=settings.INGEST_MAX_BATCH_SIZE,
+        on_batch=on_batch,
+    )
+
+
+def progress(iterable, **kwargs):
+    # tqdm is only needed once an import runs, so keep it out of app startup
+    from tqdm import tqdm
+    return tqdm(iterable, **kwargs)
 
 
 # %%
-def process_cpgs(g, common_cpgs):
-    processed_data = []
+class QueryPlan:
+    """One traversal plus the Python post-processing of its results.
+
+    ``run`` blocks the calling thread until Gremlin answers. ``run_async``
+    submits the traversal from a worker thread, because the driver may wait
+    there for a free websocket or open one with its own event loop, and
+    then awaits the driver's future, so a request holds no app thread while
+    the graph works (a driver worker still reads the response).
+    """
+
+    def __init__(self, traversal, process_results: Optional[Callable] = None, terminal: str = "toList") -> None:
+        self.traversal = traversal
+        self.process_results = process_results
+        self.terminal = terminal
+
+    def run(self):
+        results = getattr(self.traversal, self.terminal)()
+        return results if self.process_results is None else self.process_results(results)
+
+    async def run_async(self):
+        terminal = self.terminal
+        future = await asyncio.to_thread(
+            self.traversal.promise, lambda traversal: getattr(traversal, terminal)()
+        )
+        results = await asyncio.wrap_future(future)
+        if self.process_results is None:
+            return results
+        return await asyncio.to_thread(self.process_results, results)
 
-    for cpg_name, cpg_internal_id in common_cpgs:
-        cpg_node = (
-            g.V().has('cpg', 'internal ID', cpg_internal_id)
-            .valueMap()
-            .toList()
-        )[0]
 
-        associated_factor = (
-            g.V().hasLabel('cpg').has('internal ID', cpg_internal_id)
-            .out().hasLabel('factor')
-            .values('name')
-            .toList()
-        )[0]
+# %%
+def process_cpgs(cpg_rows):
+    processed_data = []
+
+    for cpg_row in cpg_rows:
+        cpg_node = cpg_row['cpg']
+        associations = cpg_row['associations']
 
         processed_entry = {
-            'CpG ID': cpg_name,
-            'Association': associated_factor,
+            'CpG ID': cpg_row['cpg_name'],
+            'Association': associations[0] if associations else None,
             'Occurrences': cpg_node.get('occurrences', [None])[0],
             'Direction': cpg_node.get('direction', [None])[0],
             'Beta Baseline': cpg_node.get('beta baseline', [None])[0],
@@ -96,356 +163,717 @@ def process_cpgs(g, common_cpgs):
     return processed_data
 
 
-#  %% Query for CpGs associated with ALL selected factors:
-def group_cpgs_by_all_selected_factors(g, factors, cpg_group_name):
-    print("RUNNING THE AND FUNCTION!!!")
-    cpg_lists = {}
-    for factor in factors:
-        cpgs_for_factor = (
-            g.V()
-            .has('factor', 'name', factor)
-            .bothE()
-            .outV()
-            .hasLabel('cpg')
-            .project('cpg_name', 'cpg_internal_ID')
-            .by('name')
-            .by('internal ID')
-            .toList()
+# %%
+def selected_factor_cpgs(
+    g: GraphTraversalSource,
+    selected_factors: List[str],
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
+):
+    # CpGs attached to the selected factors, optionally past a keyset cursor
+    # and up to an inclusive last CpG name
+    factors = list(selected_factors)
+    if up_to is not None:
+        if after is not None:
+            return FACTOR_CPGS_BETWEEN.bind(g, factors=factors, after=after, up_to=up_to)
+        return FACTOR_CPGS_UP_TO.bind(g, factors=factors, up_to=up_to)
+    if after is not None:
+        return FACTOR_CPGS_AFTER.bind(g, factors=factors, after=after)
+    return FACTOR_CPGS.bind(g, factors=factors)
+
+
+def page_cpg_name_groups(name_groups, limit: Optional[int] = None, offset: int = 0):
+    # Order {name: [cpg, ...]} entries by CpG name and cut the requested page
+    name_groups = name_groups.order().by(Column.keys)
+    if limit is not None:
+        return name_groups.range_(offset, offset + limit)
+    if offset:
+        return name_groups.skip(offset)
+    return name_groups
+
+
+def is_paged(limit: Optional[int], offset: int, after: Optional[str]) -> bool:
+    return limit is not None or offset > 0 or after is not None
+
+
+def cpg_name_range_end(name: str, prefix_length: int) -> Optional[str]:
+    """The inclusive end of the name range that holds every name starting
+    with the first ``prefix_length`` characters of ``name``.
+
+    The end is that prefix with its last character incremented, so ranges
+    cut this way follow one another without gaps. None means unbounded.
+    """
+    prefix = name[:prefix_length]
+    while prefix and ord(prefix[-1]) == sys.maxunicode:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def matching_cpg_name_groups(
+    g: GraphTraversalSource,
+    selected_factors: List[str],
+    after: Optional[str],
+    factor_count,
+    up_to: Optional[str] = None,
+):
+    # {name: [cpg, ...]} entries whose CpGs reach ``factor_count`` (a number
+    # or a predicate) of the selected factors. A name range is applied before
+    # grouping, so the group only holds the CpGs inside it.
+    return (
+        selected_factor_cpgs(g, selected_factors, after, up_to)
+        .group()
+        .by('name')
+        .unfold()
+        .where(
+            __.select(Column.values).unfold()
+            .out().hasLabel('factor')
+            .has('name', P.within(*selected_factors))
+            .values('name').dedup().count()
+            .is_(factor_count)
         )
-        print('CPGS FOR FACTOR:', cpgs_for_factor)
-        cpg_lists[factor] = {(cpg['cpg_name'], cpg['cpg_internal_ID']) for cpg in cpgs_for_factor}
-    print('CPG LISTS DICT:', cpg_lists)
+    )
 
-    # Identifying common CpG names
-    common_cpg_names = set.intersection(*[set(map(lambda x: x[0], cpgs)) for cpgs in cpg_lists.values()])
-    print('NUMBER OF COMMON CPG NAMES:', len(common_cpg_names))
-    print('COMMON CPG NAMES:', common_cpg_names)
 
-    # Finding common {'cpg_name': 'cpg_internal_ID'} pairs across all factors
-    common_cpgs = {pair for factor_cpgs in cpg_lists.values() for pair in factor_cpgs if pair[0] in common_cpg_names}
-    print('NUMBER OF COMMON CPGS:', len(common_cpgs))
-    print('**COMMON CPGS:', common_cpgs)
+#  %% Query for CpGs associated with ALL selected factors:
+def group_cpgs_by_all_selected_factors(
+    g,
+    factors,
+    cpg_group_name,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
+) -> List[dict]:
+    return plan_group_cpgs_by_all_selected_factors(g, factors, cpg_group_name, limit, offset, after, up_to).run()
+
+
+def plan_group_cpgs_by_all_selected_factors(
+    g,
+    factors,
+    cpg_group_name,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
+) -> QueryPlan:
+    """Rows for CpGs associated with every selected factor.
+
+    With ``limit``/``offset`` or an ``after`` cursor (the last CpG name of the
+    previous page), pages of distinct CpG names are cut inside the traversal.
+    ``up_to`` ends the names at an inclusive bound; together with ``after``
+    it limits the grouping to one name range.
+    """
+    print("RUNNING THE AND FUNCTION!!!")
+    selected_factors = list(dict.fromkeys(factors))
+
+    # One traversal: group the CpGs attached to the selected factors by name,
+    # keep the names that reach every selected factor, then project each
+    # matching CpG together with its first associated factor.
+    name_groups = matching_cpg_name_groups(g, selected_factors, after, len(selected_factors), up_to)
+    if is_paged(limit, offset, after):
+        name_groups = page_cpg_name_groups(name_groups, limit, offset)
+
+    cpg_rows = (
+        name_groups
+        .select(Column.values)
+        .unfold()
+        .dedup()
+        .project('cpg_name', 'cpg_internal_ID', 'cpg', 'associations')
+        .by('name')
+        .by('internal ID')
+        .by(__.valueMap())
+        .by(__.out().hasLabel('factor').values('name').fold())
+    )
 
-    processed_data = process_cpgs(g, common_cpgs)
+    def process_results(cpg_rows):
+        # Keep a single row per {'cpg_name': 'cpg_internal_ID'} pair
+        common_cpgs = {}
+        for cpg_row in cpg_rows:
+            common_cpgs.setdefault((cpg_row['cpg_name'], cpg_row['cpg_internal_ID']), cpg_row)
+        print('NUMBER OF COMMON CPGS:', len(common_cpgs))
 
-    result_table = create_table(processed_data)
-    return result_table
+        processed_data = process_cpgs(common_cpgs.values())
+        return processed_data
+
+    return QueryPlan(cpg_rows, process_results)
 
 
 # %%
 def group_cpgs_by_any_selected_health_factor(
-    g: GraphTraversalSource, factors: List[str], cpg_group_name: str
+    g: GraphTraversalSource,
+    factors: List[str],
+    cpg_group_name: str,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
 ) -> List[dict]:
+    return plan_group_cpgs_by_any_selected_health_factor(
+        g, factors, cpg_group_name, limit, offset, after, up_to
+    ).run()
+
+
+def plan_group_cpgs_by_any_selected_health_factor(
+    g: GraphTraversalSource,
+    factors: List[str],
+    cpg_group_name: str,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
+) -> QueryPlan:
+    """Rows for CpGs associated with any selected factor; paged like the AND query.
+
+    With ``up_to``, every CpG past ``after`` and up to ``up_to`` matches, so
+    the range is returned whole, without grouping and in no particular order.
+    """
     print("RUNNING THE OR FUNCTION...")
-    associated_cpgs = g.V().hasLabel('cpg').where(
-            __.out().hasLabel('factor').has('name', P.within(*factors))
-        ).valueMap(True).toList()
+    selected_factors = list(dict.fromkeys(factors))
+
+    # Start from the selected factor vertices and project every CpG attached
+    # to them together with its matching associations in one traversal
+    cpgs = selected_factor_cpgs(g, selected_factors, after, up_to).dedup()
+    if is_paged(limit, offset, after) and up_to is None:
+        cpgs = (
+            page_cpg_name_groups(cpgs.group().by('name').unfold(), limit, offset)
+            .select(Column.values)
+            .unfold()
+        )
 
-    cpg_count = len(associated_cpgs)
-    print(cpg_count)
-    # print(f"Associated CpGs: {associated_cpgs}")
+    cpg_rows = (
+        cpgs
+        .project('cpg_name', 'cpg', 'associations')
+        .by('name')
+        .by(__.valueMap())
+        .by(
+            __.out().hasLabel('factor')
+            .has('name', P.within(*selected_factors))
+            .values('name').fold()
+        )
+    )
 
-    # Process the data to create a list of dictionaries for DataFrame construction
-    processed_data = []
-    for cpg in associated_cpgs:
-        cpg_internal_id = cpg.get('internal ID')[0]
-        associations_list = (
-            g.V().hasLabel('cpg').has('internal ID', cpg_internal_id)
-            .out().hasLabel('factor')
-            .values('name')
-            .toList()
+    # Process the data to create a list of table rows
+    return QueryPlan(cpg_rows, process_cpgs)
+
+
+# %%
+def group_cpgs_by_at_least_k_selected_factors(
+    g: GraphTraversalSource,
+    factors: List[str],
+    cpg_group_name: str,
+    k: int,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
+) -> List[dict]:
+    return plan_group_cpgs_by_at_least_k_selected_factors(
+        g, factors, cpg_group_name, k, limit, offset, after, up_to
+    ).run()
+
+
+def plan_group_cpgs_by_at_least_k_selected_factors(
+    g: GraphTraversalSource,
+    factors: List[str],
+    cpg_group_name: str,
+    k: int,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    after: Optional[str] = None,
+    up_to: Optional[str] = None,
+) -> QueryPlan:
+    """Rows for CpGs associated with at least ``k`` selected factors; paged like the AND query."""
+    selected_factors = list(dict.fromkeys(factors))
+
+    # Same name grouping as the AND query, with the factor count relaxed to k
+    name_groups = matching_cpg_name_groups(g, selected_factors, after, P.gte(k), up_to)
+    if is_paged(limit, offset, after):
+        name_groups = page_cpg_name_groups(name_groups, limit, offset)
+
+    cpg_rows = (
+        name_groups
+        .select(Column.values)
+        .unfold()
+        .dedup()
+        .project('cpg_name', 'cpg', 'associations')
+        .by('name')
+        .by(__.valueMap())
+        .by(
+            __.out().hasLabel('factor')
+            .has('name', P.within(*selected_factors))
+            .values('name').fold()
         )
-        association_name = next((name for name in associations_list if name in factors), None)
+    )
 
-        # Create the entry for the current 'cpg' node including the association name
-        processed_entry = {
-            'CpG ID': cpg.get('name')[0],
-            'Association': association_name,
-            'Occurrences': cpg.get('occurrences', [None])[0],
-            'Direction': cpg.get('direction', [None])[0],
-            'Beta Baseline': cpg.get('beta baseline', [None])[0],
-            'M-Value Baseline': cpg.get('m-value baseline', [None])[0],
-        }
-        processed_data.append(processed_entry)
+    return QueryPlan(cpg_rows, process_cpgs)
+
+
+# %% Probes for streaming a group result one CpG name range at a time
+def count_selected_factor_cpgs(
+    g: GraphTraversalSource, factors: List[str], after: Optional[str] = None, up_to: Optional[str] = None
+) -> int:
+    return plan_count_selected_factor_cpgs(g, factors, after, up_to).run()
 
-    result_table = create_table(processed_data)
-    return result_table
+
+def plan_count_selected_factor_cpgs(
+    g: GraphTraversalSource, factors: List[str], after: Optional[str] = None, up_to: Optional[str] = None
+) -> QueryPlan:
+    # Edges from the selected factors into the name range, i.e. the CpGs a
+    # group query over that range walks; counting holds none of them
+    cpgs = selected_factor_cpgs(g, list(dict.fromkeys(factors)), after, up_to)
+    return QueryPlan(cpgs.count(), terminal="next")
+
+
+def first_selected_factor_cpg_name(g: GraphTraversalSource, factors: List[str], after: Optional[str] = None) -> Optional[str]:
+    return plan_first_selected_factor_cpg_name(g, factors, after).run()
+
+
+def plan_first_selected_factor_cpg_name(
+    g: GraphTraversalSource, factors: List[str], after: Optional[str] = None
+) -> QueryPlan:
+    # The smallest CpG name past the cursor; min() keeps one name, not the CpGs
+    names = selected_factor_cpgs(g, list(dict.fromkeys(factors)), after).values(CpG.PropertyKey.NAME).min_()
+    return QueryPlan(names, lambda names: names[0] if names else None)
+
+
+# %% Every CpG attached to a factor, for building the in-memory factor index
+def get_factor_index_rows(g: GraphTraversalSource) -> List[dict]:
+    return (
+        g.V()
+        .hasLabel(CpG.LABEL)
+        .where(__.out().hasLabel(Factor.LABEL))
+        .project('cpg_name', 'cpg', 'associations')
+        .by(CpG.PropertyKey.NAME)
+        .by(__.valueMap())
+        .by(__.out().hasLabel(Factor.LABEL).values(Factor.PropertyKey.NAME).fold())
+        .toList()
+    )
 
 
 # %%
-def add_cpgs(g: GraphTraversalSource, cpg_df: pd.DataFrame):
-    query_executor = BulkQueryExecutor(g, 100)
+def add_cpgs(g: GraphTraversalSource, cpg_df: "pd.DataFrame"):
+    query_executor = create_ingest_executor(g)
 
-    for index, row in tqdm(
-        cpg_df.iterrows(),
+    for cpg_properties in progress(
+        encode_properties(cpg_df, CPG_COLUMNS, CPG_REQUIRED_COLUMNS),
         total=cpg_df.shape[0],
         desc="Importing CpGs"
     ):
-        cpg_properties = {
-            CpG.PropertyKey.NAME: row["CpG"],
-            CpG.PropertyKey.INTERNAL_ID: row["Internal ID"],
-            CpG.PropertyKey.OCCURENCES: row.get("Occurrences", None),
-            CpG.PropertyKey.DIRECTION: row.get("Direction", None),
-            CpG.PropertyKey.M_VALUE: row.get("M-Value Baseline", None),
-            CpG.PropertyKey.BETA: row.get("Beta Baseline", None)
-        }
-
-        query_executor.add_vertex(label=CpG.LABEL, properties=cpg_properties)
+        query_executor.add_encoded_vertex(
+            label=CpG.LABEL,
+            properties=cpg_properties,
+            capture_key=cpg_properties.get(CpG.PropertyKey.INTERNAL_ID),
+        )
 
     query_executor.force_execute()
 
-    # Retrieve all 'cpg' vertex IDs and map them to their internal IDs
-    cpg_node_list = (
-        g.V()
-        .has_label("cpg")
-        .project("id", "internal ID")
-        .by(__.id_())
-        .by(__.values("internal ID"))
-        .to_list()
-    )
-    cpg_id_dict = {
-        cpg_node["internal ID"]: cpg_node["id"] for cpg_node in cpg_node_list
-    }
+    # Map internal IDs to the graph IDs returned by the insert batches
+    cpg_id_dict = query_executor.captured_results()
 
     return cpg_id_dict
 
 
 # %% Check if cpg has been imported:
 def count_nodes_in_db(g: GraphTraversalSource, label: str):
-    node_count = g.V().hasLabel(label).count().next()
-    return node_count
+    return plan_count_nodes_in_db(g, label).run()
+
+
+def plan_count_nodes_in_db(g: GraphTraversalSource, label: str) -> QueryPlan:
+    return QueryPlan(LABEL_COUNT.bind(g, label=label), terminal="next")
 
 
 # %%
 def check_node_properties(g: GraphTraversalSource, label: str, property_key: str, property_value: str):
-    properties = (
-        g.V()
-        .hasLabel(label)
-        .has(property_key, property_value)
-        .project('properties', 'connected_nodes')
-        .by(__.valueMap())
-        .by(__.both().valueMap().fold())
-        .toList()
-    )
-    return properties
+    return plan_check_node_properties(g, label, property_key, property_value).run()
+
+
+def plan_check_node_properties(g: GraphTraversalSource, label: str, property_key: str, property_value: str) -> QueryPlan:
+    properties = NODE_PROPERTIES.bind(g, label=label, property_key=property_key, property_value=property_value)
+    return QueryPlan(properties)
 
 
 # %%
 def add_articles(
     g: GraphTraversalSource,
-    article_df: pd.DataFrame,
+    article_df: "pd.DataFrame",
 ):
     PROP_KEY_SQL_ID = "_sql_id"
-    PROP_KEY_DOI = "doi"
-
-    query_executor = BulkQueryExecutor(g)
-    for article_sql_id, article_data in tqdm(
-        article_df.iterrows(),
+    PROP_KEY_DOI = Article.PropertyKey.DOI
+
+    # The SQL ID (the row index) only keys the captured graph IDs; it is not
+    # written to the graph, so there is nothing to look up or drop afterwards
+    query_executor = create_ingest_executor(g)
+    article_dois = {}
+    for article_properties in progress(
+        encode_properties(
+            article_df, ARTICLE_COLUMNS, ARTICLE_REQUIRED_COLUMNS, index_key=PROP_KEY_SQL_ID
+        ),
         desc="Importing articles",
         mininterval=1.0,
         total=article_df.shape[0]
     ):
-        query_executor.add_vertex(
-            label="article",
-            properties={
-                PROP_KEY_DOI: article_data["DOI"],
-                "abstract": article_data["Abstract"],
-                "summary": article_data["Summary"],
-                PROP_KEY_SQL_ID: article_sql_id,
-            },
+        sql_id = article_properties.pop(PROP_KEY_SQL_ID)
+        article_dois[sql_id] = article_properties.get(PROP_KEY_DOI)
+        query_executor.add_encoded_vertex(
+            label=Article.LABEL, properties=article_properties, capture_key=sql_id
         )
 
     query_executor.force_execute()
 
-    # Get a dictionary to map from SQL IDs to graph IDs
-    article_node_list = (
-        g.V()
-        .has(PROP_KEY_SQL_ID)
-        .project(PROP_KEY_SQL_ID, "id", PROP_KEY_DOI)
-        .by(__.values(PROP_KEY_SQL_ID))
-        .by(__.id_())
-        .by(__.values(PROP_KEY_DOI))
-        .to_list()
-    )
+    # Map SQL IDs to (graph ID, DOI) from the insert batches themselves
     article_id_dict = {
-        article_node[PROP_KEY_SQL_ID]: (article_node["id"], article_node[PROP_KEY_DOI])
-        for article_node in article_node_list
+        sql_id: (graph_id, article_dois[sql_id])
+        for sql_id, graph_id in query_executor.captured_results().items()
     }
 
-    # Drop SQL IDs from the graph database
-    g.V().properties(PROP_KEY_SQL_ID).drop().iterate()
-
     return article_id_dict
 
 
 # %%
-def add_factors(g: GraphTraversalSource, factor_df: pd.DataFrame):
-    query_executor = BulkQueryExecutor(g)
-    factor_id_dict = {}
+def get_factor_ids(g: GraphTraversalSource, factor_names: List[str]) -> dict:
+    if not factor_names:
+        return {}
+    factor_node_list = (
+        g.V()
+        .has(Factor.LABEL, Factor.PropertyKey.NAME, P.within(*factor_names))
+        .project("name", "id")
+        .by(__.values(Factor.PropertyKey.NAME))
+        .by(__.id_())
+        .to_list()
+    )
+    return {factor_node["name"]: factor_node["id"] for factor_node in factor_node_list}
 
-    for factor_sql_id, factor_data in tqdm(
-        factor_df.iterrows(),
+
+# %%
+def add_factors(g: GraphTraversalSource, factor_df: "pd.DataFrame"):
+    factor_names = factor_df[FACTOR_COLUMNS[Factor.PropertyKey.NAME]].astype(str)
+    factor_types = factor_df[FACTOR_COLUMNS[Factor.PropertyKey.TYPE]].astype(str)
+
+    # Dedupe locally, keeping the first type given for each factor name
+    first_rows = ~factor_names.duplicated()
+    unique_factors = dict(zip(factor_names[first_rows], factor_types[first_rows]))
+
+    # Prefetch the factors that already exist in one traversal
+    factor_name_to_id = get_factor_ids(g, list(unique_factors))
+    new_factors = {
+        name: factor_type for name, factor_type in unique_factors.items()
+        if name not in factor_name_to_id
+    }
+
+    query_executor = create_ingest_executor(g)
+    for factor_name, factor_type in progress(
+        new_factors.items(),
         desc="Importing factors",
         mininterval=1.0,
-        total=factor_df.shape[0],
+        total=len(new_factors),
     ):
-        factor_name = str(factor_data["Association"])
-        factor_type = str(factor_data["Type"])
-
-        factor_vertex = (
-            g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, factor_name)
-        )
-        if not factor_vertex.hasNext():
-            properties = {
+        query_executor.add_encoded_vertex(
+            label=Factor.LABEL,
+            properties={
                 Factor.PropertyKey.NAME: factor_name,
-                Factor.PropertyKey.TYPE: factor_type
-            }
-            query_executor.add_vertex(
-                label=Factor.LABEL,
-                properties=properties
-            )
-            print(f"Attempting to add factor vertex: {factor_name}")
-
-            # Force execute to ensure vertex is created
-            query_executor.force_execute()
-
-            # Re-query to check if the vertex now exists and retrieve its ID
-            factor_vertex = (
-                g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, factor_name)
-            )
-            if factor_vertex.hasNext():
-                factor_graph_id = factor_vertex.next().id
-                factor_id_dict[factor_sql_id] = factor_graph_id
-                print(f"Successfully added and found factor vertex: {factor_name}, ID: {factor_graph_id}")
-            else:
-                print(f"Failed to find factor vertex immediately after addition: {factor_name}")
-
-        else:
-            # Retrieve the ID of the existing vertex
-            factor_graph_id = factor_vertex.next().id  # Access as a property
-            factor_id_dict[factor_sql_id] = factor_graph_id
-            print(f"Found existing factor vertex: {factor_name}, ID: {factor_graph_id}")
+                Factor.PropertyKey.TYPE: factor_type,
+            },
+            capture_key=factor_name,
+        )
+    query_executor.force_execute()
+    factor_name_to_id.update(query_executor.captured_results())
+
+    # Any group naming an uploaded factor, new or re-ingested, may have changed
+    stale_group_count = mark_cpg_groups_stale(g, list(unique_factors))
+    print(
+        f"Factors: {len(unique_factors) - len(new_factors)} existing, "
+        f"{len(new_factors)} added from {factor_df.shape[0]} rows; "
+        f"{stale_group_count} saved CpG groups marked stale"
+    )
 
+    factor_id_dict = {
+        factor_sql_id: factor_name_to_id[factor_name]
+        for factor_sql_id, factor_name in zip(factor_df.index, factor_names)
+        if factor_name in factor_name_to_id
+    }
     return factor_id_dict
 
 
 # %%
-def add_microbes(g: GraphTraversalSource, microbe_df: pd.DataFrame):
-    query_executor = BulkQueryExecutor(g, 100)
+def add_microbes(g: GraphTraversalSource, microbe_df: "pd.DataFrame"):
+    query_executor = create_ingest_executor(g)
 
-    for index, row in tqdm(
-        microbe_df.iterrows(),
+    for microbe_properties in progress(
+        encode_properties(microbe_df, MICROBE_COLUMNS, MICROBE_REQUIRED_COLUMNS),
         total=microbe_df.shape[0],
         desc="Ingesting Microbes"
     ):
-        microbe_properties = {
-            Microbe.PropertyKey.TAXON: index,
-            Microbe.PropertyKey.RANK: row["Rank"],
-            Microbe.PropertyKey.OCCURENCES: row.get("Occurrences", None),
-            Microbe.PropertyKey.DIRECTION: row.get("Direction", None),
-            Microbe.PropertyKey.MEAN_ABUNDANCE: row.get("Mean Abundance", None),
-            Microbe.PropertyKey.CORRELATION_COEFFICIENT: row.get("Correlation Coefficient", None),
-            Microbe.PropertyKey.P_VALUE: row.get("p Value", None),
-            Microbe.PropertyKey.Q_VALUE: row.get("q Value", None)
-        }
-
-        query_executor.add_vertex(
+        query_executor.add_encoded_vertex(
             label=Microbe.LABEL,
-            properties=microbe_properties
+            properties=microbe_properties,
+            capture_key=microbe_properties.get(Microbe.PropertyKey.TAXON),
         )
 
     query_executor.force_execute()
 
-    microbe_node_list = (
-        g.V()
-        .has_label("microbe")
-        .project("id", "taxon")
-        .by(__.id_())
-        .by(__.values("taxon"))
-        .to_list()
-    )
-    microbe_id_dict = {
-        microbe_node["taxon"]: microbe_node["id"] for microbe_node in microbe_node_list
-    }
+    # Map taxa to the graph IDs returned by the insert batches
+    microbe_id_dict = query_executor.captured_results()
 
     return microbe_id_dict
 
 
 # %% Import 'disease' nodes
-def add_diseases(g: GraphTraversalSource, disease_df: pd.DataFrame):
-    query_executor = BulkQueryExecutor(g, 100)
+def add_diseases(g: GraphTraversalSource, disease_df: "pd.DataFrame"):
+    query_executor = create_ingest_executor(g)
 
-    for index, row in tqdm(
-        disease_df.iterrows(),
+    for disease_properties in progress(
+        encode_properties(disease_df, DISEASE_COLUMNS, DISEASE_REQUIRED_COLUMNS),
         total=disease_df.shape[0],
         desc="Ingesting Diseases"
     ):
-        disease_properties = {
-            Disease.PropertyKey.NAME: row["label"],
-            Disease.PropertyKey.DOID: row["id"]
-        }
-
-        query_executor.add_vertex(
+        query_executor.add_encoded_vertex(
             label=Disease.LABEL,
-            properties=disease_properties
+            properties=disease_properties,
+            capture_key=disease_properties.get(Disease.PropertyKey.DOID),
         )
 
     query_executor.force_execute()
 
-    disease_node_list = (
-        g.V()
-        .has_label("disease")
-        .project("id", "disease ontology id")
-        .by(__.id_())
-        .by(__.values("disease ontology id"))
-        .to_list()
-    )
-    disease_id_dict = {
-        disease_node["disease ontology id"]: disease_node["id"] for disease_node in disease_node_list
-    }
+    # Map disease ontology IDs to the graph IDs returned by the insert batches
+    disease_id_dict = query_executor.captured_results()
 
     return disease_id_dict
 
 
 # %%
-def add_edges_microbes_diseases(g: GraphTraversalSource, microbe_df: pd.DataFrame):
-    query_executor = BulkQueryExecutor(g, 100)
-
-    disease_node_list = (
+def get_vertex_ids(g: GraphTraversalSource, label: str, property_key: str, values: List) -> dict:
+    if not values:
+        return {}
+    node_list = (
         g.V()
-        .has_label("disease")
-        .project("id", "disease ontology id")
+        .has(label, property_key, P.within(*values))
+        .project("id", property_key)
         .by(__.id_())
-        .by(__.values("disease ontology id"))
+        .by(__.values(property_key))
         .to_list()
     )
-    disease_id_dict = {
-        disease_node["disease ontology id"]: disease_node["id"] for disease_node in disease_node_list
-    }
+    return {node[property_key]: node["id"] for node in node_list}
 
-    microbe_node_list = (
-        g.V()
-        .has_label("microbe")
-        .project("id", "taxon")
-        .by(__.id_())
-        .by(__.values("taxon"))
-        .to_list()
+
+# %%
+EDGE_UNRESOLVED = "unresolved"
+
+
+def add_edges_microbes_diseases(g: GraphTraversalSource, microbe_df: "pd.DataFrame") -> dict:
+    """Link microbes to diseases; maps each (taxon, DOID) pair to its edge status.
+
+    The status is ``EDGE_CREATED``, ``EDGE_EXISTING``, or ``EDGE_UNRESOLVED``
+    when the microbe or the disease is not in the graph.
+    """
+    EDGE_LABEL = "associated with"
+
+    # Dedupe the (taxon, DOID) pairs locally so each edge is written once
+    edge_df = microbe_df[["Taxon", "DOID"]].dropna().drop_duplicates()
+    edge_pairs = list(zip(edge_df["Taxon"].tolist(), edge_df["DOID"].tolist()))
+
+    # Resolve only the endpoints named in this upload
+    microbe_id_dict = get_vertex_ids(
+        g, Microbe.LABEL, Microbe.PropertyKey.TAXON, edge_df["Taxon"].unique().tolist()
+    )
+    disease_id_dict = get_vertex_ids(
+        g, Disease.LABEL, Disease.PropertyKey.DOID, edge_df["DOID"].unique().tolist()
     )
-    microbe_id_dict = {
-        microbe_node["taxon"]: microbe_node["id"] for microbe_node in microbe_node_list
-    }
 
-    # Collecting edge queries
-    for _, row_data in tqdm(
-        microbe_df.iterrows(),
-        total=microbe_df.shape[0],
+    query_executor = create_ingest_executor(g)
+    edge_statuses = {}
+    for microbe_taxon, disease_doid in progress(
+        edge_pairs,
+        total=len(edge_pairs),
         desc="Adding microbe-disease edges"
     ):
-        # article_graph_id = article_id_dict.get(row_data["Article ID"])
-        disease_graph_id = disease_id_dict.get(row_data["DOID"])
-        microbe_taxon = row_data["Taxon"]
         microbe_graph_id = microbe_id_dict.get(microbe_taxon)
+        disease_graph_id = disease_id_dict.get(disease_doid)
+        if microbe_graph_id is None or disease_graph_id is None:
+            edge_statuses[(microbe_taxon, disease_doid)] = EDGE_UNRESOLVED
+            continue
+
+        query_executor.add_edge_if_not_exist(
+            microbe_graph_id,
+            disease_graph_id,
+            EDGE_LABEL,
+            capture_key=(microbe_taxon, disease_doid),
+        )
+
+    query_executor.force_execute()
+
+    edge_statuses.update(query_executor.captured_results())
+    return edge_statuses
+
+
+def count_edge_statuses(edge_statuses: dict) -> dict:
+    counts = {EDGE_CREATED: 0, EDGE_EXISTING: 0, EDGE_UNRESOLVED: 0}
+    for status in edge_statuses.values():
+        counts[status] += 1
+    return counts
+
+
+# %% Named CpG groups, saved as cpg_group vertices holding their definition and
+# edges to their members
+def cpg_group_members(g: GraphTraversalSource, mode: str, factors: List[str], k: Optional[int] = None):
+    # The CpG vertices a group query returns, without projecting them
+    selected_factors = list(dict.fromkeys(factors))
+    if mode == CpGGroup.Mode.ANY:
+        return selected_factor_cpgs(g, selected_factors).dedup()
+    factor_count = len(selected_factors) if mode == CpGGroup.Mode.ALL else P.gte(k)
+    return (
+        matching_cpg_name_groups(g, selected_factors, None, factor_count)
+        .select(Column.values)
+        .unfold()
+        .dedup()
+    )
+
+
+def sync_cpg_group_members(g: GraphTraversalSource, group_id, mode: str, factors: List[str], k: Optional[int] = None) -> dict:
+    """Bring a group's member edges in line with its definition, touching only the difference."""
+    current_ids = set(cpg_group_members(g, mode, factors, k).id_().toList())
+    saved_edges = {
+        row["cpg"]: row["edge"]
+        for row in (
+            g.V(group_id)
+            .outE(CpGGroup.EdgeLabel.MEMBER)
+            .project("edge", "cpg")
+            .by(__.id_())
+            .by(__.inV().id_())
+            .toList()
+        )
+    }
 
-        g.V(microbe_graph_id).addE("associated with").to(__.V(disease_graph_id)).iterate()
+    removed_edges = [edge_id for cpg_id, edge_id in saved_edges.items() if cpg_id not in current_ids]
+    if removed_edges:
+        g.V(group_id).outE(CpGGroup.EdgeLabel.MEMBER).has(T.id, P.within(removed_edges)).drop().iterate()
 
+    added_ids = current_ids.difference(saved_edges)
+    query_executor = create_ingest_executor(g)
+    for cpg_id in added_ids:
+        query_executor.add_edge(group_id, cpg_id, CpGGroup.EdgeLabel.MEMBER)
     query_executor.force_execute()
+
+    g.V(group_id).property(Cardinality.single, CpGGroup.PropertyKey.STALE, False).iterate()
+    return {"members": len(current_ids), "added": len(added_ids), "removed": len(removed_edges)}
+
+
+def save_cpg_group(g: GraphTraversalSource, name: str, mode: str, factors: List[str], k: Optional[int] = None) -> dict:
+    """Create or redefine the named group and sync its members."""
+    selected_factors = list(dict.fromkeys(factors))
+    group_id = (
+        g.V()
+        .has(CpGGroup.LABEL, CpGGroup.PropertyKey.NAME, name)
+        .fold()
+        .coalesce(
+            __.unfold(),
+            __.addV(CpGGroup.LABEL).property(CpGGroup.PropertyKey.NAME, name),
+        )
+        .id_()
+        .next()
+    )
+
+    # Store the requested factor names rather than edges to factor vertices,
+    # so factors that don't exist yet stay part of the definition
+    g.V(group_id).properties(CpGGroup.PropertyKey.FACTORS).drop().iterate()
+    definition = (
+        g.V(group_id)
+        .property(Cardinality.single, CpGGroup.PropertyKey.MODE, mode)
+        .property(Cardinality.single, CpGGroup.PropertyKey.K, k if k is not None else 0)
+    )
+    for factor_name in selected_factors:
+        definition = definition.property(Cardinality.set_, CpGGroup.PropertyKey.FACTORS, factor_name)
+    definition.iterate()
+
+    return {"name": name, **sync_cpg_group_members(g, group_id, mode, selected_factors, k)}
+
+
+def refresh_cpg_group(g: GraphTraversalSource, name: str) -> Optional[dict]:
+    """Recompute a saved group from its stored definition; None if there is no such group."""
+    groups = (
+        g.V()
+        .has(CpGGroup.LABEL, CpGGroup.PropertyKey.NAME, name)
+        .project("id", "mode", "k", "factors")
+        .by(__.id_())
+        .by(CpGGroup.PropertyKey.MODE)
+        .by(CpGGroup.PropertyKey.K)
+        .by(__.values(CpGGroup.PropertyKey.FACTORS).fold())
+        .toList()
+    )
+    if not groups:
+        return None
+    group = groups[0]
+    k = group["k"] or None
+    return {"name": name, **sync_cpg_group_members(g, group["id"], group["mode"], group["factors"], k)}
+
+
+def mark_cpg_groups_stale(g: GraphTraversalSource, factor_names: List[str]) -> int:
+    # Groups that name any of these factors may no longer match their members
+    if not factor_names:
+        return 0
+    return (
+        g.V()
+        .has(CpGGroup.LABEL, CpGGroup.PropertyKey.FACTORS, P.within(*factor_names))
+        .property(Cardinality.single, CpGGroup.PropertyKey.STALE, True)
+        .count()
+        .next()
+    )
+
+
+def get_cpg_group(g: GraphTraversalSource, name: str) -> Optional[dict]:
+    return plan_get_cpg_group(g, name).run()
+
+
+def plan_get_cpg_group(g: GraphTraversalSource, name: str) -> QueryPlan:
+    # One traversal out of the group vertex to its members and their factors
+    groups = (
+        g.V()
+        .has(CpGGroup.LABEL, CpGGroup.PropertyKey.NAME, name)
+        .project("group", "factors", "members")
+        .by(__.valueMap())
+        .by(__.values(CpGGroup.PropertyKey.FACTORS).fold())
+        .by(
+            __.out(CpGGroup.EdgeLabel.MEMBER)
+            .project("cpg_name", "cpg", "associations")
+            .by(CpG.PropertyKey.NAME)
+            .by(__.valueMap())
+            .by(__.out().hasLabel(Factor.LABEL).values(Factor.PropertyKey.NAME).fold())
+            .fold()
+        )
+    )
+
+    def process_results(results):
+        if not results:
+            return None
+        group = results[0]
+        properties = {key: values[0] for key, values in group["group"].items()}
+        cpg_rows = group["members"]
+        if properties.get(CpGGroup.PropertyKey.MODE) != CpGGroup.Mode.ALL:
+            # OR and at-least-k rows list only the defining factors, as their queries do
+            defining_factors = set(group["factors"])
+            for cpg_row in cpg_rows:
+                cpg_row["associations"] = [name for name in cpg_row["associations"] if name in defining_factors]
+        return {
+            "name": name,
+            "mode": properties.get(CpGGroup.PropertyKey.MODE),
+            "k": properties.get(CpGGroup.PropertyKey.K) or None,
+            "factors": group["factors"],
+            "stale": bool(properties.get(CpGGroup.PropertyKey.STALE, False)),
+            "rows": process_cpgs(cpg_rows),
+        }
+
+    return QueryPlan(groups, process_results)
+
+
+# %% Single-traversal queries that can be awaited without a worker thread
+QUERY_PLANS = {
+    group_cpgs_by_all_selected_factors: plan_group_cpgs_by_all_selected_factors,
+    group_cpgs_by_any_selected_health_factor: plan_group_cpgs_by_any_selected_health_factor,
+    group_cpgs_by_at_least_k_selected_factors: plan_group_cpgs_by_at_least_k_selected_factors,
+    count_nodes_in_db: plan_count_nodes_in_db,
+    check_node_properties: plan_check_node_properties,
+    get_cpg_group: plan_get_cpg_group,
+    count_selected_factor_cpgs: plan_count_selected_factor_cpgs,
+    first_selected_factor_cpg_name: plan_first_selected_factor_cpg_name,
+}
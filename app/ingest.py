@@ -0,0 +1,123 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import IO, TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
+
+from gremlin_python.process.graph_traversal import GraphTraversalSource
+
+import settings
+from jobs import IngestJob, job_context
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_END_OF_STREAM = object()
+
+
+def _tell(csv_file: IO) -> Optional[int]:
+    try:
+        return csv_file.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def read_csv_chunks(
+    csv_file: IO, chunk_size: int, prefetch: int = 1
+) -> Iterator[Tuple["pd.DataFrame", Optional[int]]]:
+    """Yield ``csv_file`` as DataFrames of at most ``chunk_size`` rows.
+
+    Each chunk comes with the approximate number of bytes read so far.
+    Parsing runs on a background thread that stays at most ``prefetch`` chunks
+    ahead of the consumer, so the next chunk is parsed while the current one
+    is written and peak memory is bounded by the chunk size.
+    """
+    chunk_queue = queue.Queue(maxsize=max(prefetch, 1))
+    stop_parsing = threading.Event()
+
+    def put(item) -> bool:
+        while not stop_parsing.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def parse():
+        try:
+            import pandas as pd
+
+            with pd.read_csv(csv_file, chunksize=chunk_size) as reader:
+                for chunk in reader:
+                    if not put((chunk, _tell(csv_file))):
+                        return
+            put(_END_OF_STREAM)
+        except BaseException as error:
+            put(error)
+
+    parser_thread = threading.Thread(target=parse, name="csv-chunk-parser", daemon=True)
+    parser_thread.start()
+    try:
+        while True:
+            item = chunk_queue.get()
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop_parsing.set()
+        parser_thread.join()
+
+
+def ingest_csv_in_chunks(
+    g: GraphTraversalSource,
+    csv_file: IO,
+    ingest_func: Callable[[GraphTraversalSource, "pd.DataFrame"], Dict],
+    chunk_size: int = settings.INGEST_CHUNK_SIZE,
+    job: Optional[IngestJob] = None,
+) -> int:
+    """Stream ``csv_file`` into ``ingest_func`` one chunk at a time.
+
+    Returns the total number of entries the ingest function reported. When a
+    ``job`` is given, progress is recorded on it after every flushed write
+    batch, and a cancel request stops the import at the next batch boundary
+    (see ``create_ingest_executor``); batches already sent stay written.
+    """
+    written_count = 0
+    for chunk, bytes_parsed in read_csv_chunks(csv_file, chunk_size, settings.INGEST_PREFETCH_CHUNKS):
+        if job is None:
+            written_count += len(ingest_func(g, chunk))
+            continue
+
+        job.raise_if_cancelled()
+        job.record_parsed(chunk.shape[0], bytes_parsed)
+        try:
+            with job_context(job):
+                written_count += len(ingest_func(g, chunk))
+        except Exception:
+            # A cancel seen by a pipelined batch reaches here wrapped in the
+            # executor's errors; report it as the cancel it is
+            job.raise_if_cancelled()
+            raise
+        job.record_parsed_rows_written()
+    return written_count
+
+
+def save_upload(upload_file: IO) -> Tuple[str, int]:
+    """Copy an upload to a temporary file that outlives the request.
+
+    Returns the path and size of the copy; the caller removes it.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as upload_copy:
+        shutil.copyfileobj(upload_file, upload_copy)
+        return upload_copy.name, upload_copy.tell()
+
+
+def remove_upload(upload_path: str):
+    try:
+        os.remove(upload_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,232 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class IngestJob:
+    """Progress and lifecycle of one background import."""
+
+    def __init__(self, kind: str, total_bytes: Optional[int] = None) -> None:
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = JobStatus.QUEUED
+        self.total_bytes = total_bytes
+        self.bytes_parsed = 0
+        self.rows_parsed = 0
+        self.rows_written = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def record_parsed(self, row_count: int, bytes_parsed: Optional[int] = None):
+        with self._lock:
+            self.rows_parsed += row_count
+            if bytes_parsed is not None:
+                self.bytes_parsed = bytes_parsed
+
+    def record_written(self, row_count: int):
+        with self._lock:
+            # Batches report mutations, which need not match rows one to one
+            # (deduplicated factors, extra edges), so stay behind the parser
+            self.rows_written = min(self.rows_written + row_count, self.rows_parsed)
+
+    def record_parsed_rows_written(self):
+        with self._lock:
+            self.rows_written = self.rows_parsed
+
+    def mark_running(self):
+        with self._lock:
+            self.status = JobStatus.RUNNING
+            self.started_at = time.time()
+
+    def mark_finished(self, status: str, result: Any = None, error: Optional[str] = None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._cancel_event.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            end_time = self.finished_at or time.time()
+            elapsed = end_time - self.started_at if self.started_at else 0.0
+            throughput = self.rows_written / elapsed if elapsed > 0 else 0.0
+
+            eta = None
+            if (
+                self.status == JobStatus.RUNNING
+                and self.total_bytes
+                and self.bytes_parsed > 0
+                and elapsed > 0
+            ):
+                # Upload size is known but row count is not, so estimate from bytes
+                bytes_per_second = self.bytes_parsed / elapsed
+                eta = max(self.total_bytes - self.bytes_parsed, 0) / bytes_per_second
+
+            return {
+                "job_id": self.job_id,
+                "kind": self.kind,
+                "status": self.status,
+                "cancel_requested": self.cancel_requested,
+                "rows_parsed": self.rows_parsed,
+                "rows_written": self.rows_written,
+                "bytes_parsed": self.bytes_parsed,
+                "total_bytes": self.total_bytes,
+                "elapsed_seconds": round(elapsed, 3),
+                "rows_per_second": round(throughput, 1),
+                "eta_seconds": None if eta is None else round(eta, 1),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+_current_job: ContextVar[Optional[IngestJob]] = ContextVar("current_job", default=None)
+
+
+def current_job() -> Optional[IngestJob]:
+    """The import job the calling code runs under, if any."""
+    return _current_job.get()
+
+
+@contextmanager
+def job_context(job: Optional[IngestJob]) -> Iterator[None]:
+    token = _current_job.set(job)
+    try:
+        yield
+    finally:
+        _current_job.reset(token)
+
+
+class JobManager:
+    """Runs imports on a bounded worker pool and keeps their status.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queued`` wait;
+    further submissions raise ``JobQueueFull``. The newest ``history_size``
+    finished jobs stay queryable.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queued: int = 8, history_size: int = 100) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-job")
+        self._max_workers = max_workers
+        self._max_queued = max_queued
+        self._history_size = history_size
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def _prune(self):
+        finished_ids = [job_id for job_id, job in self._jobs.items() if job.status in JobStatus.FINISHED]
+        for job_id in finished_ids[:max(len(finished_ids) - self._history_size, 0)]:
+            del self._jobs[job_id]
+
+    def _run(
+        self,
+        job: IngestJob,
+        run: Callable[[IngestJob], Any],
+        on_finished: Optional[Callable[[IngestJob], None]],
+    ):
+        try:
+            job.raise_if_cancelled()
+            job.mark_running()
+            job.mark_finished(JobStatus.SUCCEEDED, result=run(job))
+        except JobCancelled:
+            job.mark_finished(JobStatus.CANCELLED)
+        except Exception as error:
+            print(f"Job {job.job_id} ({job.kind}) failed: {error}")
+            import traceback
+            traceback.print_exc()
+            job.mark_finished(JobStatus.FAILED, error=str(error))
+        finally:
+            if on_finished is not None:
+                on_finished(job)
+
+    def submit(
+        self,
+        kind: str,
+        run: Callable[[IngestJob], Any],
+        total_bytes: Optional[int] = None,
+        on_finished: Optional[Callable[[IngestJob], None]] = None,
+    ) -> IngestJob:
+        with self._lock:
+            if self._count(JobStatus.QUEUED) >= self._max_queued:
+                raise JobQueueFull(f"{self._max_queued} import jobs are already queued")
+            job = IngestJob(kind, total_bytes)
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, run, on_finished)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        job = self.get(job_id)
+        if job is not None and job.status not in JobStatus.FINISHED:
+            job.cancel()
+        return job
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_workers": self._max_workers,
+                "max_queued": self._max_queued,
+                "queued": self._count(JobStatus.QUEUED),
+                "running": self._count(JobStatus.RUNNING),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if job.status not in JobStatus.FINISHED:
+                job.cancel()
+        self._executor.shutdown(wait=True)
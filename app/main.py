@@ -1,12 +1,27 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from collections import Counter
+from typing import Callable, Dict, Optional
+from urllib.parse import quote
+from fastapi import FastAPI, HTTPException, File, Query, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
-from gremlin_queries import group_cpgs_by_all_selected_factors, group_cpgs_by_any_selected_health_factor, add_cpgs, count_nodes_in_db, add_articles, add_factors, check_node_properties, add_microbes, add_diseases, add_edges_microbes_diseases
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Match
+from csv_templates import build_csv_templates
+from data_objects import CpGGroup
+from factor_index_manager import FactorIndexManager
+from gremlin_queries import group_cpgs_by_all_selected_factors, group_cpgs_by_any_selected_health_factor, group_cpgs_by_at_least_k_selected_factors, get_factor_index_rows, add_cpgs, count_nodes_in_db, add_articles, add_factors, check_node_properties, add_microbes, add_diseases, add_edges_microbes_diseases, count_edge_statuses, save_cpg_group, refresh_cpg_group, get_cpg_group, count_selected_factor_cpgs, cpg_name_range_end, first_selected_factor_cpg_name, QUERY_PLANS
+from ingest import ingest_csv_in_chunks, remove_upload, save_upload
+from jobs import IngestJob, JobManager, JobQueueFull
 from models import FactorRequest
+from query_cache import QueryResultCache
+from renderers import MEDIA_TYPES, OutputFormat, negotiate_format, next_page_cursor, render_ndjson, render_rows
+from single_flight import SingleFlight
 import asyncio
+import importlib
+import sys
+import time
 import database_connection
-import pandas as pd
-import requests
+import metrics
+import settings
 
 app = FastAPI()
 
@@ -19,38 +34,165 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+result_cache = QueryResultCache(
+    # Entries are (body, next cursor) pairs; size them by the rendered body
+    sizeof=lambda cached_page: sys.getsizeof(cached_page[0]),
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+    ttl=settings.RESULT_CACHE_TTL,
+)
+
+single_flight = SingleFlight()
+
+# Import templates are small and never change while the app runs
+csv_templates = build_csv_templates()
+
+job_manager = JobManager(
+    max_workers=settings.INGEST_JOB_WORKERS,
+    max_queued=settings.INGEST_JOB_MAX_QUEUED,
+    history_size=settings.INGEST_JOB_HISTORY,
+)
 
-def run_gremlin_in_thread(g, microbe_df):
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
 
+def build_factor_index():
+    # Imported here so numpy only loads when the index is enabled
+    from factor_index import FactorIndex
+
+    with database_connection.acquire_gremlin_client() as g:
+        cpg_rows = get_factor_index_rows(g)
+    return FactorIndex.from_cpg_rows(cpg_rows)
+
+
+factor_index_manager = FactorIndexManager(build_factor_index)
+
+
+def collect_gauges():
+    cache = result_cache.stats()
+    pool = database_connection.get_pool_stats()
+    jobs = job_manager.stats()
+    index_status = factor_index_manager.status()
+    flights = single_flight.stats()
+    return [
+        ("result_cache_entries", "Entries in the group result cache.", [({}, cache["entries"])]),
+        ("result_cache_bytes", "Approximate size of the group result cache.", [({}, cache["bytes"])]),
+        ("result_cache_hits", "Group result cache hits since startup.", [({}, cache["hits"])]),
+        ("result_cache_misses", "Group result cache misses since startup.", [({}, cache["misses"])]),
+        ("gremlin_pool_open_connections", "Open pooled Gremlin connections.", [({}, pool["open_connections"])]),
+        ("gremlin_pool_in_flight", "Requests in flight on pooled connections.", [({}, pool.get("in_flight", 0))]),
+        ("ingest_jobs", "Import jobs by state.", [
+            ({"state": "queued"}, jobs["queued"]),
+            ({"state": "running"}, jobs["running"]),
+        ]),
+        ("single_flight_executions", "Query executions started since startup.", [
+            ({"query": query}, count) for query, count in flights["executions_by_query"].items()
+        ]),
+        ("single_flight_coalesced_requests", "Requests that shared an identical in-flight execution.", [
+            ({"query": query}, count) for query, count in flights["coalesced_by_query"].items()
+        ]),
+        ("factor_index_ready", "1 when group queries are served from the factor index.", [
+            ({}, int(settings.FACTOR_INDEX_ENABLED and index_status["ready"])),
+        ]),
+    ]
+
+
+metrics.registry.add_collector(collect_gauges)
+
+
+def route_path(request: Request) -> str:
+    # Label by route template so path parameters don't explode cardinality
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    request_timing = metrics.start_request()
+    status = 500
     try:
-        add_edges_microbes_diseases(g, microbe_df)
+        response = await call_next(request)
+        status = response.status_code
+        # Streamed bodies are still being produced here, so their header
+        # covers the work done before the first chunk
+        response.headers["Server-Timing"] = request_timing.server_timing()
+        return response
     finally:
-        loop.close()
+        metrics.record_request(request_timing, route_path(request), request.method, status)
+
+
+def rebuild_factor_index():
+    if settings.FACTOR_INDEX_ENABLED:
+        factor_index_manager.request_rebuild()
+
+
+warmup_state = {
+    "graph_reachable": False,
+    "node_count": None,
+    "attempts": 0,
+    "last_error": None,
+    "started_at": None,
+    "finished_at": None,
+}
+warmup_task: Optional[asyncio.Task] = None
+health_check_task: Optional[asyncio.Task] = None
+
+
+async def warm_up():
+    warmup_state["started_at"] = time.time()
+    while True:
+        warmup_state["attempts"] += 1
+        try:
+            node_count = await run_gremlin_query(count_nodes_in_db, 'disease')
+            node_properties = await run_gremlin_query(
+                check_node_properties, 'microbe', 'taxon', 'Testing'
+            )
+            break
+        except Exception as e:
+            warmup_state["last_error"] = str(e)
+            print(f"Warm-up query failed, retrying in {settings.WARMUP_RETRY_INTERVAL}s: {e}")
+            await asyncio.sleep(settings.WARMUP_RETRY_INTERVAL)
+
+    print('NODE COUNT:', node_count)
+    print('NODE PROPERTIES:', f"{len(node_properties)} matching vertices")
+    warmup_state.update(graph_reachable=True, node_count=node_count, last_error=None)
+
+    # Group queries use the traversals until the first index build finishes
+    rebuild_factor_index()
+    # Load the import and styled-table dependency before a request needs it
+    await asyncio.to_thread(importlib.import_module, "pandas")
+    warmup_state["finished_at"] = time.time()
+
+
+async def check_connection_health():
+    # Pings block on the network, so they run on a worker thread
+    while True:
+        await asyncio.sleep(settings.GREMLIN_HEALTH_CHECK_INTERVAL)
+        try:
+            await asyncio.to_thread(database_connection.health_check_gremlin_client)
+        except Exception as e:
+            print(f"Gremlin health check failed: {e}")
 
 
 @app.on_event("startup")
 async def app_startup():
-    # Async operations that should be run when the app starts
-    # For Neptune:
-    # g = database_connection.init_gremlin_client()
-    # For local server:
-    g = database_connection.get_gremlin_client()
-    global node_count
-    node_count = await asyncio.to_thread(
-        count_nodes_in_db, g, 'disease'
-    )
-    node_properties = await asyncio.to_thread(
-        check_node_properties, g, 'microbe', 'taxon', 'Testing'
-    )
-    print('NODE COUNT:', node_count)
-    print('NODE PROPERTIES:', node_properties)
+    # Only open the connection pool here; diagnostics and warm-up run in the
+    # background so the server takes traffic right away (see /ready)
+    await asyncio.to_thread(database_connection.init_gremlin_client)
+    global warmup_task, health_check_task
+    warmup_task = asyncio.create_task(warm_up())
+    if settings.GREMLIN_HEALTH_CHECK_INTERVAL > 0:
+        health_check_task = asyncio.create_task(check_connection_health())
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    database_connection.close_gremlin_client()
+    for background_task in (warmup_task, health_check_task):
+        if background_task is not None:
+            background_task.cancel()
+    await asyncio.to_thread(job_manager.shutdown)
+    await asyncio.to_thread(database_connection.close_gremlin_client)
 
 
 @app.get("/")
@@ -58,21 +200,245 @@ async def root():
     return {"message": "API is running"}
 
 
-async def run_gremlin_query(query_func, *args):
-    g = database_connection.get_gremlin_client()
-    result = await asyncio.to_thread(query_func, g, *args)
+@app.get("/ready", response_class=JSONResponse)
+async def ready():
+    # Ready once the graph has answered; the factor index is optional because
+    # group queries fall back to the traversals while it builds
+    is_ready = warmup_state["graph_reachable"]
+    factor_index_status = factor_index_manager.status()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "ready": is_ready,
+            **warmup_state,
+            "factor_index": {
+                "enabled": settings.FACTOR_INDEX_ENABLED,
+                "ready": factor_index_status["ready"],
+                "building": factor_index_status["building"],
+            },
+        },
+    )
+
+
+async def run_gremlin_query(query_func, *args, **kwargs):
+    plan_query = QUERY_PLANS.get(query_func)
+    if plan_query is not None:
+        # Single-traversal reads await the driver's future on the event loop
+        with metrics.track_query(query_func.__name__):
+            async with database_connection.acquire_gremlin_client_async() as g:
+                return await plan_query(g, *args, **kwargs).run_async()
+
+    # Multi-step queries and ingests still run on a worker thread. They all
+    # write through pipelined batches, so they reserve a slot per batch.
+    def run_with_pooled_connection():
+        with metrics.track_query(query_func.__name__), database_connection.acquire_ingest_gremlin_client() as g:
+            return query_func(g, *args, **kwargs)
+
+    result = await asyncio.to_thread(run_with_pooled_connection)
     return result
 
 
-@app.post("/group-cpgs-by-all-selected-factors/", response_class=HTMLResponse)
-async def group_cpgs_endpoint_for_AND_function(factor_request: FactorRequest):
-    try:
-        html_table = await run_gremlin_query(
-            group_cpgs_by_all_selected_factors,
-            factor_request.factors,
-            factor_request.cpg_group_name
+async def run_single_flight(key: tuple, make_call):
+    if not settings.SINGLE_FLIGHT_ENABLED:
+        return await make_call()
+    # The generation keeps requests made after an ingest off an older execution
+    return await single_flight.run(key + (result_cache.generation,), make_call)
+
+
+async def query_group_page(query_func, factor_request: FactorRequest, criteria: dict, **page):
+    # Identical factor sets share one execution, whatever their order
+    key = (
+        query_func.__name__,
+        tuple(sorted(set(factor_request.factors))),
+        tuple(sorted(criteria.items())),
+        tuple(sorted(page.items())),
+    )
+    return await run_single_flight(key, lambda: execute_group_page(query_func, factor_request, criteria, **page))
+
+
+async def execute_group_page(query_func, factor_request: FactorRequest, criteria: dict, **page):
+    factor_index = factor_index_manager.ready_index() if settings.FACTOR_INDEX_ENABLED else None
+    if factor_index is not None:
+        # The index mirrors each traversal with a method of the same name
+        index_query = getattr(factor_index, query_func.__name__)
+
+        def run_index_query():
+            with metrics.track_query(f"factor_index.{query_func.__name__}"):
+                return index_query(factor_request.factors, **criteria, **page)
+
+        return await asyncio.to_thread(run_index_query)
+
+    return await run_gremlin_query(
+        query_func, factor_request.factors, factor_request.cpg_group_name, **criteria, **page
+    )
+
+
+async def run_group_query(query_func, factor_request: FactorRequest, criteria: dict, output_format: str, page: dict):
+    processed_data = await query_group_page(query_func, factor_request, criteria, **page)
+    def render():
+        with metrics.track_render(output_format):
+            return render_rows(output_format, processed_data)
+
+    # Rendering is CPU-bound, so keep it off the event loop
+    body = await asyncio.to_thread(render)
+    return body, next_page_cursor(processed_data, page["limit"])
+
+
+async def run_cached_group_query(
+    mode, query_func, factor_request: FactorRequest, criteria: dict, output_format: str, page: dict
+):
+    if not settings.RESULT_CACHE_ENABLED:
+        return await run_group_query(query_func, factor_request, criteria, output_format, page)
+
+    cache_key = result_cache.make_key(mode, factor_request.factors) + (
+        output_format, page["limit"], page["offset"], page["after"]
+    )
+    cached_page = result_cache.get(cache_key)
+    if cached_page is None:
+        # Read the generation first so a result that races an ingest is dropped
+        generation = result_cache.generation
+        cached_page = await run_group_query(query_func, factor_request, criteria, output_format, page)
+        result_cache.put(cache_key, cached_page, generation)
+    return cached_page
+
+
+async def keyset_group_pages(query_func, factor_request: FactorRequest, criteria: dict, page: dict):
+    # Index pages are in-memory lookups, so walk them by keyset cursor
+    remaining = page["limit"]
+    offset = page["offset"]
+    after = page["after"]
+    while remaining is None or remaining > 0:
+        page_limit = settings.STREAM_PAGE_SIZE if remaining is None else min(settings.STREAM_PAGE_SIZE, remaining)
+        processed_data = await query_group_page(
+            query_func, factor_request, criteria, limit=page_limit, offset=offset, after=after
         )
-        return html_table
+        if processed_data:
+            yield processed_data
+
+        after = next_page_cursor(processed_data, page_limit)
+        if after is None:
+            return
+        offset = 0
+        if remaining is not None:
+            remaining -= page_limit
+
+
+async def name_range_group_pages(query_func, factor_request: FactorRequest, criteria: dict, page: dict):
+    """Yield a group query's rows one CpG name range at a time.
+
+    A count() probe sizes each range to about ``STREAM_PAGE_SIZE`` edges from
+    the selected factors, so every traversal only walks the CpGs inside its
+    range (the AND and at-least-k queries group just those) and neither the
+    first page nor peak memory grows with the number of matches. A range is
+    the names sharing a prefix of the next name; the prefix gets longer when
+    a range is too full and shorter when it is sparse.
+    """
+    factors = factor_request.factors
+    after = page["after"]
+    names_to_skip = page["offset"]
+    names_left = page["limit"]
+    prefix_length = None
+    # The name the next range is cut around, and whether a CpG really has it
+    # (a range end that became the cursor may not)
+    range_start, range_start_is_name = after, False
+    while names_left is None or names_left > 0:
+        if range_start is None:
+            range_start = await run_gremlin_query(first_selected_factor_cpg_name, factors, after)
+            if range_start is None:
+                return
+            range_start_is_name = True
+        if prefix_length is None:
+            prefix_length = max(len(range_start) // 2, 1)
+
+        up_to = cpg_name_range_end(range_start, prefix_length)
+        edge_count = await run_gremlin_query(count_selected_factor_cpgs, factors, after, up_to)
+        if edge_count > settings.STREAM_PAGE_SIZE:
+            if prefix_length < len(range_start):
+                prefix_length += 1
+                continue
+            if not range_start_is_name:
+                # Narrow around the next real name instead of the cursor
+                range_start = None
+                continue
+        if edge_count == 0:
+            if up_to is None:
+                return
+            range_start = None
+            continue
+
+        processed_data = await run_gremlin_query(
+            query_func, factors, factor_request.cpg_group_name, **criteria, after=after, up_to=up_to
+        )
+        processed_data.sort(key=lambda row: row['CpG ID'])
+
+        # Apply the requested offset and limit to distinct CpG names
+        cpg_names = list(dict.fromkeys(row['CpG ID'] for row in processed_data))
+        kept_names = set(cpg_names[names_to_skip:None if names_left is None else names_to_skip + names_left])
+        names_to_skip = max(names_to_skip - len(cpg_names), 0)
+        if names_left is not None:
+            names_left -= len(kept_names)
+        processed_data = [row for row in processed_data if row['CpG ID'] in kept_names]
+        if processed_data:
+            yield processed_data
+
+        if up_to is None:
+            return
+        after = range_start = up_to
+        range_start_is_name = False
+        if edge_count < settings.STREAM_PAGE_SIZE // 4 and prefix_length > 1:
+            prefix_length -= 1
+
+
+async def stream_group_rows(query_func, factor_request: FactorRequest, criteria: dict, page: dict):
+    # Walk the result page by page so memory stays bounded by the page size
+    factor_index = factor_index_manager.ready_index() if settings.FACTOR_INDEX_ENABLED else None
+    if factor_index is not None:
+        pages = keyset_group_pages(query_func, factor_request, criteria, page)
+    else:
+        pages = name_range_group_pages(query_func, factor_request, criteria, page)
+
+    async for processed_data in pages:
+        with metrics.track_render(OutputFormat.NDJSON):
+            body = render_ndjson(processed_data)
+        yield body
+
+
+async def group_cpgs_response(
+    mode,
+    group_mode,
+    query_func,
+    factor_request: FactorRequest,
+    request: Request,
+    requested_format: Optional[str],
+    page: dict,
+    criteria: Optional[dict] = None,
+) -> Response:
+    criteria = criteria or {}
+    try:
+        output_format = negotiate_format(requested_format, request.headers.get("accept"))
+    except ValueError as error:
+        raise HTTPException(status_code=406, detail=str(error))
+
+    try:
+        headers = {}
+        if factor_request.save_group:
+            # Materialize the whole group, whatever page is being returned
+            saved_group = await run_gremlin_query(
+                save_cpg_group, factor_request.cpg_group_name, group_mode, factor_request.factors, criteria.get("k")
+            )
+            headers["X-CpG-Group-Members"] = str(saved_group["members"])
+
+        if output_format == OutputFormat.NDJSON:
+            return StreamingResponse(
+                stream_group_rows(query_func, factor_request, criteria, page),
+                media_type=MEDIA_TYPES[output_format],
+                headers=headers,
+            )
+
+        body, cursor = await run_cached_group_query(mode, query_func, factor_request, criteria, output_format, page)
+        if cursor is not None:
+            headers["X-Next-Cursor"] = quote(cursor)
+        return Response(content=body, media_type=MEDIA_TYPES[output_format], headers=headers)
 
     except Exception as e:
         print(f"An error occurred: {e}")
@@ -81,16 +447,218 @@ async def group_cpgs_endpoint_for_AND_function(factor_request: FactorRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def submit_ingest_job(
+    kind: str,
+    upload_path: str,
+    upload_size: int,
+    ingest_func,
+    item_name: str,
+    count_results: Optional[Callable[[Dict], Dict]] = None,
+) -> IngestJob:
+    # count_results turns each chunk's result into counts that the job sums
+    result_counts = Counter()
+
+    def ingest_chunk(g, chunk):
+        chunk_results = ingest_func(g, chunk)
+        result_counts.update(count_results(chunk_results))
+        return chunk_results
+
+    def run(job: IngestJob):
+        with metrics.track_query(ingest_func.__name__), database_connection.acquire_ingest_gremlin_client() as g:
+            with open(upload_path, "rb") as csv_file:
+                added_count = ingest_csv_in_chunks(
+                    g, csv_file, ingest_chunk if count_results is not None else ingest_func, job=job
+                )
+        return {"detail": f"Successfully processed and added {added_count} {item_name}.", **result_counts}
+
+    def on_finished(job: IngestJob):
+        remove_upload(upload_path)
+        # Even a partially applied ingest changes the graph. Start the index
+        # rebuild first so nothing caches a stale index answer as current.
+        rebuild_factor_index()
+        result_cache.bump_generation()
+
+    return job_manager.submit(kind, run, total_bytes=upload_size, on_finished=on_finished)
+
+
+async def start_ingest_job(
+    kind: str,
+    file: UploadFile,
+    ingest_func,
+    item_name: str,
+    count_results: Optional[Callable[[Dict], Dict]] = None,
+) -> JSONResponse:
+    # The upload is closed once the response is sent, so the job reads a copy
+    upload_path, upload_size = await asyncio.to_thread(save_upload, file.file)
+    try:
+        job = submit_ingest_job(kind, upload_path, upload_size, ingest_func, item_name, count_results)
+    except JobQueueFull:
+        remove_upload(upload_path)
+        raise
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "detail": f"Started importing {item_name}.",
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.job_id}",
+        },
+    )
+
+
+@app.get("/jobs", response_class=JSONResponse)
+async def list_jobs():
+    return {"jobs": job_manager.list_jobs(), **job_manager.stats()}
+
+
+@app.get("/jobs/{job_id}", response_class=JSONResponse)
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@app.post("/jobs/{job_id}/cancel", response_class=JSONResponse)
+async def cancel_job(job_id: str):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/connection-pool/stats", response_class=JSONResponse)
+async def connection_pool_stats():
+    return database_connection.get_pool_stats()
+
+
+@app.get("/cache/stats", response_class=JSONResponse)
+async def cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/single-flight/stats", response_class=JSONResponse)
+async def single_flight_stats():
+    return single_flight.stats()
+
+
+@app.get("/factor-index/stats", response_class=JSONResponse)
+async def factor_index_stats():
+    # Build state plus the per-array memory footprint of the current index
+    return {"enabled": settings.FACTOR_INDEX_ENABLED, **factor_index_manager.status()}
+
+
+@app.post("/factor-index/rebuild", response_class=JSONResponse)
+async def rebuild_factor_index_endpoint():
+    if not settings.FACTOR_INDEX_ENABLED:
+        raise HTTPException(status_code=409, detail="The factor index is disabled")
+    started = factor_index_manager.request_rebuild()
+    return JSONResponse(
+        status_code=202,
+        content={
+            "detail": "Started rebuilding the factor index." if started
+            else "A rebuild is already running; another one will follow it.",
+            "status_url": "/factor-index/stats",
+        },
+    )
+
+
+@app.post("/group-cpgs-by-all-selected-factors/", response_class=HTMLResponse)
+async def group_cpgs_endpoint_for_AND_function(
+    factor_request: FactorRequest,
+    request: Request,
+    output_format: Optional[str] = Query(None, alias="format"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    after: Optional[str] = None,
+):
+    # Styled HTML by default; ?format= or the Accept header selects html, json,
+    # csv or streamed ndjson. limit/offset or the after cursor (the previous
+    # page's X-Next-Cursor) page through distinct CpG names.
+    page = {"limit": limit, "offset": offset, "after": after}
+    return await group_cpgs_response(
+        "AND", CpGGroup.Mode.ALL, group_cpgs_by_all_selected_factors, factor_request, request, output_format, page
+    )
+
+
 @app.post("/group-cpgs-by-any-selected-factors/", response_class=HTMLResponse)
-async def group_cpgs_endpoint_for_OR_function(factor_request: FactorRequest):
+async def group_cpgs_endpoint_for_OR_function(
+    factor_request: FactorRequest,
+    request: Request,
+    output_format: Optional[str] = Query(None, alias="format"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    after: Optional[str] = None,
+):
+    # Styled HTML by default; ?format= or the Accept header selects html, json,
+    # csv or streamed ndjson. limit/offset or the after cursor (the previous
+    # page's X-Next-Cursor) page through distinct CpG names.
+    page = {"limit": limit, "offset": offset, "after": after}
+    return await group_cpgs_response(
+        "OR", CpGGroup.Mode.ANY, group_cpgs_by_any_selected_health_factor, factor_request, request, output_format, page
+    )
+
+
+@app.post("/group-cpgs-by-at-least-k-selected-factors/", response_class=HTMLResponse)
+async def group_cpgs_endpoint_for_AT_LEAST_K_function(
+    factor_request: FactorRequest,
+    request: Request,
+    k: int = Query(..., ge=1),
+    output_format: Optional[str] = Query(None, alias="format"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    after: Optional[str] = None,
+):
+    # CpGs associated with at least k of the selected factors; formats and
+    # paging work like the AND and OR endpoints.
+    page = {"limit": limit, "offset": offset, "after": after}
+    return await group_cpgs_response(
+        f"AT_LEAST_{k}", CpGGroup.Mode.AT_LEAST_K, group_cpgs_by_at_least_k_selected_factors,
+        factor_request, request, output_format, page, criteria={"k": k},
+    )
+
+
+@app.get("/cpg-groups/{name}", response_class=HTMLResponse)
+async def get_saved_cpg_group(
+    name: str,
+    request: Request,
+    output_format: Optional[str] = Query(None, alias="format"),
+):
+    # A group saved with save_group, read in one hop from its vertex. Formats
+    # work like the group endpoints; X-CpG-Group-Stale says whether an ingest
+    # has touched its factors since it was last computed.
     try:
-        html_table = await run_gremlin_query(
-            group_cpgs_by_any_selected_health_factor,
-            factor_request.factors,
-            factor_request.cpg_group_name
-        )
-        return html_table
+        output_format = negotiate_format(output_format, request.headers.get("accept"))
+    except ValueError as error:
+        raise HTTPException(status_code=406, detail=str(error))
 
+    try:
+        group = await run_single_flight(
+            (get_cpg_group.__name__, name), lambda: run_gremlin_query(get_cpg_group, name)
+        )
+        if group is None:
+            raise HTTPException(status_code=404, detail=f"No saved CpG group named {name!r}")
+
+        def render():
+            with metrics.track_render(output_format):
+                return render_rows(output_format, group["rows"])
+
+        body = await asyncio.to_thread(render)
+        headers = {
+            "X-CpG-Group-Mode": group["mode"] if group["k"] is None else f"{group['mode']}:{group['k']}",
+            "X-CpG-Group-Factors": quote(",".join(group["factors"])),
+            "X-CpG-Group-Stale": "true" if group["stale"] else "false",
+        }
+        return Response(content=body, media_type=MEDIA_TYPES[output_format], headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -98,23 +666,33 @@ async def group_cpgs_endpoint_for_OR_function(factor_request: FactorRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/cpg-groups/{name}/refresh", response_class=JSONResponse)
+async def refresh_saved_cpg_group(name: str):
+    # Recompute from the stored factors and mode, adding and dropping only
+    # the member edges that changed
+    try:
+        refreshed_group = await run_gremlin_query(refresh_cpg_group, name)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"detail": str(e)})
+    if refreshed_group is None:
+        return JSONResponse(status_code=404, content={"detail": f"No saved CpG group named {name!r}"})
+    return refreshed_group
+
+
 @app.post("/add-cpgs/", response_class=JSONResponse)
 async def add_cpgs_from_csv(file: UploadFile = File(...)):
     try:
-        g = database_connection.get_gremlin_client()
-
         if not file.filename.endswith('.csv'):
             return JSONResponse(status_code=400, content={"message": "Invalid file format"})
 
-        # Convert the uploaded file to a DataFrame
-        cpg_df = pd.read_csv(file.file)
-
-        # Pass the DataFrame to the add_cpgs function
-        cpg_id_dict = await asyncio.to_thread(add_cpgs, g, cpg_df)
-
-        # Return some indication of success
-        return JSONResponse(content={"detail": f"Successfully processed and added {len(cpg_id_dict)} CpGs."})
+        # Import the uploaded file in the background and return the job ID
+        return await start_ingest_job("cpgs", file, add_cpgs, "CpGs")
 
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -122,29 +700,34 @@ async def add_cpgs_from_csv(file: UploadFile = File(...)):
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
 
+def template_response(kind: str, request: Request) -> Response:
+    template = csv_templates[kind]
+    headers = {
+        "ETag": template.etag,
+        "Cache-Control": f"public, max-age={settings.TEMPLATE_MAX_AGE}",
+    }
+    if template.matches(request.headers.get("if-none-match", "")):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{template.filename}"'
+    return Response(content=template.body, media_type="text/csv", headers=headers)
+
+
 @app.get("/download-cpgs-template/")
-async def download_template_for_cpgs():
-    file_path = "/Users/nicoletrieu/Documents/zymo/cpg-fastapi-backend/app/data/cpgs-template.csv"
-    return FileResponse(path=file_path, filename="cpgs-template.csv", media_type='text/csv')
+async def download_template_for_cpgs(request: Request):
+    return template_response("cpgs", request)
 
 
 @app.post("/add-articles/", response_class=JSONResponse)
 async def add_articles_from_csv(file: UploadFile = File(...)):
     try:
-        g = database_connection.get_gremlin_client()
-
         if not file.filename.endswith('.csv'):
             return JSONResponse(status_code=400, content={"message": "Invalid file format"})
 
-        # Convert the uploaded file to a DataFrame
-        article_df = pd.read_csv(file.file)
-
-        # Pass the DataFrame to the add_articles function
-        article_id_dict = await asyncio.to_thread(add_articles, g, article_df)
-
-        # Return some indication of success
-        return JSONResponse(content={"detail": f"Successfully processed and added {len(article_id_dict)} articles."})
+        # Import the uploaded file in the background and return the job ID
+        return await start_ingest_job("articles", file, add_articles, "articles")
 
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -153,28 +736,21 @@ async def add_articles_from_csv(file: UploadFile = File(...)):
 
 
 @app.get("/download-articles-template/")
-async def download_template_for_articles():
-    file_path = "/Users/nicoletrieu/Documents/zymo/cpg-fastapi-backend/app/data/articles-template.csv"
-    return FileResponse(path=file_path, filename="articles-template.csv", media_type='text/csv')
+async def download_template_for_articles(request: Request):
+    return template_response("articles", request)
 
 
 @app.post("/add-factors/", response_class=JSONResponse)
 async def add_factors_from_csv(file: UploadFile = File(...)):
     try:
-        g = database_connection.get_gremlin_client()
-
         if not file.filename.endswith('.csv'):
             return JSONResponse(status_code=400, content={"message": "Invalid file format"})
 
-        # Convert the uploaded file to a DataFrame
-        factor_df = pd.read_csv(file.file)
-
-        # Pass the DataFrame to the add_factors function
-        factor_id_dict = await asyncio.to_thread(add_factors, g, factor_df)
-
-        # Return some indication of success
-        return JSONResponse(content={"detail": f"Successfully processed and added {len(factor_id_dict)} factors."})
+        # Import the uploaded file in the background and return the job ID
+        return await start_ingest_job("factors", file, add_factors, "factors")
 
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -183,35 +759,29 @@ async def add_factors_from_csv(file: UploadFile = File(...)):
 
 
 @app.get("/download-factors-template/")
-async def download_template_for_factors():
-    file_path = "/Users/nicoletrieu/Documents/zymo/cpg-fastapi-backend/app/data/factors-template.csv"
-    return FileResponse(path=file_path, filename="factors-template.csv", media_type='text/csv')
+async def download_template_for_factors(request: Request):
+    return template_response("factors", request)
 
 
 @app.get("/count-nodes/{label}")
 async def count_nodes(label: str):
-    g = await database_connection.get_gremlin_client_async()  # assuming this is an async function
-    node_count = await count_nodes_in_db(g, label)  # modify check_cpgs_in_db to be async as well
+    node_count = await run_single_flight(
+        (count_nodes_in_db.__name__, label), lambda: run_gremlin_query(count_nodes_in_db, label)
+    )
     return node_count
 
 
 @app.post("/add-microbes/", response_class=JSONResponse)
 async def add_microbes_from_csv(file: UploadFile = File(...)):
     try:
-        g = database_connection.get_gremlin_client()
-
         if not file.filename.endswith('.csv'):
             return JSONResponse(status_code=400, content={"message": "Invalid file format"})
 
-        # Convert the uploaded file to a DataFrame
-        microbe_df = pd.read_csv(file.file)
-
-        # Pass the DataFrame to the add_microbes function
-        microbe_id_dict = await asyncio.to_thread(add_microbes, g, microbe_df)
-
-        # Return some indication of success
-        return JSONResponse(content={"detail": f"Successfully processed and added {len(microbe_id_dict)} microbes."})
+        # Import the uploaded file in the background and return the job ID
+        return await start_ingest_job("microbes", file, add_microbes, "microbes")
 
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -220,41 +790,21 @@ async def add_microbes_from_csv(file: UploadFile = File(...)):
 
 
 @app.get("/download-microbes-template/")
-async def download_template_for_microbes():
-    s3_url = "https://ds-references.s3.ap-southeast-1.amazonaws.com/bio-annotation/microbes-template.csv"
-
-    try:
-        response = requests.get(s3_url, stream=True)
-        response.raise_for_status()  # Will raise an HTTPError if the HTTP request returned an unsuccessful status code
-
-        def iterfile():
-            for chunk in response.iter_content(chunk_size=8192):
-                yield chunk
-
-        return StreamingResponse(iterfile(), media_type='text/csv', headers={"Content-Disposition": "attachment;filename=microbes-template.csv"})
-    except requests.exceptions.HTTPError as http_error:
-        raise HTTPException(status_code=response.status_code, detail=str(http_error))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+async def download_template_for_microbes(request: Request):
+    return template_response("microbes", request)
 
 
 @app.post("/add-diseases/", response_class=JSONResponse)
 async def add_diseases_from_csv(file: UploadFile = File(...)):
     try:
-        g = database_connection.get_gremlin_client()
-
         if not file.filename.endswith('.csv'):
             return JSONResponse(status_code=400, content={"message": "Invalid file format"})
 
-        # Convert the uploaded file to a DataFrame
-        disease_df = pd.read_csv(file.file)
-
-        # Pass the DataFrame to the add_diseases function
-        disease_id_dict = await asyncio.to_thread(add_diseases, g, disease_df)
-
-        # Return some indication of success
-        return JSONResponse(content={"detail": f"Successfully processed and added {len(disease_id_dict)} diseases."})
+        # Import the uploaded file in the background and return the job ID
+        return await start_ingest_job("diseases", file, add_diseases, "diseases")
 
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -262,23 +812,26 @@ async def add_diseases_from_csv(file: UploadFile = File(...)):
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
 
-@app.post("/connect-microbes-to-diseases/")
-async def connect_microbes_to_diseases():
-    try:
-        # Define the file path
-        file_path = '/Users/nicoletrieu/Documents/zymo/cpg-fastapi-backend/app/data/microbes.csv'
-
-        # Read the content of the uploaded CSV file into a pandas DataFrame
-        microbe_df = pd.read_csv(file_path)
+@app.get("/download-diseases-template/")
+async def download_template_for_diseases(request: Request):
+    return template_response("diseases", request)
 
-        # Creating a Gremlin traversal source (g) - Replace with your actual connection code
-        g = database_connection.get_gremlin_client()
 
-        # Call your function to add edges
-        await asyncio.to_thread(run_gremlin_in_thread, g, microbe_df)
+@app.post("/connect-microbes-to-diseases/", response_class=JSONResponse)
+async def connect_microbes_to_diseases(file: UploadFile = File(...)):
+    try:
+        if not file.filename.endswith('.csv'):
+            return JSONResponse(status_code=400, content={"message": "Invalid file format"})
 
-        return {"message": "Successfully added edges between microbes and diseases"}
+        # Link the uploaded (Taxon, DOID) pairs in the background and return the
+        # job ID; the finished job reports created, existing and unresolved edges
+        return await start_ingest_job(
+            "microbe-disease edges", file, add_edges_microbes_diseases, "microbe-disease pairs",
+            count_results=count_edge_statuses,
+        )
 
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
     except Exception as e:
         print(f"An error occurred: {e}")
         import traceback
@@ -0,0 +1,273 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; spans sub-millisecond index lookups to slow full-graph traversals
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        lines.extend(
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values
+        )
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        position = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self._buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# A collector returns (name, documentation, [(labels, value), ...]) gauges at scrape time
+GaugeCollector = Callable[[], Iterable[Tuple[str, str, Iterable[Tuple[Dict[str, str], float]]]]]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+        self._collectors: List[GaugeCollector] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        counter = Counter(name, documentation, label_names)
+        self._metrics.append(counter)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(histogram)
+        return histogram
+
+    def add_collector(self, collector: GaugeCollector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Time to produce the response head.", ("endpoint", "method", "status")
+)
+query_seconds = registry.histogram(
+    "query_duration_seconds", "Time in a query function, including Python post-processing.", ("query",)
+)
+query_errors = registry.counter("query_errors_total", "Query functions that raised.", ("query",))
+gremlin_round_trip_seconds = registry.histogram(
+    "gremlin_round_trip_duration_seconds", "Time per traversal terminal step sent to Gremlin.", ("query",)
+)
+gremlin_round_trip_errors = registry.counter(
+    "gremlin_round_trip_errors_total", "Traversal terminal steps that failed.", ("query",)
+)
+gremlin_round_trips_per_request = registry.histogram(
+    "gremlin_round_trips_per_request", "Gremlin round trips made while serving one request.",
+    ("endpoint",), buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250),
+)
+render_seconds = registry.histogram("render_duration_seconds", "Time to render a result body.", ("format",))
+bulk_batch_seconds = registry.histogram("bulk_batch_duration_seconds", "Round trip per BulkQueryExecutor flush.")
+bulk_batch_mutations = registry.histogram(
+    "bulk_batch_mutations", "Mutations per BulkQueryExecutor flush.", buckets=COUNT_BUCKETS
+)
+bulk_batch_bytes = registry.histogram(
+    "bulk_batch_bytes", "Estimated payload per BulkQueryExecutor flush.", buckets=BYTES_BUCKETS
+)
+bulk_batch_errors = registry.counter("bulk_batch_errors_total", "BulkQueryExecutor flushes that failed.")
+
+
+class RequestTiming:
+    """Graph, processing and render time spent on behalf of one request.
+
+    Shared with the worker threads a request hands work to, so updates lock.
+    """
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.gremlin_seconds = 0.0
+        self.query_seconds = 0.0
+        self.render_seconds = 0.0
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def add(self, gremlin_seconds: float = 0.0, query_seconds: float = 0.0, render_seconds: float = 0.0, round_trips: int = 0):
+        with self._lock:
+            self.gremlin_seconds += gremlin_seconds
+            self.query_seconds += query_seconds
+            self.render_seconds += render_seconds
+            self.round_trips += round_trips
+
+    def server_timing(self) -> str:
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        with self._lock:
+            gremlin_ms = self.gremlin_seconds * 1000
+            # Query time not spent waiting on Gremlin is Python post-processing
+            process_ms = max(self.query_seconds * 1000 - gremlin_ms, 0.0)
+            render_ms = self.render_seconds * 1000
+            round_trips = self.round_trips
+        return ", ".join([
+            f'gremlin;dur={gremlin_ms:.2f};desc="round trips: {round_trips}"',
+            f"process;dur={process_ms:.2f}",
+            f"render;dur={render_ms:.2f}",
+            f"total;dur={total_ms:.2f}",
+        ])
+
+
+_request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+_query_name: ContextVar[str] = ContextVar("query_name", default="unknown")
+
+
+def start_request() -> RequestTiming:
+    request_timing = RequestTiming()
+    _request_timing.set(request_timing)
+    return request_timing
+
+
+def record_request(request_timing: RequestTiming, endpoint: str, method: str, status: int):
+    http_request_seconds.observe(
+        time.perf_counter() - request_timing.started_at, endpoint=endpoint, method=method, status=status
+    )
+    gremlin_round_trips_per_request.observe(request_timing.round_trips, endpoint=endpoint)
+
+
+@contextmanager
+def track_query(query: str):
+    """Time a query function and label the Gremlin round trips it makes."""
+    token = _query_name.set(query)
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        query_errors.inc(query=query)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started_at
+        _query_name.reset(token)
+        query_seconds.observe(elapsed, query=query)
+        request_timing = _request_timing.get()
+        if request_timing is not None:
+            request_timing.add(query_seconds=elapsed)
+
+
+@contextmanager
+def track_render(output_format: str):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        render_seconds.observe(elapsed, format=output_format)
+        request_timing = _request_timing.get()
+        if request_timing is not None:
+            request_timing.add(render_seconds=elapsed)
+
+
+def record_round_trip(seconds: float, error: Optional[BaseException]):
+    query = _query_name.get()
+    gremlin_round_trip_seconds.observe(seconds, query=query)
+    if error is not None:
+        gremlin_round_trip_errors.inc(query=query)
+    request_timing = _request_timing.get()
+    if request_timing is not None:
+        request_timing.add(gremlin_seconds=seconds, round_trips=1)
+
+
+def record_bulk_batch(mutation_count: int, batch_bytes: int, seconds: float, error: Optional[BaseException]):
+    bulk_batch_seconds.observe(seconds)
+    bulk_batch_mutations.observe(mutation_count)
+    bulk_batch_bytes.observe(batch_bytes)
+    if error is not None:
+        bulk_batch_errors.inc()
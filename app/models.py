@@ -5,3 +5,5 @@ from typing import List
 class FactorRequest(BaseModel):
     factors: List[str]
     cpg_group_name: str
+    # Save the full result as a named cpg_group vertex for one-hop lookups
+    save_group: bool = False
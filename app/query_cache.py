@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class CacheEntry:
+    def __init__(self, value: Any, size: int, generation: int, expires_at: float) -> None:
+        self.value = value
+        self.size = size
+        self.generation = generation
+        self.expires_at = expires_at
+
+
+class QueryResultCache:
+    """LRU cache for rendered query results, bounded by entry count and size.
+
+    Entries expire after ``ttl`` seconds and are invalidated wholesale when the
+    graph generation is bumped, which every ingest does after writing.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 600.0,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._oversized = 0
+
+    @staticmethod
+    def make_key(mode: str, factors: Iterable[str]) -> Tuple:
+        return (mode, tuple(sorted(set(factors))))
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._current_bytes -= entry.size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.generation != self._generation:
+                self._remove(key)
+                self._invalidations += 1
+                self._misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Store ``value`` under ``key``.
+
+        ``generation`` should be the generation read before the result was
+        computed, so a result that raced with an ingest is never served.
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            if generation is None:
+                generation = self._generation
+            if generation != self._generation:
+                return
+            if size > self._max_bytes:
+                self._oversized += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(value, size, generation, time.monotonic() + self._ttl)
+            self._current_bytes += size
+            while self._entries and (
+                len(self._entries) > self._max_entries or self._current_bytes > self._max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def bump_generation(self) -> int:
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "generation": self._generation,
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "bytes": self._current_bytes,
+                "max_bytes": self._max_bytes,
+                "ttl": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "oversized": self._oversized,
+            }
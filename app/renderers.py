@@ -0,0 +1,182 @@
+import csv
+import html
+import io
+import json
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional
+
+TABLE_COLUMNS = ['CpG ID', 'Association', 'Occurrences', 'Direction', 'Beta Baseline', 'M-Value Baseline']
+
+
+class OutputFormat:
+    STYLED_HTML = "styled"
+    HTML = "html"
+    JSON = "json"
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+MEDIA_TYPES = {
+    OutputFormat.STYLED_HTML: "text/html",
+    OutputFormat.HTML: "text/html",
+    OutputFormat.JSON: "application/json",
+    OutputFormat.CSV: "text/csv",
+    OutputFormat.NDJSON: "application/x-ndjson",
+}
+
+# Accept header media types that select a format; text/html and */* keep the default
+ACCEPT_FORMATS = {
+    "application/json": OutputFormat.JSON,
+    "text/csv": OutputFormat.CSV,
+    "application/x-ndjson": OutputFormat.NDJSON,
+    "application/ndjson": OutputFormat.NDJSON,
+}
+
+DEFAULT_FORMAT = OutputFormat.STYLED_HTML
+
+_row_values = itemgetter(*TABLE_COLUMNS)
+_HTML_ROW_TEMPLATE = "<tr><th>{}</th>" + "<td>{}</td>" * len(TABLE_COLUMNS) + "</tr>"
+
+_LIGHT_TABLE_STYLE = (
+    "<style>"
+    "table.cpg-table{border-collapse:collapse}"
+    "table.cpg-table thead{background-color:lightgrey}"
+    "table.cpg-table th{font-size:12pt;text-align:center;padding:4px}"
+    "table.cpg-table td{text-align:center;border:1px solid white;padding:4px}"
+    "table.cpg-table tr:nth-of-type(even){background-color:#f2f2f2}"
+    "table.cpg-table tr:hover{background-color:#5cfcff}"
+    "</style>"
+)
+
+
+def negotiate_format(requested_format: Optional[str], accept: Optional[str]) -> str:
+    """Pick an output format from an explicit request or the Accept header.
+
+    Raises ValueError for an unknown explicit format.
+    """
+    if requested_format:
+        requested_format = requested_format.lower()
+        if requested_format not in RENDERERS:
+            raise ValueError(
+                f"Unsupported format '{requested_format}'; choose one of {sorted(RENDERERS)}"
+            )
+        return requested_format
+
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return DEFAULT_FORMAT
+
+
+def _html_cell(value) -> str:
+    if value is None:
+        return ""
+    return html.escape(value) if isinstance(value, str) else str(value)
+
+
+def render_json(processed_data: List[Dict]) -> str:
+    # Rows from process_cpgs already hold exactly TABLE_COLUMNS, in order
+    return json.dumps(processed_data)
+
+
+def render_ndjson(processed_data: List[Dict]) -> str:
+    return "".join(json.dumps(row) + "\n" for row in processed_data)
+
+
+def render_csv(processed_data: List[Dict]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TABLE_COLUMNS)
+    writer.writerows(map(_row_values, processed_data))
+    return buffer.getvalue()
+
+
+def _html_rows(processed_data: Iterable[Dict], start_index: int = 1) -> List[str]:
+    return [
+        _HTML_ROW_TEMPLATE.format(index, *map(_html_cell, values))
+        for index, values in enumerate(map(_row_values, processed_data), start=start_index)
+    ]
+
+
+def render_html(processed_data: List[Dict]) -> str:
+    """Render a plain HTML table that looks like the styled one, without pandas."""
+    header = "".join(f"<th>{html.escape(column)}</th>" for column in TABLE_COLUMNS)
+    return "".join([
+        _LIGHT_TABLE_STYLE,
+        '<table class="cpg-table"><thead><tr><th></th>',
+        header,
+        "</tr></thead><tbody>",
+        *_html_rows(processed_data),
+        "</tbody></table>",
+    ])
+
+
+def create_table(processed_data: list):
+    # pandas is slow to import and only the styled table needs it
+    import pandas as pd
+
+    # Create a DataFrame with the processed data
+    df = pd.DataFrame(processed_data) if processed_data else pd.DataFrame(columns=TABLE_COLUMNS)
+
+    # Adjust the index to start from 1 instead of 0
+    df.index = df.index + 1
+
+    # Specify the desired column order
+    column_order = TABLE_COLUMNS
+
+    # Try to reorder the DataFrame columns, catch any KeyError
+    try:
+        df = df[column_order]
+    except KeyError as error:
+        missing_columns = [col for col in column_order if col not in df.columns]
+        print(f"Missing columns: {missing_columns}")
+        raise error
+
+    # Style the DataFrame
+    styled_df = df.style.set_table_styles(
+        [
+            {'selector': 'thead', 'props': [('background-color', 'lightgrey')]},
+            {'selector': 'th', 'props': [('font-size', '12pt'), ('text-align', 'center')]},
+            {'selector': 'td', 'props': [('text-align', 'center')]},
+            {'selector': 'tr:nth-of-type(even)', 'props': [('background-color', '#f2f2f2')]},
+            {'selector': 'tr:hover', 'props': [('background-color', '#5cfcff')]}
+        ]
+    ).set_properties(**{
+        'border': '1px solid white',
+        'border-collapse': 'collapse',
+        'padding': '4px'
+    })
+
+    # Convert the styled DataFrame to HTML
+    html_table = styled_df.to_html()
+
+    # Return the HTML table string
+    return html_table
+
+
+RENDERERS = {
+    OutputFormat.STYLED_HTML: create_table,
+    OutputFormat.HTML: render_html,
+    OutputFormat.JSON: render_json,
+    OutputFormat.CSV: render_csv,
+    OutputFormat.NDJSON: render_ndjson,
+}
+
+
+def render_rows(output_format: str, processed_data: List[Dict]) -> str:
+    return RENDERERS[output_format](processed_data)
+
+
+def next_page_cursor(processed_data: List[Dict], limit: Optional[int]) -> Optional[str]:
+    """Return the last CpG name of a full page, or None when nothing follows.
+
+    Pages are cut by distinct CpG name, so a page may hold more rows than
+    ``limit`` when several CpG vertices share a name.
+    """
+    if limit is None or not processed_data:
+        return None
+    cpg_names = dict.fromkeys(row['CpG ID'] for row in processed_data)
+    if len(cpg_names) < limit:
+        return None
+    return next(reversed(cpg_names))
@@ -0,0 +1,64 @@
+# Runtime configuration, read once from the environment
+import os
+
+
+# Gremlin connection pool. At most GREMLIN_POOL_SIZE * GREMLIN_MAX_IN_FLIGHT
+# requests reach the server at once, each holding a driver websocket and
+# driver worker thread until its response is read; further async requests
+# wait on the event loop, for up to GREMLIN_ACQUIRE_TIMEOUT seconds.
+GREMLIN_URL = os.environ.get("GREMLIN_URL", "ws://localhost:8182/gremlin")
+GREMLIN_POOL_SIZE = int(os.environ.get("GREMLIN_POOL_SIZE", "4"))
+GREMLIN_MAX_IN_FLIGHT = int(os.environ.get("GREMLIN_MAX_IN_FLIGHT", "8"))
+GREMLIN_IDLE_TIMEOUT = float(os.environ.get("GREMLIN_IDLE_TIMEOUT", "300"))
+GREMLIN_ACQUIRE_TIMEOUT = float(os.environ.get("GREMLIN_ACQUIRE_TIMEOUT", "30"))
+# Seconds between pings of idle pooled connections (0 disables them)
+GREMLIN_HEALTH_CHECK_INTERVAL = float(os.environ.get("GREMLIN_HEALTH_CHECK_INTERVAL", "60"))
+
+# Wire format (graphbinary, graphson3 or graphson2), websocket
+# permessage-deflate, and the largest response frame accepted
+GREMLIN_SERIALIZER = os.environ.get("GREMLIN_SERIALIZER", "graphbinary").lower()
+GREMLIN_COMPRESSION = os.environ.get("GREMLIN_COMPRESSION", "false").lower() == "true"
+GREMLIN_MAX_MESSAGE_BYTES = int(os.environ.get("GREMLIN_MAX_MESSAGE_BYTES", str(10 * 1024 * 1024)))
+
+# Result cache for the factor-group endpoints
+RESULT_CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "256"))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.environ.get("RESULT_CACHE_TTL", "600"))
+
+# Let identical concurrent group/count queries share one execution
+SINGLE_FLIGHT_ENABLED = os.environ.get("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Chunked CSV ingestion
+INGEST_CHUNK_SIZE = int(os.environ.get("INGEST_CHUNK_SIZE", "10000"))
+INGEST_PREFETCH_CHUNKS = int(os.environ.get("INGEST_PREFETCH_CHUNKS", "1"))
+
+# Number of bulk write batches kept in flight per import (0 writes
+# synchronously); capped at GREMLIN_MAX_IN_FLIGHT and reserved on the
+# import's pooled connection for its whole run
+INGEST_MAX_IN_FLIGHT = int(os.environ.get("INGEST_MAX_IN_FLIGHT", "4"))
+
+# Adaptive bulk write batch sizing
+INGEST_ADAPTIVE_BATCHING = os.environ.get("INGEST_ADAPTIVE_BATCHING", "true").lower() == "true"
+INGEST_TARGET_BATCH_BYTES = int(os.environ.get("INGEST_TARGET_BATCH_BYTES", str(256 * 1024)))
+INGEST_TARGET_BATCH_LATENCY = float(os.environ.get("INGEST_TARGET_BATCH_LATENCY", "0.5"))
+INGEST_MIN_BATCH_SIZE = int(os.environ.get("INGEST_MIN_BATCH_SIZE", "10"))
+INGEST_MAX_BATCH_SIZE = int(os.environ.get("INGEST_MAX_BATCH_SIZE", "1000"))
+
+# Background import jobs
+INGEST_JOB_WORKERS = int(os.environ.get("INGEST_JOB_WORKERS", "2"))
+INGEST_JOB_MAX_QUEUED = int(os.environ.get("INGEST_JOB_MAX_QUEUED", "8"))
+INGEST_JOB_HISTORY = int(os.environ.get("INGEST_JOB_HISTORY", "100"))
+
+# Distinct CpG names per keyset page when streaming NDJSON from the factor
+# index; against Gremlin, the factor-CpG edges each streamed name range holds
+STREAM_PAGE_SIZE = int(os.environ.get("STREAM_PAGE_SIZE", "1000"))
+
+# In-memory factor -> CpG index answering the group endpoints without Gremlin
+FACTOR_INDEX_ENABLED = os.environ.get("FACTOR_INDEX_ENABLED", "false").lower() == "true"
+
+# Seconds between background warm-up attempts while the graph is unreachable
+WARMUP_RETRY_INTERVAL = float(os.environ.get("WARMUP_RETRY_INTERVAL", "5"))
+
+# Seconds clients may reuse a downloaded import template before revalidating
+TEMPLATE_MAX_AGE = int(os.environ.get("TEMPLATE_MAX_AGE", "3600"))
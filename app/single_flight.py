@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Share one execution between identical concurrent calls.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it runs await that task instead of starting another. Each
+    caller awaits through ``asyncio.shield``, so one client disconnecting does
+    not cancel the work the others are waiting on. Nothing is kept once the
+    task finishes, so this never serves a result after the fact.
+
+    Keys are tuples whose first item names the query, for the stats.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._executions: Dict[str, int] = {}
+        self._coalesced: Dict[str, int] = {}
+
+    async def run(self, key: Tuple, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        query = str(key[0])
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._executions[query] = self._executions.get(query, 0) + 1
+        else:
+            self._coalesced[query] = self._coalesced.get(query, 0) + 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Tuple, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark a failure as seen even if every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        executions = sum(self._executions.values())
+        coalesced = sum(self._coalesced.values())
+        requests = executions + coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executions": executions,
+            "coalesced": coalesced,
+            "coalesced_ratio": coalesced / requests if requests else 0.0,
+            "executions_by_query": dict(self._executions),
+            "coalesced_by_query": dict(self._coalesced),
+        }
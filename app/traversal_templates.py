@@ -0,0 +1,142 @@
+from typing import Callable, Dict, List, Sequence
+
+from gremlin_python.process.graph_traversal import GraphTraversal, GraphTraversalSource, __
+from gremlin_python.process.traversal import Binding, Bindings, Bytecode, P
+from gremlin_python.structure.graph import Graph
+
+from data_objects import CpG, Factor
+
+
+def _has_binding(value) -> bool:
+    if isinstance(value, Binding):
+        return True
+    if isinstance(value, P):
+        return _has_binding(value.value) or _has_binding(value.other)
+    if isinstance(value, Bytecode):
+        return any(_has_binding(instruction) for instruction in value.step_instructions)
+    if isinstance(value, (list, tuple)):
+        return any(_has_binding(item) for item in value)
+    return False
+
+
+def _literal(value, values: Dict):
+    return values[value.key] if isinstance(value, Binding) else value
+
+
+class TraversalTemplate:
+    """A read traversal built once, with Bindings for the values that vary.
+
+    ``build`` gets a source and one Binding per parameter and returns the
+    traversal; its bytecode is kept. ``bind`` copies the instruction list and
+    rebuilds only the instructions that hold bindings, so a call costs a list
+    copy plus the substituted values instead of re-running every step method.
+
+    Servers resolve bindings in step arguments but not inside predicates, so
+    bindings in a ``P`` are inlined as literals when the template is bound.
+    """
+
+    def __init__(self, name: str, parameters: Sequence[str], build: Callable[..., GraphTraversal]) -> None:
+        self.name = name
+        self.parameters = tuple(parameters)
+        placeholders = {parameter: Bindings.of(parameter, None) for parameter in self.parameters}
+        self.bytecode = build(Graph().traversal(), **placeholders).bytecode
+        self._bound_positions = [
+            index for index, instruction in enumerate(self.bytecode.step_instructions)
+            if _has_binding(instruction)
+        ]
+
+    def _rebind(self, value, values: Dict):
+        if isinstance(value, Binding):
+            return Binding(value.key, values[value.key])
+        if isinstance(value, P):
+            predicate_value = value.value
+            if isinstance(predicate_value, list) and len(predicate_value) == 1 and isinstance(predicate_value[0], Binding):
+                # P.within(binding) wraps its one argument in a list
+                predicate_value = predicate_value[0]
+            return P(value.operator, _literal(predicate_value, values), _literal(value.other, values))
+        if isinstance(value, Bytecode):
+            bytecode = Bytecode(value)
+            bytecode.step_instructions = [self._rebind(instruction, values) for instruction in value.step_instructions]
+            return bytecode
+        if isinstance(value, list):
+            return [self._rebind(item, values) for item in value]
+        return value
+
+    def bind(self, g: GraphTraversalSource, **values) -> GraphTraversal:
+        """A fresh traversal on ``g`` with ``values`` bound; more steps may be appended."""
+        missing = [parameter for parameter in self.parameters if parameter not in values]
+        if missing:
+            raise TypeError(f"Template {self.name} is missing values for {missing}")
+
+        bytecode = Bytecode(g.bytecode)
+        step_instructions: List = list(self.bytecode.step_instructions)
+        for index in self._bound_positions:
+            step_instructions[index] = self._rebind(step_instructions[index], values)
+        bytecode.step_instructions = step_instructions
+        bytecode.bindings = {
+            parameter: values[parameter] for parameter in self.parameters if parameter in self.bytecode.bindings
+        }
+        return GraphTraversal(g.graph, g.traversal_strategies, bytecode)
+
+
+TEMPLATES: Dict[str, TraversalTemplate] = {}
+
+
+def register(name: str, parameters: Sequence[str], build: Callable[..., GraphTraversal]) -> TraversalTemplate:
+    template = TEMPLATES[name] = TraversalTemplate(name, parameters, build)
+    return template
+
+
+# CpGs attached to any of the given factors, optionally past a keyset cursor
+FACTOR_CPGS = register(
+    "factor_cpgs",
+    ("factors",),
+    lambda g, factors: (
+        g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, P.within(factors))
+        .bothE().outV().hasLabel(CpG.LABEL)
+    ),
+)
+FACTOR_CPGS_AFTER = register(
+    "factor_cpgs_after",
+    ("factors", "after"),
+    lambda g, factors, after: (
+        g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, P.within(factors))
+        .bothE().outV().hasLabel(CpG.LABEL)
+        .has(CpG.PropertyKey.NAME, P.gt(after))
+    ),
+)
+
+# The same CpGs cut to a name range that ends at ``up_to`` (inclusive)
+FACTOR_CPGS_UP_TO = register(
+    "factor_cpgs_up_to",
+    ("factors", "up_to"),
+    lambda g, factors, up_to: (
+        g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, P.within(factors))
+        .bothE().outV().hasLabel(CpG.LABEL)
+        .has(CpG.PropertyKey.NAME, P.lte(up_to))
+    ),
+)
+FACTOR_CPGS_BETWEEN = register(
+    "factor_cpgs_between",
+    ("factors", "after", "up_to"),
+    lambda g, factors, after, up_to: (
+        g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, P.within(factors))
+        .bothE().outV().hasLabel(CpG.LABEL)
+        .has(CpG.PropertyKey.NAME, P.gt(after))
+        .has(CpG.PropertyKey.NAME, P.lte(up_to))
+    ),
+)
+
+# A vertex's properties plus those of its neighbours
+NODE_PROPERTIES = register(
+    "node_properties",
+    ("label", "property_key", "property_value"),
+    lambda g, label, property_key, property_value: (
+        g.V().hasLabel(label).has(property_key, property_value)
+        .project('properties', 'connected_nodes')
+        .by(__.valueMap())
+        .by(__.both().valueMap().fold())
+    ),
+)
+
+LABEL_COUNT = register("label_count", ("label",), lambda g, label: g.V().hasLabel(label).count())
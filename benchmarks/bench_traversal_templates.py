@@ -0,0 +1,127 @@
+"""Micro-benchmark: building hot read traversals inline vs from templates.
+
+For each templated read path, times constructing the traversal's bytecode
+the way the queries used to (every step method called with literal values)
+against binding the pre-built template from ``traversal_templates``, then
+times serializing each result with GraphSON 3 and GraphBinary and reports
+the payload size. Nothing is sent to a server.
+
+    python benchmarks/bench_traversal_templates.py --factors 8 --repeat 20000
+    python benchmarks/bench_traversal_templates.py --output templates.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "app"))
+
+from gremlin_python.process.graph_traversal import GraphTraversalSource, __  # noqa: E402
+from gremlin_python.process.traversal import P  # noqa: E402
+from gremlin_python.structure.graph import Graph  # noqa: E402
+from gremlin_python.structure.io.graphbinaryV1 import GraphBinaryWriter  # noqa: E402
+from gremlin_python.structure.io.graphsonV3d0 import GraphSONWriter  # noqa: E402
+
+from traversal_templates import FACTOR_CPGS, FACTOR_CPGS_AFTER, LABEL_COUNT, NODE_PROPERTIES  # noqa: E402
+
+
+def inline_factor_cpgs(g: GraphTraversalSource, factors, after=None):
+    cpgs = g.V().has('factor', 'name', P.within(*factors)).bothE().outV().hasLabel('cpg')
+    if after is not None:
+        cpgs = cpgs.has('name', P.gt(after))
+    return cpgs
+
+
+def inline_node_properties(g: GraphTraversalSource, label, property_key, property_value):
+    return (
+        g.V().hasLabel(label).has(property_key, property_value)
+        .project('properties', 'connected_nodes')
+        .by(__.valueMap())
+        .by(__.both().valueMap().fold())
+    )
+
+
+def per_call_microseconds(func: Callable, repeat: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started_at) / repeat * 1e6
+
+
+def measure(build: Callable, repeat: int) -> Dict:
+    graphson = GraphSONWriter()
+    graphbinary = GraphBinaryWriter()
+    bytecode = build().bytecode
+    return {
+        "construct_us": per_call_microseconds(build, repeat),
+        "graphson_us": per_call_microseconds(lambda: graphson.write_object(bytecode), repeat),
+        "graphbinary_us": per_call_microseconds(lambda: graphbinary.write_object(bytecode), repeat),
+        "graphson_bytes": len(graphson.write_object(bytecode).encode("utf-8")),
+        "graphbinary_bytes": len(graphbinary.write_object(bytecode)),
+    }
+
+
+def run(factor_count: int, repeat: int) -> Dict:
+    g = Graph().traversal()
+    factors = [f"Factor {index:04d}" for index in range(factor_count)]
+    after = "cg00000000"
+    scenarios = {
+        "factor_cpgs": (
+            lambda: inline_factor_cpgs(g, factors),
+            lambda: FACTOR_CPGS.bind(g, factors=factors),
+        ),
+        "factor_cpgs_after": (
+            lambda: inline_factor_cpgs(g, factors, after),
+            lambda: FACTOR_CPGS_AFTER.bind(g, factors=factors, after=after),
+        ),
+        "node_properties": (
+            lambda: inline_node_properties(g, "cpg", "name", "cg00000001"),
+            lambda: NODE_PROPERTIES.bind(g, label="cpg", property_key="name", property_value="cg00000001"),
+        ),
+        "label_count": (
+            lambda: g.V().hasLabel("cpg").count(),
+            lambda: LABEL_COUNT.bind(g, label="cpg"),
+        ),
+    }
+
+    results = {}
+    for name, (inline, templated) in scenarios.items():
+        inline_result = measure(inline, repeat)
+        template_result = measure(templated, repeat)
+        results[name] = {
+            "inline": inline_result,
+            "template": template_result,
+            "construct_speedup": inline_result["construct_us"] / template_result["construct_us"],
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factors", type=int, default=4, help="factors in the factor->CpG lookups")
+    parser.add_argument("--repeat", type=int, default=10000, help="calls timed per measurement")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.factors, args.repeat)
+    print(f"{'traversal':<20}{'variant':<10}{'construct us':>14}{'graphson us':>13}{'binary us':>11}{'json B':>8}{'bin B':>7}")
+    for name, result in results.items():
+        for variant in ("inline", "template"):
+            row = result[variant]
+            print(
+                f"{name:<20}{variant:<10}{row['construct_us']:>14.2f}{row['graphson_us']:>13.2f}"
+                f"{row['graphbinary_us']:>11.2f}{row['graphson_bytes']:>8}{row['graphbinary_bytes']:>7}"
+            )
+        print(f"{'':<20}{'speedup':<10}{result['construct_speedup']:>13.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"factors": args.factors, "repeat": args.repeat, "results": results}, output_file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
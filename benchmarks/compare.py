@@ -0,0 +1,65 @@
+"""Compare two benchmark result files metric by metric.
+
+    python benchmarks/compare.py before.json after.json [--threshold 0.1]
+
+Prints every timing and throughput metric present in both runs with its
+ratio; changes beyond the threshold are flagged.
+"""
+import argparse
+import json
+from typing import Dict, Iterator, Tuple
+
+# Metric keys worth comparing; for rows_per_second higher is better
+COMPARED_KEYS = {"p50", "p90", "p99", "mean", "seconds", "build_seconds", "rows_per_second", "round_trips"}
+HIGHER_IS_BETTER = {"rows_per_second"}
+
+
+def _scenario_name(item: Dict, position: int) -> str:
+    keys = ("mode", "path", "factor_count", "k", "format", "rows")
+    parts = [f"{key}={item[key]}" for key in keys if key in item and not isinstance(item[key], dict)]
+    return ",".join(parts) or str(position)
+
+
+def flatten(value, path: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "meta":
+                continue
+            yield from flatten(item, f"{path}.{key}" if path else key)
+    elif isinstance(value, list):
+        for position, item in enumerate(value):
+            name = _scenario_name(item, position) if isinstance(item, dict) else str(position)
+            yield from flatten(item, f"{path}[{name}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if path.rsplit(".", 1)[-1] in COMPARED_KEYS:
+            yield path, float(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change worth flagging")
+    args = parser.parse_args(argv)
+
+    with open(args.before) as before_file, open(args.after) as after_file:
+        before = dict(flatten(json.load(before_file)))
+        after = dict(flatten(json.load(after_file)))
+
+    for path in sorted(before.keys() & after.keys()):
+        old, new = before[path], after[path]
+        if old == 0:
+            continue
+        change = (new - old) / old
+        if path.rsplit(".", 1)[-1] in HIGHER_IS_BETTER:
+            change = -change
+        flag = ""
+        if change > args.threshold:
+            flag = "  <-- slower"
+        elif change < -args.threshold:
+            flag = "  <-- faster"
+        print(f"{path}: {old:.6g} -> {new:.6g} ({new / old:.2f}x){flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,622 @@
+"""In-process stand-in for a Gremlin server, for offline benchmarks.
+
+``LocalRemoteConnection`` plugs into ``traversal().with_remote(...)`` and
+evaluates the submitted bytecode against an in-memory ``LocalGraph``. It
+covers the steps the app's traversals and ``BulkQueryExecutor`` batches use,
+not all of Gremlin; other steps raise NotImplementedError. An optional
+per-request delay stands in for the network round trip.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from gremlin_python.driver.remote_connection import RemoteConnection, RemoteTraversal
+from gremlin_python.process.traversal import Binding, Bytecode, Cardinality, Column, Order, P, T, Traverser
+from gremlin_python.structure.graph import Edge, Vertex
+
+
+class LocalVertex:
+    __slots__ = ("id", "label", "properties", "out_edges", "in_edges")
+
+    def __init__(self, vertex_id, label: str) -> None:
+        self.id = vertex_id
+        self.label = label
+        self.properties: Dict[str, List] = {}
+        self.out_edges: List["LocalEdge"] = []
+        self.in_edges: List["LocalEdge"] = []
+
+
+class LocalEdge:
+    __slots__ = ("id", "label", "out_v", "in_v", "properties")
+
+    def __init__(self, edge_id, label: str, out_v: LocalVertex, in_v: LocalVertex) -> None:
+        self.id = edge_id
+        self.label = label
+        self.out_v = out_v
+        self.in_v = in_v
+        self.properties: Dict[str, Any] = {}
+
+
+class LocalGraph:
+    """Vertices and edges held in dicts, with integer IDs."""
+
+    def __init__(self) -> None:
+        self.vertices: Dict[Any, LocalVertex] = {}
+        self.edges: Dict[Any, LocalEdge] = {}
+        self._ids = itertools.count(1)
+
+    def add_vertex(self, label: str) -> LocalVertex:
+        vertex = LocalVertex(next(self._ids), label)
+        self.vertices[vertex.id] = vertex
+        return vertex
+
+    def add_edge(self, label: str, out_v: LocalVertex, in_v: LocalVertex) -> LocalEdge:
+        edge = LocalEdge(next(self._ids), label, out_v, in_v)
+        self.edges[edge.id] = edge
+        out_v.out_edges.append(edge)
+        in_v.in_edges.append(edge)
+        return edge
+
+    def set_id(self, element, element_id):
+        elements = self.vertices if isinstance(element, LocalVertex) else self.edges
+        del elements[element.id]
+        element.id = element_id
+        elements[element_id] = element
+
+    def remove_edge(self, edge: LocalEdge):
+        if self.edges.pop(edge.id, None) is not None:
+            edge.out_v.out_edges.remove(edge)
+            edge.in_v.in_edges.remove(edge)
+
+    def remove_vertex(self, vertex: LocalVertex):
+        for edge in vertex.out_edges + vertex.in_edges:
+            self.remove_edge(edge)
+        self.vertices.pop(vertex.id, None)
+
+    def stats(self) -> Dict:
+        return {"vertices": len(self.vertices), "edges": len(self.edges)}
+
+
+class _Entry(tuple):
+    """A map entry produced by unfolding a map."""
+
+    @property
+    def key(self):
+        return self[0]
+
+    @property
+    def value(self):
+        return self[1]
+
+
+class _PropertyRef:
+    __slots__ = ("element", "key", "value")
+
+    def __init__(self, element, key: str, value) -> None:
+        self.element = element
+        self.key = key
+        self.value = value
+
+
+class _Traverser:
+    __slots__ = ("obj", "labels")
+
+    def __init__(self, obj, labels: Dict[str, Any]) -> None:
+        self.obj = obj
+        self.labels = labels
+
+    def split(self, obj) -> "_Traverser":
+        return _Traverser(obj, self.labels)
+
+    def labelled(self, label: str) -> "_Traverser":
+        return _Traverser(self.obj, {**self.labels, label: self.obj})
+
+
+class _Step:
+    __slots__ = ("name", "args", "modulators")
+
+    def __init__(self, name: str, args: List) -> None:
+        self.name = name
+        self.args = args
+        self.modulators: List[List] = []
+
+    def by(self) -> List[List]:
+        return [args for name, args in self.modulators if name == "by"]
+
+    def modulator(self, name: str):
+        for modulator_name, args in self.modulators:
+            if modulator_name == name:
+                return args[0]
+        return None
+
+
+_MODULATORS = {"by", "from", "to"}
+
+_PREDICATES = {
+    "eq": lambda value, expected: value == expected,
+    "neq": lambda value, expected: value != expected,
+    "lt": lambda value, expected: value < expected,
+    "lte": lambda value, expected: value <= expected,
+    "gt": lambda value, expected: value > expected,
+    "gte": lambda value, expected: value >= expected,
+    "within": lambda value, expected: value in expected,
+    "without": lambda value, expected: value not in expected,
+}
+
+
+def _unbind(value):
+    return value.value if isinstance(value, Binding) else value
+
+
+def _test(predicate, value) -> bool:
+    predicate = _unbind(predicate)
+    if not isinstance(predicate, P):
+        return value == predicate
+    if predicate.operator == "and":
+        return _test(predicate.value, value) and _test(predicate.other, value)
+    if predicate.operator == "or":
+        return _test(predicate.value, value) or _test(predicate.other, value)
+    if predicate.operator not in _PREDICATES:
+        raise NotImplementedError(f"Predicate {predicate.operator} is not supported")
+    try:
+        return _PREDICATES[predicate.operator](value, predicate.value)
+    except TypeError:
+        return False
+
+
+def _element_values(element, key):
+    if key == T.id:
+        return [element.id]
+    if key == T.label:
+        return [element.label]
+    value = element.properties.get(key)
+    if value is None:
+        return []
+    return value if isinstance(element, LocalVertex) else [value]
+
+
+def _hashable(obj):
+    try:
+        hash(obj)
+        return obj
+    except TypeError:
+        return repr(obj)
+
+
+def _to_client(obj):
+    if isinstance(obj, LocalVertex):
+        return Vertex(obj.id, obj.label)
+    if isinstance(obj, LocalEdge):
+        return Edge(obj.id, Vertex(obj.out_v.id, obj.out_v.label), obj.label, Vertex(obj.in_v.id, obj.in_v.label))
+    if isinstance(obj, _Entry):
+        return {_to_client(obj.key): _to_client(obj.value)}
+    if isinstance(obj, _PropertyRef):
+        return obj.value
+    if isinstance(obj, dict):
+        return {_hashable(_to_client(key)): _to_client(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [_to_client(item) for item in obj]
+    return obj
+
+
+class _Interpreter:
+    """Evaluates one request's bytecode against the graph."""
+
+    def __init__(self, graph: LocalGraph) -> None:
+        self._graph = graph
+        self._parsed: Dict[int, List[_Step]] = {}
+
+    def _steps(self, bytecode: Bytecode) -> List[_Step]:
+        steps = self._parsed.get(id(bytecode))
+        if steps is None:
+            steps = []
+            for name, *args in bytecode.step_instructions:
+                args = [_unbind(arg) for arg in args]
+                if name in _MODULATORS and steps:
+                    steps[-1].modulators.append((name, args))
+                else:
+                    steps.append(_Step(name, args))
+            self._parsed[id(bytecode)] = steps
+        return steps
+
+    def run(self, bytecode: Bytecode) -> List:
+        traversers = self._run(self._steps(bytecode), [_Traverser(None, {})], in_where=False)
+        return [traverser.obj for traverser in traversers]
+
+    def _run(self, steps: List[_Step], traversers: List[_Traverser], in_where: bool) -> List[_Traverser]:
+        for step in steps:
+            handler = getattr(self, f"_step_{step.name}", None)
+            if handler is None:
+                raise NotImplementedError(f"Step {step.name}() is not supported by the local graph")
+            traversers = handler(step, traversers, in_where)
+        return traversers
+
+    def _child(self, bytecode: Bytecode, traverser: _Traverser, in_where: bool = False) -> List[_Traverser]:
+        return self._run(self._steps(bytecode), [traverser], in_where)
+
+    def _by_value(self, modulator: Optional[List], traverser: _Traverser):
+        """Apply a by() modulator; returns (found, value)."""
+        spec = modulator[0] if modulator else None
+        obj = traverser.obj
+        if spec is None:
+            return True, obj
+        if isinstance(spec, Bytecode):
+            results = self._child(spec, traverser)
+            return (True, results[0].obj) if results else (False, None)
+        if isinstance(spec, Column):
+            if isinstance(obj, _Entry):
+                return True, obj.key if spec == Column.keys else obj.value
+            return True, list(obj.keys() if spec == Column.keys else obj.values())
+        if isinstance(spec, Order):
+            return True, obj
+        values = _element_values(obj, spec)
+        return (True, values[0]) if values else (False, None)
+
+    # Start and mutation steps
+
+    def _step_V(self, step, traversers, in_where):
+        if step.args:
+            vertices = [self._graph.vertices[v] for v in step.args if v in self._graph.vertices]
+        else:
+            vertices = list(self._graph.vertices.values())
+        return [traverser.split(vertex) for traverser in traversers for vertex in vertices]
+
+    def _step_inject(self, step, traversers, in_where):
+        return [traverser.split(value) for traverser in traversers for value in step.args]
+
+    def _step_addV(self, step, traversers, in_where):
+        label = step.args[0] if step.args else "vertex"
+        return [traverser.split(self._graph.add_vertex(label)) for traverser in traversers]
+
+    def _endpoint(self, spec, traverser: _Traverser):
+        if spec is None:
+            return traverser.obj
+        if isinstance(spec, str):
+            return traverser.labels[spec]
+        if isinstance(spec, Bytecode):
+            return self._child(spec, traverser)[0].obj
+        return self._graph.vertices[spec.id if isinstance(spec, Vertex) else spec]
+
+    def _step_addE(self, step, traversers, in_where):
+        results = []
+        for traverser in traversers:
+            out_v = self._endpoint(step.modulator("from"), traverser)
+            in_v = self._endpoint(step.modulator("to"), traverser)
+            results.append(traverser.split(self._graph.add_edge(step.args[0], out_v, in_v)))
+        return results
+
+    def _step_property(self, step, traversers, in_where):
+        args = list(step.args)
+        cardinality = args.pop(0) if isinstance(args[0], Cardinality) else Cardinality.single
+        key, value = args[0], args[1]
+        for traverser in traversers:
+            element = traverser.obj
+            if key == T.id:
+                self._graph.set_id(element, value)
+            elif isinstance(element, LocalEdge):
+                element.properties[key] = value
+            elif cardinality == Cardinality.single:
+                element.properties[key] = [value]
+            else:
+                values = element.properties.setdefault(key, [])
+                if cardinality == Cardinality.list_ or value not in values:
+                    values.append(value)
+        return traversers
+
+    def _step_drop(self, step, traversers, in_where):
+        for traverser in traversers:
+            obj = traverser.obj
+            if isinstance(obj, _PropertyRef):
+                values = obj.element.properties.get(obj.key)
+                if isinstance(values, list) and obj.value in values:
+                    values.remove(obj.value)
+                if not values or isinstance(obj.element, LocalEdge):
+                    obj.element.properties.pop(obj.key, None)
+            elif isinstance(obj, LocalVertex):
+                self._graph.remove_vertex(obj)
+            elif isinstance(obj, LocalEdge):
+                self._graph.remove_edge(obj)
+        return []
+
+    # Filter steps
+
+    def _step_has(self, step, traversers, in_where):
+        args = step.args
+        if len(args) == 3:
+            label, key, predicate = args
+        elif len(args) == 2:
+            label, (key, predicate) = None, args
+        else:
+            return [t for t in traversers if _element_values(t.obj, args[0])]
+        return [
+            traverser for traverser in traversers
+            if (label is None or traverser.obj.label == label)
+            and any(_test(predicate, value) for value in _element_values(traverser.obj, key))
+        ]
+
+    def _step_hasLabel(self, step, traversers, in_where):
+        return [
+            traverser for traverser in traversers
+            if any(_test(label, traverser.obj.label) for label in step.args)
+        ]
+
+    def _step_is(self, step, traversers, in_where):
+        return [traverser for traverser in traversers if _test(step.args[0], traverser.obj)]
+
+    def _step_where(self, step, traversers, in_where):
+        child = step.args[0]
+        if not isinstance(child, Bytecode):
+            raise NotImplementedError("Only where(traversal) is supported by the local graph")
+        return [traverser for traverser in traversers if self._child(child, traverser, in_where=True)]
+
+    def _step_none(self, step, traversers, in_where):
+        # Appended by iterate() so the server returns nothing
+        return []
+
+    def _step_dedup(self, step, traversers, in_where):
+        seen = set()
+        results = []
+        for traverser in traversers:
+            key = _hashable(traverser.obj)
+            if key not in seen:
+                seen.add(key)
+                results.append(traverser)
+        return results
+
+    def _step_range(self, step, traversers, in_where):
+        low, high = step.args[-2], step.args[-1]
+        return traversers[low:None if high < 0 else high]
+
+    def _step_skip(self, step, traversers, in_where):
+        return traversers[step.args[-1]:]
+
+    def _step_limit(self, step, traversers, in_where):
+        return traversers[:step.args[-1]]
+
+    def _step_as(self, step, traversers, in_where):
+        for label in step.args:
+            if in_where:
+                # Inside where(), as() on a bound label matches against it
+                traversers = [
+                    traverser.labelled(label) if label not in traverser.labels else traverser
+                    for traverser in traversers
+                    if label not in traverser.labels or traverser.labels[label] is traverser.obj
+                ]
+            else:
+                traversers = [traverser.labelled(label) for traverser in traversers]
+        return traversers
+
+    # Navigation steps
+
+    def _adjacent_edges(self, vertex: LocalVertex, direction: str, labels) -> List[LocalEdge]:
+        edges = []
+        if direction in ("out", "both"):
+            edges.extend(vertex.out_edges)
+        if direction in ("in", "both"):
+            edges.extend(vertex.in_edges)
+        return [edge for edge in edges if not labels or edge.label in labels]
+
+    def _edges(self, traversers, direction: str, labels) -> List[_Traverser]:
+        return [
+            traverser.split(edge)
+            for traverser in traversers
+            for edge in self._adjacent_edges(traverser.obj, direction, labels)
+        ]
+
+    def _vertices(self, traversers, direction: str, labels) -> List[_Traverser]:
+        return [
+            traverser.split(edge.in_v if edge.out_v is traverser.obj else edge.out_v)
+            for traverser in traversers
+            for edge in self._adjacent_edges(traverser.obj, direction, labels)
+        ]
+
+    def _step_out(self, step, traversers, in_where):
+        return self._vertices(traversers, "out", step.args)
+
+    def _step_in(self, step, traversers, in_where):
+        return self._vertices(traversers, "in", step.args)
+
+    def _step_both(self, step, traversers, in_where):
+        return self._vertices(traversers, "both", step.args)
+
+    def _step_outE(self, step, traversers, in_where):
+        return self._edges(traversers, "out", step.args)
+
+    def _step_inE(self, step, traversers, in_where):
+        return self._edges(traversers, "in", step.args)
+
+    def _step_bothE(self, step, traversers, in_where):
+        return self._edges(traversers, "both", step.args)
+
+    def _step_outV(self, step, traversers, in_where):
+        return [traverser.split(traverser.obj.out_v) for traverser in traversers]
+
+    def _step_inV(self, step, traversers, in_where):
+        return [traverser.split(traverser.obj.in_v) for traverser in traversers]
+
+    # Map steps
+
+    def _step_identity(self, step, traversers, in_where):
+        return traversers
+
+    def _step_constant(self, step, traversers, in_where):
+        return [traverser.split(step.args[0]) for traverser in traversers]
+
+    def _step_id(self, step, traversers, in_where):
+        return [traverser.split(traverser.obj.id) for traverser in traversers]
+
+    def _step_label(self, step, traversers, in_where):
+        return [traverser.split(traverser.obj.label) for traverser in traversers]
+
+    def _step_values(self, step, traversers, in_where):
+        results = []
+        for traverser in traversers:
+            keys = step.args or list(traverser.obj.properties)
+            for key in keys:
+                results.extend(traverser.split(value) for value in _element_values(traverser.obj, key))
+        return results
+
+    def _step_properties(self, step, traversers, in_where):
+        results = []
+        for traverser in traversers:
+            element = traverser.obj
+            for key in step.args or list(element.properties):
+                results.extend(
+                    traverser.split(_PropertyRef(element, key, value))
+                    for value in _element_values(element, key)
+                )
+        return results
+
+    def _step_valueMap(self, step, traversers, in_where):
+        results = []
+        for traverser in traversers:
+            element = traverser.obj
+            keys = [key for key in step.args if isinstance(key, str)] or list(element.properties)
+            results.append(traverser.split({
+                key: list(_element_values(element, key))
+                for key in keys if key in element.properties
+            }))
+        return results
+
+    def _step_unfold(self, step, traversers, in_where):
+        results = []
+        for traverser in traversers:
+            obj = traverser.obj
+            if isinstance(obj, dict):
+                results.extend(traverser.split(_Entry(item)) for item in obj.items())
+            elif isinstance(obj, (list, tuple, set)) and not isinstance(obj, _Entry):
+                results.extend(traverser.split(item) for item in obj)
+            else:
+                results.append(traverser)
+        return results
+
+    def _step_select(self, step, traversers, in_where):
+        if isinstance(step.args[0], Column):
+            column = step.args[0]
+            return [traverser.split(self._by_value([column], traverser)[1]) for traverser in traversers]
+
+        aliases = [alias for alias in step.args if isinstance(alias, str)]
+        by_modulators = step.by() or [None]
+        results = []
+        for traverser in traversers:
+            if any(alias not in traverser.labels for alias in aliases):
+                continue
+            selected = {}
+            for position, alias in enumerate(aliases):
+                modulator = by_modulators[position % len(by_modulators)]
+                found, value = self._by_value(modulator, traverser.split(traverser.labels[alias]))
+                if found:
+                    selected[alias] = value
+            results.append(traverser.split(selected if len(aliases) > 1 else selected.get(aliases[0])))
+        return results
+
+    def _step_project(self, step, traversers, in_where):
+        by_modulators = step.by() or [None]
+        results = []
+        for traverser in traversers:
+            projection = {}
+            for position, key in enumerate(step.args):
+                found, value = self._by_value(by_modulators[position % len(by_modulators)], traverser)
+                if found:
+                    projection[key] = value
+            results.append(traverser.split(projection))
+        return results
+
+    def _step_coalesce(self, step, traversers, in_where):
+        results = []
+        for traverser in traversers:
+            for child in step.args:
+                child_results = self._child(child, traverser)
+                if child_results:
+                    results.extend(child_results)
+                    break
+        return results
+
+    def _step_order(self, step, traversers, in_where):
+        ordered = list(traversers)
+        for modulator in reversed(step.by() or [[]]):
+            descending = Order.desc in modulator
+            ordered.sort(key=lambda traverser: self._by_value(modulator, traverser)[1], reverse=descending)
+        return ordered
+
+    # Reducing steps
+
+    def _step_fold(self, step, traversers, in_where):
+        return [_Traverser([traverser.obj for traverser in traversers], {})]
+
+    def _step_count(self, step, traversers, in_where):
+        return [_Traverser(len(traversers), {})]
+
+    def _step_min(self, step, traversers, in_where):
+        if not traversers:
+            return []
+        return [_Traverser(min(traverser.obj for traverser in traversers), {})]
+
+    def _step_group(self, step, traversers, in_where):
+        by_modulators = step.by()
+        key_modulator = by_modulators[0] if by_modulators else None
+        value_modulator = by_modulators[1] if len(by_modulators) > 1 else None
+        groups: Dict[Any, List] = {}
+        for traverser in traversers:
+            found, key = self._by_value(key_modulator, traverser)
+            if not found:
+                continue
+            found, value = self._by_value(value_modulator, traverser)
+            if found:
+                groups.setdefault(_hashable(key), []).append(value)
+        return [_Traverser(groups, {})]
+
+
+class LocalRemoteConnection(RemoteConnection):
+    """Answers traversals from a ``LocalGraph`` in the calling thread.
+
+    Requests are evaluated one at a time, like a single-threaded server.
+    ``round_trip_latency`` seconds are slept outside that lock per request,
+    so pipelined clients overlap their simulated network time.
+    """
+
+    def __init__(self, graph: Optional[LocalGraph] = None, round_trip_latency: float = 0.0) -> None:
+        super().__init__("local://graph", "g")
+        self.graph = graph if graph is not None else LocalGraph()
+        self._round_trip_latency = round_trip_latency
+        self._lock = threading.Lock()
+        self._closed = False
+        self._round_trips = 0
+        self._instructions = 0
+        self._busy_seconds = 0.0
+        # Stands in for the driver's own I/O threads on the async path
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="local-graph")
+
+    def submit(self, bytecode: Bytecode) -> RemoteTraversal:
+        if self._round_trip_latency > 0:
+            time.sleep(self._round_trip_latency)
+        with self._lock:
+            started_at = time.perf_counter()
+            results = _Interpreter(self.graph).run(bytecode)
+            traversers = [Traverser(_to_client(result)) for result in results]
+            self._busy_seconds += time.perf_counter() - started_at
+            self._round_trips += 1
+            self._instructions += len(bytecode.step_instructions)
+        return RemoteTraversal(iter(traversers))
+
+    def submit_async(self, bytecode: Bytecode) -> Future:
+        return self._executor.submit(self.submit, bytecode)
+
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "round_trips": self._round_trips,
+                "instructions": self._instructions,
+                "busy_seconds": self._busy_seconds,
+                **self.graph.stats(),
+            }
+
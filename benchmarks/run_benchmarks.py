@@ -0,0 +1,361 @@
+"""Benchmark the ingest, grouping and rendering paths without Neptune.
+
+By default everything runs against the in-process local graph
+(``local_graph.py``), with a simulated round-trip delay. Pass
+``--gremlin-url ws://localhost:8182/gremlin`` to run the same scenarios
+against a local Gremlin Server/TinkerGraph instead; the synthetic data is
+written into that graph, so point it at a scratch server.
+
+    python benchmarks/run_benchmarks.py --cpgs 20000 --factors 100 --output run.json
+    python benchmarks/compare.py before.json after.json
+
+Focused micro-benchmarks live next to this script. Name them so they never
+shadow an app module (``bench_`` prefix), since ``app/`` shares the path:
+
+    python benchmarks/bench_traversal_templates.py
+    python benchmarks/serializers.py
+
+Results are written as JSON so runs can be compared over time.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Silence the per-import progress bars before tqdm is imported
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "app"))
+
+import numpy as np  # noqa: E402
+from gremlin_python.process.anonymous_traversal import traversal  # noqa: E402
+from gremlin_python.process.graph_traversal import GraphTraversalSource  # noqa: E402
+from gremlin_python.process.traversal import T  # noqa: E402
+
+import settings  # noqa: E402
+from data_objects import CpG, Factor  # noqa: E402
+from factor_index import FactorIndex  # noqa: E402
+from gremlin_queries import (  # noqa: E402
+    add_cpgs,
+    add_diseases,
+    add_edges_microbes_diseases,
+    add_factors,
+    add_microbes,
+    create_ingest_executor,
+    get_factor_index_rows,
+    group_cpgs_by_all_selected_factors,
+    group_cpgs_by_any_selected_health_factor,
+    group_cpgs_by_at_least_k_selected_factors,
+)
+from ingest import ingest_csv_in_chunks  # noqa: E402
+from renderers import RENDERERS, TABLE_COLUMNS  # noqa: E402
+
+from local_graph import LocalRemoteConnection  # noqa: E402
+from synthetic_data import SyntheticDataset, generate_dataset  # noqa: E402
+
+CPG_FACTOR_EDGE_LABEL = "associated with"
+
+
+def percentiles(samples: List[float]) -> Dict:
+    values = np.asarray(samples, dtype=float)
+    return {
+        "count": len(values),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    # The query and ingest functions print progress we don't want to time
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def timed(func: Callable, *args, **kwargs):
+    started_at = time.perf_counter()
+    with quiet():
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - started_at
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARK_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Backend:
+    """The traversal source under test plus its round-trip counters."""
+
+    def __init__(self, gremlin_url: Optional[str], round_trip_latency: float) -> None:
+        self.name = "gremlin-server" if gremlin_url else "local"
+        if gremlin_url:
+            from gremlin_python.driver.driver_remote_connection import DriverRemoteConnection
+            self.connection = DriverRemoteConnection(gremlin_url, "g")
+            self.local = None
+        else:
+            self.connection = self.local = LocalRemoteConnection(round_trip_latency=round_trip_latency)
+        self.g: GraphTraversalSource = traversal().with_remote(self.connection)
+
+    def round_trips(self) -> Optional[int]:
+        return None if self.local is None else self.local.stats()["round_trips"]
+
+    def close(self):
+        self.connection.close()
+
+
+def csv_file(df) -> io.BytesIO:
+    return io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+
+
+def measure_ingest(backend: Backend, name: str, row_count: int, func: Callable, *args) -> Tuple[Dict, Any]:
+    round_trips_before = backend.round_trips()
+    result, seconds = timed(func, *args)
+    measurement = {
+        "rows": row_count,
+        "seconds": seconds,
+        "rows_per_second": row_count / seconds if seconds > 0 else None,
+    }
+    if round_trips_before is not None:
+        measurement["round_trips"] = backend.round_trips() - round_trips_before
+    print(f"  ingest {name}: {row_count} rows in {seconds:.3f}s")
+    return measurement, result
+
+
+def add_cpg_factor_edges(g: GraphTraversalSource, dataset: SyntheticDataset, cpg_ids: Dict, factor_ids: Dict) -> int:
+    # There is no import endpoint for these edges yet, so write them directly
+    query_executor = create_ingest_executor(g)
+    for internal_id, factor_name in dataset.cpg_factor_edges:
+        query_executor.add_edge(cpg_ids[internal_id], factor_ids[factor_name], CPG_FACTOR_EDGE_LABEL)
+    query_executor.force_execute()
+    return len(dataset.cpg_factor_edges)
+
+
+def run_ingest(backend: Backend, dataset: SyntheticDataset) -> Dict:
+    """Load the dataset through each import path, timing every endpoint."""
+    g = backend.g
+    results = {}
+
+    def ingest_csv(name: str, df, ingest_func):
+        measurement, _ = measure_ingest(backend, name, len(df), ingest_csv_in_chunks, g, csv_file(df), ingest_func)
+        results[name] = measurement
+
+    ingest_csv("factors", dataset.factor_df, add_factors)
+    ingest_csv("cpgs", dataset.cpg_df, add_cpgs)
+    ingest_csv("microbes", dataset.microbe_df, add_microbes)
+    ingest_csv("diseases", dataset.disease_df, add_diseases)
+
+    results["microbe_disease_edges"], _ = measure_ingest(
+        backend, "microbe_disease_edges", len(dataset.microbe_disease_df),
+        add_edges_microbes_diseases, g, dataset.microbe_disease_df,
+    )
+
+    # Resolve the graph IDs once, outside the timed section
+    cpg_ids = {
+        row["internal_id"]: row["id"]
+        for row in g.V().hasLabel(CpG.LABEL)
+        .project("internal_id", "id").by(CpG.PropertyKey.INTERNAL_ID).by(T.id).toList()
+    }
+    factor_ids = {
+        row["name"]: row["id"]
+        for row in g.V().hasLabel(Factor.LABEL)
+        .project("name", "id").by(Factor.PropertyKey.NAME).by(T.id).toList()
+    }
+    results["cpg_factor_edges"], _ = measure_ingest(
+        backend, "cpg_factor_edges", len(dataset.cpg_factor_edges),
+        add_cpg_factor_edges, g, dataset, cpg_ids, factor_ids,
+    )
+    return results
+
+
+QUERY_FUNCTIONS = {
+    "AND": group_cpgs_by_all_selected_factors,
+    "OR": group_cpgs_by_any_selected_health_factor,
+    "AT_LEAST_K": group_cpgs_by_at_least_k_selected_factors,
+}
+
+
+def run_queries(
+    backend: Backend,
+    dataset: SyntheticDataset,
+    factor_counts: List[int],
+    samples: int,
+    repeat: int,
+    rng: np.random.Generator,
+) -> Dict:
+    """Latency percentiles per mode and factor count, via traversal and index."""
+    g = backend.g
+    factor_index, build_seconds = timed(lambda: FactorIndex.from_cpg_rows(get_factor_index_rows(g)))
+    print(f"  factor index built in {build_seconds:.3f}s")
+    results = {
+        "factor_index": {"build_seconds": build_seconds, **factor_index.stats()},
+        "scenarios": [],
+    }
+
+    for factor_count in factor_counts:
+        if factor_count > len(dataset.factor_names):
+            continue
+        factor_sets = [
+            rng.choice(dataset.factor_names, size=factor_count, replace=False).tolist()
+            for _ in range(samples)
+        ]
+        for mode, query_func in QUERY_FUNCTIONS.items():
+            criteria = {"k": max(1, math.ceil(factor_count / 2))} if mode == "AT_LEAST_K" else {}
+            paths = {
+                "traversal": lambda factors: query_func(g, factors, "benchmark", **criteria),
+                "factor_index": lambda factors: getattr(factor_index, query_func.__name__)(factors, **criteria),
+            }
+            for path, run_query in paths.items():
+                latencies = []
+                row_counts = []
+                round_trips_before = backend.round_trips()
+                for factors in factor_sets:
+                    for _ in range(repeat):
+                        rows, seconds = timed(run_query, factors)
+                        latencies.append(seconds)
+                        row_counts.append(len(rows))
+                scenario = {
+                    "mode": mode,
+                    "path": path,
+                    "factor_count": factor_count,
+                    **criteria,
+                    "latency": percentiles(latencies),
+                    "mean_rows": float(np.mean(row_counts)),
+                }
+                if round_trips_before is not None:
+                    scenario["round_trips_per_query"] = (backend.round_trips() - round_trips_before) / len(latencies)
+                results["scenarios"].append(scenario)
+                print(
+                    f"  {mode} x{factor_count} via {path}: "
+                    f"p50 {scenario['latency']['p50'] * 1000:.2f}ms, {scenario['mean_rows']:.0f} rows"
+                )
+    return results
+
+
+def synthetic_rows(dataset: SyntheticDataset, row_count: int, rng: np.random.Generator) -> List[Dict]:
+    cpg_df = dataset.cpg_df.sample(n=row_count, replace=row_count > len(dataset.cpg_df), random_state=rng.integers(2 ** 31))
+    values = {
+        "CpG ID": cpg_df["CpG"].tolist(),
+        "Association": rng.choice(dataset.factor_names, size=row_count).tolist(),
+        "Occurrences": cpg_df["Occurrences"].tolist(),
+        "Direction": cpg_df["Direction"].tolist(),
+        "Beta Baseline": cpg_df["Beta Baseline"].tolist(),
+        "M-Value Baseline": cpg_df["M-Value Baseline"].tolist(),
+    }
+    return [dict(zip(TABLE_COLUMNS, row)) for row in zip(*(values[column] for column in TABLE_COLUMNS))]
+
+
+def run_render(dataset: SyntheticDataset, row_counts: List[int], repeat: int, rng: np.random.Generator) -> List[Dict]:
+    """Rendering cost of every output format at several result sizes."""
+    results = []
+    for row_count in row_counts:
+        rows = synthetic_rows(dataset, row_count, rng)
+        for output_format, render in RENDERERS.items():
+            latencies = []
+            for _ in range(repeat):
+                body, seconds = timed(render, rows)
+                latencies.append(seconds)
+            results.append({
+                "format": output_format,
+                "rows": row_count,
+                "bytes": len(body.encode("utf-8")),
+                "latency": percentiles(latencies),
+            })
+            print(f"  render {output_format} x{row_count}: p50 {np.median(latencies) * 1000:.2f}ms")
+    return results
+
+
+def int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gremlin-url", help="run against this Gremlin Server instead of the local graph")
+    parser.add_argument("--round-trip-ms", type=float, default=1.0, help="simulated latency per local request")
+    parser.add_argument("--cpgs", type=int, default=10000)
+    parser.add_argument("--factors", type=int, default=50)
+    parser.add_argument("--fan-out", type=float, default=3.0, help="mean factors per CpG")
+    parser.add_argument("--microbes", type=int, default=1000)
+    parser.add_argument("--diseases", type=int, default=100)
+    parser.add_argument("--microbe-fan-out", type=float, default=2.0, help="mean diseases per microbe")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--factor-counts", type=int_list, default=[1, 2, 4, 8])
+    parser.add_argument("--query-samples", type=int, default=5, help="factor sets per factor count")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per sample")
+    parser.add_argument("--render-rows", type=int_list, default=[100, 1000, 10000])
+    parser.add_argument("--skip-render", action="store_true")
+    parser.add_argument("--skip-queries", action="store_true")
+    parser.add_argument(
+        "--output",
+        default=os.path.join(BENCHMARK_DIR, "results", time.strftime("%Y%m%d-%H%M%S") + ".json"),
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    dataset = generate_dataset(
+        cpg_count=args.cpgs,
+        factor_count=args.factors,
+        fan_out=args.fan_out,
+        microbe_count=args.microbes,
+        disease_count=args.diseases,
+        microbe_fan_out=args.microbe_fan_out,
+        seed=args.seed,
+    )
+    backend = Backend(args.gremlin_url, args.round_trip_ms / 1000)
+    print(f"Benchmarking against the {backend.name} backend: {dataset.summary()}")
+
+    report = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": backend.name,
+            "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+            "settings": {
+                key: getattr(settings, key) for key in dir(settings)
+                if key.startswith("INGEST_") or key == "STREAM_PAGE_SIZE"
+            },
+        },
+        "dataset": dataset.summary(),
+    }
+    try:
+        report["ingest"] = run_ingest(backend, dataset)
+        if not args.skip_queries:
+            report["queries"] = run_queries(
+                backend, dataset, args.factor_counts, args.query_samples, args.repeat, rng
+            )
+    finally:
+        backend.close()
+    if not args.skip_render:
+        report["render"] = run_render(dataset, args.render_rows, args.repeat, rng)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2, default=str)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
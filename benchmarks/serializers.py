@@ -0,0 +1,167 @@
+"""Benchmark decoding AND/OR group query responses per wire serializer.
+
+Runs the AND and OR traversals against a synthetic dataset in the local
+graph, encodes each result as the response message Gremlin Server would
+send, and times the driver's ``deserialize_message`` on it for every
+serializer in ``database.MESSAGE_SERIALIZERS``. Bytes on the wire are
+reported raw and after permessage-deflate (``GREMLIN_COMPRESSION``), along
+with the time to inflate them, so a deployment can weigh CPU against
+bandwidth.
+
+    python benchmarks/serializers.py --cpgs 20000 --factor-counts 1,4,8
+    python benchmarks/serializers.py --output serializers.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+import zlib
+from typing import Callable, Dict, List
+
+# Silence the per-import progress bars before tqdm is imported
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARK_DIR), "app"))
+
+import numpy as np  # noqa: E402
+from gremlin_python.process.traversal import Traverser  # noqa: E402
+from gremlin_python.structure.io import graphbinaryV1, graphsonV2d0, graphsonV3d0  # noqa: E402
+
+from database import MESSAGE_SERIALIZERS, create_message_serializer  # noqa: E402
+from gremlin_queries import plan_group_cpgs_by_all_selected_factors, plan_group_cpgs_by_any_selected_health_factor  # noqa: E402
+
+from run_benchmarks import Backend, int_list, percentiles, quiet, run_ingest  # noqa: E402
+from synthetic_data import generate_dataset  # noqa: E402
+
+PLANS = {
+    "AND": plan_group_cpgs_by_all_selected_factors,
+    "OR": plan_group_cpgs_by_any_selected_health_factor,
+}
+
+
+def _graphson_response(writer, results: List) -> bytes:
+    message = {
+        "requestId": str(uuid.uuid4()),
+        "status": {"code": 200, "message": "", "attributes": {}},
+        "result": {"data": [Traverser(result) for result in results], "meta": {}},
+    }
+    return json.dumps(writer.to_dict(message)).encode("utf-8")
+
+
+def _graphbinary_response(results: List) -> bytes:
+    writer = graphbinaryV1.GraphBinaryWriter()
+    message = bytearray(b"\x81")
+    graphbinaryV1.UuidIO.dictify(uuid.uuid4(), writer, message, as_value=True, nullable=True)
+    message.extend(graphbinaryV1.int32_pack(200))
+    graphbinaryV1.StringIO.dictify("", writer, message, as_value=True, nullable=True)
+    graphbinaryV1.MapIO.dictify({}, writer, message, as_value=True, nullable=False)
+    graphbinaryV1.MapIO.dictify({}, writer, message, as_value=True, nullable=False)
+    writer.to_dict([Traverser(result) for result in results], message)
+    return bytes(message)
+
+
+# Encode a result list as each serializer's response message
+RESPONSE_ENCODERS: Dict[str, Callable[[List], bytes]] = {
+    "graphbinary": _graphbinary_response,
+    "graphson3": lambda results: _graphson_response(graphsonV3d0.GraphSONWriter(), results),
+    "graphson2": lambda results: _graphson_response(graphsonV2d0.GraphSONWriter(), results),
+}
+
+
+def deflate(payload: bytes) -> bytes:
+    # Raw deflate with a 32KB window, as permessage-deflate sends it
+    compressor = zlib.compressobj(wbits=-15)
+    return compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+def timed_samples(func: Callable, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+def measure_response(serializer_name: str, results: List, repeat: int) -> Dict:
+    message_serializer = create_message_serializer(serializer_name)
+    payload = RESPONSE_ENCODERS[serializer_name](results)
+    compressed = deflate(payload)
+
+    decoded = message_serializer.deserialize_message(payload)["result"]["data"]
+    if len(decoded) != len(results):
+        raise AssertionError(f"{serializer_name} decoded {len(decoded)} of {len(results)} results")
+
+    decode = percentiles(timed_samples(lambda: message_serializer.deserialize_message(payload), repeat))
+    inflate = percentiles(timed_samples(lambda: zlib.decompressobj(wbits=-15).decompress(compressed), repeat))
+    return {
+        "bytes": len(payload),
+        "compressed_bytes": len(compressed),
+        "decode_seconds": decode,
+        "inflate_seconds": inflate,
+    }
+
+
+def run(backend: Backend, factor_names: List[str], factor_counts: List[int], repeat: int, rng: np.random.Generator) -> List[Dict]:
+    scenarios = []
+    for factor_count in factor_counts:
+        if factor_count > len(factor_names):
+            continue
+        factors = rng.choice(factor_names, size=factor_count, replace=False).tolist()
+        for mode, plan_query in PLANS.items():
+            # The raw traversal results are what crosses the wire
+            with quiet():
+                results = plan_query(backend.g, factors, "benchmark").traversal.toList()
+            for serializer_name in MESSAGE_SERIALIZERS:
+                scenario = {
+                    "mode": mode,
+                    "factor_count": factor_count,
+                    "results": len(results),
+                    "serializer": serializer_name,
+                    **measure_response(serializer_name, results, repeat),
+                }
+                scenarios.append(scenario)
+                print(
+                    f"  {mode} x{factor_count} ({len(results)} rows) {serializer_name}: "
+                    f"decode p50 {scenario['decode_seconds']['p50'] * 1000:.2f}ms, "
+                    f"{scenario['bytes'] / 1024:.0f}KB raw, {scenario['compressed_bytes'] / 1024:.0f}KB deflated, "
+                    f"inflate p50 {scenario['inflate_seconds']['p50'] * 1000:.2f}ms"
+                )
+    return scenarios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cpgs", type=int, default=10000)
+    parser.add_argument("--factors", type=int, default=50)
+    parser.add_argument("--fan-out", type=float, default=3.0, help="mean factors per CpG")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--factor-counts", type=int_list, default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=5, help="timed decodes per response")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    dataset = generate_dataset(
+        cpg_count=args.cpgs, factor_count=args.factors, fan_out=args.fan_out,
+        microbe_count=0, disease_count=1, seed=args.seed,
+    )
+    backend = Backend(None, 0.0)
+    print(f"Loading {dataset.summary()}")
+    try:
+        with quiet():
+            run_ingest(backend, dataset)
+        scenarios = run(backend, dataset.factor_names, args.factor_counts, args.repeat, np.random.default_rng(args.seed))
+    finally:
+        backend.close()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"arguments": vars(args), "scenarios": scenarios}, output_file, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Repeatable synthetic datasets shaped like the app's import CSVs."""
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+FACTOR_TYPES = ["lifestyle", "disease", "exposure", "diet"]
+DIRECTIONS = ["increase", "decrease"]
+MICROBE_RANKS = ["phylum", "class", "order", "family", "genus", "species"]
+
+
+class SyntheticDataset:
+    """DataFrames for each import endpoint plus the edges between them.
+
+    ``cpg_factor_edges`` holds (CpG internal ID, factor name) pairs and
+    ``microbe_disease_df`` the Taxon/DOID pairs the microbe-disease
+    endpoint reads.
+    """
+
+    def __init__(
+        self,
+        factor_df: pd.DataFrame,
+        cpg_df: pd.DataFrame,
+        cpg_factor_edges: List[Tuple[int, str]],
+        microbe_df: pd.DataFrame,
+        disease_df: pd.DataFrame,
+        microbe_disease_df: pd.DataFrame,
+    ) -> None:
+        self.factor_df = factor_df
+        self.cpg_df = cpg_df
+        self.cpg_factor_edges = cpg_factor_edges
+        self.microbe_df = microbe_df
+        self.disease_df = disease_df
+        self.microbe_disease_df = microbe_disease_df
+
+    @property
+    def factor_names(self) -> List[str]:
+        return self.factor_df["Association"].tolist()
+
+    def summary(self) -> dict:
+        return {
+            "factors": len(self.factor_df),
+            "cpgs": len(self.cpg_df),
+            "cpg_names": int(self.cpg_df["CpG"].nunique()),
+            "cpg_factor_edges": len(self.cpg_factor_edges),
+            "microbes": len(self.microbe_df),
+            "diseases": len(self.disease_df),
+            "microbe_disease_edges": len(self.microbe_disease_df),
+        }
+
+
+def _fan_out(rng: np.random.Generator, count: int, mean_fan_out: float, choices: int) -> np.ndarray:
+    # At least one edge each, Poisson-distributed around the mean, capped by the choices
+    return np.minimum(1 + rng.poisson(max(mean_fan_out - 1, 0), size=count), choices)
+
+
+def _skewed_weights(rng: np.random.Generator, count: int, skew: float) -> np.ndarray:
+    # Zipf-like popularity so a few factors/diseases own most of the edges
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate_dataset(
+    cpg_count: int = 10000,
+    factor_count: int = 50,
+    fan_out: float = 3.0,
+    microbe_count: int = 1000,
+    disease_count: int = 100,
+    microbe_fan_out: float = 2.0,
+    shared_name_fraction: float = 0.02,
+    skew: float = 1.0,
+    seed: int = 0,
+) -> SyntheticDataset:
+    """Generate a dataset; the same arguments always give the same data.
+
+    Each CpG is attached to about ``fan_out`` factors and each microbe to
+    about ``microbe_fan_out`` diseases, drawn with Zipf-like popularity.
+    ``shared_name_fraction`` of the CpGs reuse the name of an earlier CpG
+    under a new internal ID, as repeated probes do in the real imports.
+    """
+    rng = np.random.default_rng(seed)
+
+    factor_names = [f"Factor {index:04d}" for index in range(factor_count)]
+    factor_df = pd.DataFrame({
+        "id": np.arange(1, factor_count + 1),
+        "Association": factor_names,
+        "Case_Description": [f"synthetic factor {index}" for index in range(factor_count)],
+        "Type": rng.choice(FACTOR_TYPES, size=factor_count),
+    })
+
+    name_numbers = rng.choice(10 ** 8, size=cpg_count, replace=False)
+    shared = np.flatnonzero(rng.random(cpg_count) < shared_name_fraction)
+    shared = shared[shared > 0]
+    name_numbers[shared] = name_numbers[rng.integers(0, shared)]
+    cpg_df = pd.DataFrame({
+        "Internal ID": np.arange(1, cpg_count + 1),
+        "CpG": [f"cg{number:08d}" for number in name_numbers],
+        "Occurrences": rng.integers(1, 20, size=cpg_count),
+        "Direction": rng.choice(DIRECTIONS, size=cpg_count),
+        "M-Value Baseline": np.round(rng.normal(0, 2, size=cpg_count), 3),
+        "Beta Baseline": np.round(rng.uniform(0, 100, size=cpg_count), 2),
+    })
+
+    factor_weights = _skewed_weights(rng, factor_count, skew)
+    cpg_factor_edges = []
+    for internal_id, edge_count in zip(
+        cpg_df["Internal ID"].tolist(), _fan_out(rng, cpg_count, fan_out, factor_count).tolist()
+    ):
+        factor_indexes = rng.choice(factor_count, size=edge_count, replace=False, p=factor_weights)
+        cpg_factor_edges.extend((internal_id, factor_names[index]) for index in factor_indexes)
+
+    disease_ids = [f"DOID:{index:07d}" for index in range(disease_count)]
+    disease_df = pd.DataFrame({
+        "id": disease_ids,
+        "label": [f"synthetic disease {index}" for index in range(disease_count)],
+    })
+
+    taxa = [f"Taxon {index:06d}" for index in range(microbe_count)]
+    microbe_df = pd.DataFrame({
+        "Taxon": taxa,
+        "Rank": rng.choice(MICROBE_RANKS, size=microbe_count),
+        "Occurrences": rng.integers(1, 10, size=microbe_count),
+        "Direction": rng.choice(["positive", "negative"], size=microbe_count),
+        "Correlation Coefficient": np.round(rng.uniform(-1, 1, size=microbe_count), 3),
+        "p Value": np.round(rng.uniform(0, 1, size=microbe_count), 3),
+    })
+
+    disease_weights = _skewed_weights(rng, disease_count, skew)
+    microbe_disease_pairs = []
+    for taxon, edge_count in zip(taxa, _fan_out(rng, microbe_count, microbe_fan_out, disease_count).tolist()):
+        disease_indexes = rng.choice(disease_count, size=edge_count, replace=False, p=disease_weights)
+        microbe_disease_pairs.extend((taxon, disease_ids[index]) for index in disease_indexes)
+    microbe_disease_df = pd.DataFrame(microbe_disease_pairs, columns=["Taxon", "DOID"])
+
+    return SyntheticDataset(factor_df, cpg_df, cpg_factor_edges, microbe_df, disease_df, microbe_disease_df)
@@ -0,0 +1,43 @@
+import os
+import sys
+
+# Keep the import progress bars out of the test output
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The app imports its modules flat; the local graph stand-in lives with the benchmarks
+sys.path[:0] = [os.path.join(ROOT_DIR, "app"), os.path.join(ROOT_DIR, "benchmarks")]
+
+import pytest  # noqa: E402
+from gremlin_python.process.anonymous_traversal import traversal  # noqa: E402
+
+from local_graph import LocalRemoteConnection  # noqa: E402
+
+
+@pytest.fixture
+def local_connection():
+    connection = LocalRemoteConnection()
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def g(local_connection):
+    return traversal().with_remote(local_connection)
+
+
+@pytest.fixture(scope="session")
+def loaded_graph():
+    """A synthetic dataset imported through the app's ingest paths, shared by every test."""
+    from run_benchmarks import Backend, quiet, run_ingest
+    from synthetic_data import generate_dataset
+
+    dataset = generate_dataset(
+        cpg_count=600, factor_count=12, fan_out=3.0, microbe_count=20, disease_count=5,
+        shared_name_fraction=0.05, seed=7,
+    )
+    backend = Backend(None, 0.0)
+    with quiet():
+        run_ingest(backend, dataset)
+    yield backend.g, dataset
+    backend.close()
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+from gremlin_python.process.anonymous_traversal import traversal
+from gremlin_python.process.graph_traversal import __
+
+from database import EDGE_CREATED, EDGE_EXISTING, BulkExecutionError, BulkQueryExecutor
+from local_graph import LocalRemoteConnection
+
+
+@pytest.mark.parametrize("max_in_flight", [0, 3])
+def test_captured_vertex_ids_match_the_graph(g, max_in_flight):
+    query_executor = BulkQueryExecutor(g, max_query_count=7, max_in_flight=max_in_flight)
+    for index in range(50):
+        query_executor.add_encoded_vertex("cpg", {"name": f"cg{index:08d}"}, capture_key=index)
+    query_executor.force_execute()
+
+    captured = query_executor.captured_results()
+    graph_ids = {
+        row["name"]: row["id"]
+        for row in g.V().hasLabel("cpg").project("name", "id").by("name").by(__.id_()).toList()
+    }
+    assert len(captured) == 50
+    assert captured == {index: graph_ids[f"cg{index:08d}"] for index in range(50)}
+
+
+def test_single_capture_in_a_batch(g):
+    query_executor = BulkQueryExecutor(g, max_query_count=1)
+    query_executor.add_vertex("factor", properties={"name": "Sleep"}, capture_key="Sleep")
+    query_executor.force_execute()
+    assert query_executor.captured_results() == {"Sleep": g.V().has("factor", "name", "Sleep").id_().next()}
+
+
+def test_uncaptured_mutations_are_not_reported(g):
+    query_executor = BulkQueryExecutor(g, max_query_count=4)
+    query_executor.add_vertex("factor", properties={"name": "Sleep"})
+    query_executor.add_vertex("factor", properties={"name": "Diet"}, capture_key="Diet")
+    query_executor.force_execute()
+    assert list(query_executor.captured_results()) == ["Diet"]
+
+
+def test_edge_if_not_exist_reports_created_then_existing(g):
+    microbe_id = g.addV("microbe").id_().next()
+    disease_ids = [g.addV("disease").id_().next() for _ in range(3)]
+
+    query_executor = BulkQueryExecutor(g, max_query_count=2)
+    for disease_id in disease_ids:
+        query_executor.add_edge_if_not_exist(microbe_id, disease_id, "associated with", capture_key=disease_id)
+    query_executor.force_execute()
+    assert query_executor.captured_results() == {disease_id: EDGE_CREATED for disease_id in disease_ids}
+
+    query_executor = BulkQueryExecutor(g, max_query_count=2)
+    for disease_id in disease_ids:
+        query_executor.add_edge_if_not_exist(microbe_id, disease_id, "associated with", capture_key=disease_id)
+    query_executor.force_execute()
+    assert query_executor.captured_results() == {disease_id: EDGE_EXISTING for disease_id in disease_ids}
+    assert g.V(microbe_id).outE("associated with").count().next() == 3
+
+
+class FailingConnection(LocalRemoteConnection):
+    """Fails every batch that adds a vertex labelled ``bad``."""
+
+    def submit(self, bytecode):
+        time.sleep(0.01)
+        if ["addV", "bad"] in [list(instruction) for instruction in bytecode.step_instructions]:
+            raise RuntimeError("batch rejected")
+        return super().submit(bytecode)
+
+
+@pytest.fixture
+def failing_g():
+    connection = FailingConnection()
+    yield traversal().with_remote(connection)
+    connection.close()
+
+
+def test_synchronous_batch_error_is_raised_immediately(failing_g):
+    query_executor = BulkQueryExecutor(failing_g, max_query_count=1)
+    with pytest.raises(RuntimeError, match="batch rejected"):
+        query_executor.add_vertex("bad")
+
+
+def test_single_pipelined_failure_is_raised_as_is(failing_g):
+    batches = []
+    query_executor = BulkQueryExecutor(
+        failing_g, max_query_count=1, max_in_flight=4, on_batch=lambda *batch: batches.append(batch)
+    )
+    query_executor.add_vertex("good")
+    query_executor.add_vertex("bad")
+    query_executor.add_vertex("good")
+    with pytest.raises(RuntimeError, match="batch rejected"):
+        query_executor.force_execute()
+
+    # Every batch was reported, the failed one with its error
+    assert len(batches) == 3
+    assert sum(1 for batch in batches if batch[3] is not None) == 1
+    assert failing_g.V().hasLabel("good").count().next() == 2
+
+
+def test_several_pipelined_failures_are_collected(failing_g):
+    query_executor = BulkQueryExecutor(failing_g, max_query_count=1, max_in_flight=4)
+    for _ in range(3):
+        query_executor.add_vertex("bad")
+    with pytest.raises(BulkExecutionError) as raised:
+        query_executor.force_execute()
+    assert len(raised.value.errors) == 3
+
+
+def test_failure_under_backpressure_drains_every_batch(failing_g):
+    query_executor = BulkQueryExecutor(failing_g, max_query_count=1, max_in_flight=2)
+    with pytest.raises((RuntimeError, BulkExecutionError)):
+        for _ in range(10):
+            query_executor.add_vertex("bad")
+
+    stats = query_executor.stats()
+    assert stats["in_flight"] == 0
+    assert stats["batches"] < 10
+    assert not any(thread.name.startswith("bulk-flush") for thread in threading.enumerate())
@@ -0,0 +1,100 @@
+import pandas as pd
+import pytest
+from gremlin_python.process.traversal import P
+
+from data_objects import CpG, CpGGroup, Factor
+from database import BulkQueryExecutor
+from gremlin_queries import add_factors, get_cpg_group, get_factor_ids, refresh_cpg_group, save_cpg_group
+
+PENDING_FACTOR = "Not yet ingested"
+
+
+@pytest.fixture
+def group_graph():
+    # Saving groups and adding factors writes to the graph, so each test imports its own copy
+    from run_benchmarks import Backend, quiet, run_ingest
+    from synthetic_data import generate_dataset
+
+    dataset = generate_dataset(
+        cpg_count=300, factor_count=6, fan_out=3.0, microbe_count=5, disease_count=2, seed=11,
+    )
+    backend = Backend(None, 0.0)
+    with quiet():
+        run_ingest(backend, dataset)
+    yield backend.g, dataset
+    backend.close()
+
+
+def factor_df(*names):
+    return pd.DataFrame({"Association": list(names), "Type": ["Health"] * len(names)})
+
+
+def link_cpgs(g, cpg_names, factor_name):
+    from run_benchmarks import CPG_FACTOR_EDGE_LABEL
+
+    factor_id = get_factor_ids(g, [factor_name])[factor_name]
+    query_executor = BulkQueryExecutor(g)
+    for cpg_id in g.V().has(CpG.LABEL, CpG.PropertyKey.NAME, P.within(*cpg_names)).id_().toList():
+        query_executor.add_edge(cpg_id, factor_id, CPG_FACTOR_EDGE_LABEL)
+    query_executor.force_execute()
+
+
+def test_refresh_keeps_factors_that_do_not_exist_yet(group_graph):
+    g, dataset = group_graph
+    factors = [dataset.factor_names[0], PENDING_FACTOR]
+
+    assert save_cpg_group(g, "pending", CpGGroup.Mode.ALL, factors)["members"] == 0
+    assert refresh_cpg_group(g, "pending")["members"] == 0
+
+    group = get_cpg_group(g, "pending")
+    assert group["mode"] == CpGGroup.Mode.ALL
+    assert sorted(group["factors"]) == sorted(factors)
+    assert group["rows"] == []
+
+
+def test_refresh_picks_up_a_factor_created_after_saving(group_graph):
+    g, dataset = group_graph
+    first_factor = dataset.factor_names[0]
+    save_cpg_group(g, "pending", CpGGroup.Mode.ALL, [first_factor, PENDING_FACTOR])
+
+    first_factor_cpgs = (
+        g.V().has(Factor.LABEL, Factor.PropertyKey.NAME, first_factor)
+        .in_().values(CpG.PropertyKey.NAME).dedup().toList()
+    )
+    linked_names = sorted(first_factor_cpgs)[:5]
+    add_factors(g, factor_df(PENDING_FACTOR))
+    link_cpgs(g, linked_names, PENDING_FACTOR)
+
+    refreshed = refresh_cpg_group(g, "pending")
+    assert refreshed["added"] == refreshed["members"] > 0
+
+    group = get_cpg_group(g, "pending")
+    assert sorted({row["CpG ID"] for row in group["rows"]}) == linked_names
+    assert sorted(group["factors"]) == sorted([first_factor, PENDING_FACTOR])
+    assert not group["stale"]
+
+
+def test_ingesting_a_named_factor_marks_the_group_stale(group_graph):
+    g, dataset = group_graph
+    save_cpg_group(g, "pending", CpGGroup.Mode.ANY, [dataset.factor_names[0], PENDING_FACTOR])
+    save_cpg_group(g, "unrelated", CpGGroup.Mode.ANY, [dataset.factor_names[1]])
+    assert not get_cpg_group(g, "pending")["stale"]
+
+    add_factors(g, factor_df(PENDING_FACTOR))
+
+    assert get_cpg_group(g, "pending")["stale"]
+    assert not get_cpg_group(g, "unrelated")["stale"]
+
+    refresh_cpg_group(g, "pending")
+    assert not get_cpg_group(g, "pending")["stale"]
+
+
+def test_reingesting_an_existing_factor_marks_the_group_stale(group_graph):
+    g, dataset = group_graph
+    save_cpg_group(g, "existing", CpGGroup.Mode.AT_LEAST_K, dataset.factor_names[:3], k=2)
+
+    add_factors(g, factor_df(dataset.factor_names[2]))
+
+    group = get_cpg_group(g, "existing")
+    assert group["stale"]
+    assert group["k"] == 2
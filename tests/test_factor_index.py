@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from factor_index import FactorIndex
+from gremlin_queries import (
+    get_factor_index_rows,
+    group_cpgs_by_all_selected_factors,
+    group_cpgs_by_any_selected_health_factor,
+    group_cpgs_by_at_least_k_selected_factors,
+)
+
+
+def row_set(rows):
+    # The index answers in CpG name order; the traversals don't promise one
+    return sorted(json.dumps(row, sort_keys=True, default=str) for row in rows)
+
+
+@pytest.fixture(scope="module")
+def factor_index(loaded_graph):
+    g, _ = loaded_graph
+    return FactorIndex.from_cpg_rows(get_factor_index_rows(g))
+
+
+def factor_sets(dataset):
+    names = dataset.factor_names
+    return [
+        names[:1],
+        names[:2],
+        names[1:4],
+        [names[3], names[0], names[3]],
+        names[:2] + ["No such factor"],
+    ]
+
+
+@pytest.mark.parametrize("set_index", range(5))
+def test_all_selected_factors_match_traversal(loaded_graph, factor_index, set_index):
+    g, dataset = loaded_graph
+    factors = factor_sets(dataset)[set_index]
+    expected = group_cpgs_by_all_selected_factors(g, factors, "test")
+    assert row_set(factor_index.group_cpgs_by_all_selected_factors(factors)) == row_set(expected)
+
+
+@pytest.mark.parametrize("set_index", range(5))
+def test_any_selected_factor_matches_traversal(loaded_graph, factor_index, set_index):
+    g, dataset = loaded_graph
+    factors = factor_sets(dataset)[set_index]
+    expected = group_cpgs_by_any_selected_health_factor(g, factors, "test")
+    assert expected
+    assert row_set(factor_index.group_cpgs_by_any_selected_health_factor(factors)) == row_set(expected)
+
+
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_at_least_k_selected_factors_match_traversal(loaded_graph, factor_index, k):
+    g, dataset = loaded_graph
+    factors = dataset.factor_names[:4]
+    expected = group_cpgs_by_at_least_k_selected_factors(g, factors, "test", k)
+    assert row_set(factor_index.group_cpgs_by_at_least_k_selected_factors(factors, k)) == row_set(expected)
+
+
+@pytest.mark.parametrize("page", [
+    {"limit": 5},
+    {"limit": 5, "offset": 3},
+    {"after": "cg50000000"},
+    {"limit": 4, "after": "cg20000000"},
+])
+def test_pages_match_traversal(loaded_graph, factor_index, page):
+    g, dataset = loaded_graph
+    factors = dataset.factor_names[:3]
+    expected = group_cpgs_by_any_selected_health_factor(g, factors, "test", **page)
+    assert row_set(factor_index.group_cpgs_by_any_selected_health_factor(factors, **page)) == row_set(expected)
+    expected = group_cpgs_by_at_least_k_selected_factors(g, factors, "test", 2, **page)
+    assert row_set(factor_index.group_cpgs_by_at_least_k_selected_factors(factors, 2, **page)) == row_set(expected)
+
+
+def test_unknown_factors_match_nothing(factor_index):
+    assert factor_index.group_cpgs_by_any_selected_health_factor(["No such factor"]) == []
+    assert factor_index.group_cpgs_by_all_selected_factors(["No such factor"]) == []
@@ -0,0 +1,67 @@
+from query_cache import QueryResultCache
+
+
+def test_hit_after_put():
+    cache = QueryResultCache()
+    key = cache.make_key("OR", ["b", "a"])
+    cache.put(key, "rows")
+    assert cache.get(key) == "rows"
+    assert cache.get(cache.make_key("OR", ["a", "b", "a"])) == "rows"
+    assert cache.stats()["hits"] == 2
+
+
+def test_generation_bump_invalidates_entries():
+    cache = QueryResultCache()
+    cache.put("key", "rows")
+    assert cache.bump_generation() == 1
+    assert cache.get("key") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_computed_before_a_bump_is_not_stored():
+    cache = QueryResultCache()
+    generation = cache.generation
+    cache.bump_generation()
+    cache.put("key", "stale rows", generation)
+    assert cache.get("key") is None
+
+    cache.put("key", "fresh rows", cache.generation)
+    assert cache.get("key") == "fresh rows"
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = QueryResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_size():
+    cache = QueryResultCache(max_bytes=10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+    cache.put("c", "zzzz")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 8
+
+    cache.put("d", "w" * 11)
+    assert cache.get("d") is None
+    assert cache.stats()["oversized"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("query_cache.time.monotonic", lambda: now[0])
+    cache = QueryResultCache(ttl=5)
+    cache.put("key", "rows")
+    now[0] += 4
+    assert cache.get("key") == "rows"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def make_counted_call(calls: list, result="rows", error=None):
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if error is not None:
+            raise error
+        return result
+    return call
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            *[single_flight.run(("query", "a"), make_counted_call(calls)) for _ in range(10)]
+        )
+
+    assert asyncio.run(scenario()) == ["rows"] * 10
+    assert len(calls) == 1
+    stats = single_flight.stats()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 9
+    assert stats["in_flight"] == 0
+
+
+def test_different_keys_run_separately():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            single_flight.run(("query", "a"), make_counted_call(calls, "a")),
+            single_flight.run(("query", "b"), make_counted_call(calls, "b")),
+        )
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert len(calls) == 2
+
+
+def test_finished_calls_are_not_reused():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        await single_flight.run(("query",), make_counted_call(calls))
+        await single_flight.run(("query",), make_counted_call(calls))
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_error_reaches_every_waiting_caller():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            *[
+                single_flight.run(("query",), make_counted_call(calls, error=ValueError("graph unavailable")))
+                for _ in range(3)
+            ],
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    assert single_flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def scenario():
+        first = asyncio.ensure_future(single_flight.run(("query",), make_counted_call(calls)))
+        second = asyncio.ensure_future(single_flight.run(("query",), make_counted_call(calls)))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "rows"
+    assert len(calls) == 1
@@ -0,0 +1,116 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+
+from gremlin_queries import (
+    count_selected_factor_cpgs,
+    cpg_name_range_end,
+    group_cpgs_by_all_selected_factors,
+    group_cpgs_by_any_selected_health_factor,
+    group_cpgs_by_at_least_k_selected_factors,
+)
+from models import FactorRequest
+
+PAGE_SIZE = 40
+
+
+@pytest.fixture
+def main(loaded_graph, monkeypatch):
+    import database_connection
+    import main
+    import settings
+
+    g, _ = loaded_graph
+
+    @contextlib.asynccontextmanager
+    async def acquire_async():
+        yield g
+
+    monkeypatch.setattr(database_connection, "acquire_gremlin_client_async", acquire_async)
+    monkeypatch.setattr(settings, "STREAM_PAGE_SIZE", PAGE_SIZE)
+    monkeypatch.setattr(settings, "FACTOR_INDEX_ENABLED", False)
+    return main
+
+
+def collect_pages(main, query_func, factors, criteria, limit=None, offset=0, after=None):
+    factor_request = FactorRequest(factors=factors, cpg_group_name="test")
+    page = {"limit": limit, "offset": offset, "after": after}
+
+    async def collect():
+        return [rows async for rows in main.name_range_group_pages(query_func, factor_request, criteria, page)]
+
+    return asyncio.run(collect())
+
+
+def row_keys(rows):
+    return [json.dumps(row, sort_keys=True, default=str) for row in rows]
+
+
+def group_queries(dataset):
+    factors = dataset.factor_names[:4]
+    return [
+        (group_cpgs_by_any_selected_health_factor, factors, {}),
+        (group_cpgs_by_all_selected_factors, factors[:2], {}),
+        (group_cpgs_by_at_least_k_selected_factors, factors, {"k": 2}),
+    ]
+
+
+def test_cpg_name_range_end():
+    assert cpg_name_range_end("cg01261464", 5) == "cg013"
+    assert cpg_name_range_end("cg01261464", 20) == "cg01261465"
+    assert cpg_name_range_end("cg013", 5) == "cg014"
+    assert cpg_name_range_end("", 3) is None
+
+
+@pytest.mark.parametrize("query_index", range(3))
+def test_ranges_cover_the_whole_result_in_name_order(main, loaded_graph, query_index):
+    g, dataset = loaded_graph
+    query_func, factors, criteria = group_queries(dataset)[query_index]
+    expected = query_func(g, factors, "test", **criteria)
+    assert expected
+
+    pages = collect_pages(main, query_func, factors, criteria)
+    assert len(pages) > 1
+    rows = [row for page_rows in pages for row in page_rows]
+    assert sorted(row_keys(rows)) == sorted(row_keys(expected))
+
+    names = [row["CpG ID"] for row in rows]
+    assert names == sorted(names)
+    # No CpG name is split across two ranges
+    page_names = [set(row["CpG ID"] for row in page_rows) for page_rows in pages]
+    assert sum(len(names) for names in page_names) == len(set().union(*page_names))
+
+
+@pytest.mark.parametrize("query_index", range(3))
+def test_offset_limit_and_cursor_match_keyset_paging(main, loaded_graph, query_index):
+    g, dataset = loaded_graph
+    query_func, factors, criteria = group_queries(dataset)[query_index]
+    all_names = sorted({row["CpG ID"] for row in query_func(g, factors, "test", **criteria)})
+
+    rows = [row for page_rows in collect_pages(main, query_func, factors, criteria, limit=7, offset=3) for row in page_rows]
+    assert sorted({row["CpG ID"] for row in rows}) == all_names[3:10]
+
+    after = all_names[len(all_names) // 2]
+    rows = [row for page_rows in collect_pages(main, query_func, factors, criteria, after=after) for row in page_rows]
+    assert sorted({row["CpG ID"] for row in rows}) == [name for name in all_names if name > after]
+
+
+def test_each_range_walks_a_bounded_number_of_cpgs(main, loaded_graph, monkeypatch):
+    g, dataset = loaded_graph
+    factors = dataset.factor_names[:4]
+    fetched_ranges = []
+    run_gremlin_query = main.run_gremlin_query
+
+    async def record_ranges(query_func, *args, **kwargs):
+        if "up_to" in kwargs and query_func is group_cpgs_by_any_selected_health_factor:
+            fetched_ranges.append((kwargs["after"], kwargs["up_to"]))
+        return await run_gremlin_query(query_func, *args, **kwargs)
+
+    monkeypatch.setattr(main, "run_gremlin_query", record_ranges)
+    collect_pages(main, group_cpgs_by_any_selected_health_factor, factors, {})
+
+    assert fetched_ranges
+    for after, up_to in fetched_ranges:
+        assert 0 < count_selected_factor_cpgs(g, factors, after, up_to) <= PAGE_SIZE